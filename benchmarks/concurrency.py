@@ -0,0 +1,194 @@
+"""
+Concurrency stress check: concurrent actions on one game and card conservation.
+
+A thread per player acts on one shared game with all house rules, so with jump-in
+every thread may act at any time, and reader threads take state exports and
+snapshots like the socket handlers do. Churn threads create and dispose games in
+scopes of their own and look players up, which changes and iterates the shared
+registries. The switch interval is lowered to force many thread switches.
+
+Every export, and the game at the end, must hold each card in exactly one stack
+with the stack as its owner. The dealt cards must be the cards of the deck; the
+draw cards add markers to the game stack, these are the only extra cards. Exits
+with 1 on a violation or on an error other than a rejected action.
+tests/test_concurrency.py runs short stress games with the same checks.
+
+Usage: python benchmarks/concurrency.py [--players N] [--seconds S] [--readers N] [--churners N]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from squirreluno.card_logic import MarkerCard
+from squirreluno.rule_engine import HouseRules
+from squirreluno.rules import Game, Player
+from squirreluno.utils import ComponentManager, UIDObject
+
+SHARED_SCOPE = "stress-shared"
+SWITCH_INTERVAL = 1e-6
+
+def exported_violations(state: dict, deck: set):
+    """
+    Checks the conservation of the cards in an exported state.
+
+    Returns:
+        list[str]: The violations.
+    """
+    violations = []
+    seen = {}
+    for owner, cards in state["stacks"].items():
+        for spec in cards:
+            if spec["uid"] in seen:
+                violations.append(f"card {spec['uid']} in stacks {seen[spec['uid']]} and {owner}")
+            seen[spec["uid"]] = owner
+            if spec["owner"] != owner:
+                violations.append(f"card {spec['uid']} in stack {owner} is owned by {spec['owner']}")
+    dealt = {uid for uid, owner in seen.items() if uid in deck}
+    extra = {uid for uid, owner in seen.items() if uid not in deck and owner != "game"}
+    if dealt != deck:
+        violations.append(f"{len(deck - dealt)} cards of the deck are missing")
+    if extra:
+        violations.append(f"{len(extra)} unknown cards outside of the game stack")
+    return violations
+
+def live_violations(game: Game, deck: set):
+    """
+    Checks the conservation of the cards of the game itself, and that every card is registered.
+    """
+    violations = exported_violations(game.export_state(), deck)
+    for stack in game._iterate_stacks():
+        for uid, card in stack.cards.items():
+            if UIDObject._objects.get(uid) is not card:
+                violations.append(f"card {uid} is not registered")
+            if card.uid not in deck and not isinstance(card, MarkerCard):
+                violations.append(f"card {uid} is neither dealt nor a marker")
+    return violations
+
+def stress(players: int, seconds: float, readers: int, churners: int):
+    random.seed(1234)
+    names = [f"Player {number}" for number in range(1, players + 1)]
+    with ComponentManager.scope(SHARED_SCOPE):
+        game = Game(names, house_rules=HouseRules.from_names(HouseRules.NAMES))
+    deck = {card["uid"] for cards in game.export_state()["stacks"].values() for card in cards}
+    stop = threading.Event()
+    errors = []
+    violations = []
+    counts = {"actions": 0, "rejected": 0, "exports": 0, "games_churned": 0}
+    counts_lock = threading.Lock()
+
+    def count(name):
+        with counts_lock:
+            counts[name] += 1
+
+    def guarded(function):
+        def run(*args):
+            try:
+                function(*args)
+            except Exception as error:
+                errors.append(f"{threading.current_thread().name}: {type(error).__name__}: {error}")
+                stop.set()
+        return run
+
+    @guarded
+    def play(player):
+        rng = random.Random(player.game_position)
+        with ComponentManager.scope(SHARED_SCOPE):
+            while not stop.is_set() and game.game_active:
+                actions = game.legal_actions(player)
+                try:
+                    if actions["choose"]:
+                        game.decide(player.uid, rng.choice(actions["choose"]))
+                    elif actions["cards"]:
+                        game.apply_action(player.uid, str(rng.choice(actions["cards"])))
+                    elif actions["draw"]:
+                        game.apply_action(player.uid, "draw")
+                    elif actions["next"]:
+                        game.apply_action(player.uid, "next")
+                    else:
+                        time.sleep(0)
+                        continue
+                    count("actions")
+                except ValueError:
+                    # another thread acted first, e.g. jumped in or drew the last card
+                    count("rejected")
+            # the game is over, the readers and churners stop with it
+            stop.set()
+
+    @guarded
+    def read():
+        rng = random.Random()
+        with ComponentManager.scope(SHARED_SCOPE):
+            while not stop.is_set():
+                state = game.export_state()
+                found = exported_violations(state, deck)
+                if found:
+                    violations.extend(found)
+                    stop.set()
+                game.player_snapshot(rng.choice(list(game.players.values())))
+                game.table_snapshot()
+                count("exports")
+
+    @guarded
+    def churn(number):
+        index = 0
+        while not stop.is_set():
+            scope_id = f"stress-churn-{number}-{index}"
+            with ComponentManager.scope(scope_id):
+                other = Game(["Churn A", "Churn B"])
+                Player.get_uid("Churn A")
+                other.dispose()
+            ComponentManager.delete_scope(scope_id)
+            index += 1
+            count("games_churned")
+
+    previous_interval = sys.getswitchinterval()
+    sys.setswitchinterval(SWITCH_INTERVAL)
+    threads = [threading.Thread(target=play, args=(player,), name=f"player-{player.game_position}")
+               for player in game.players.values()]
+    threads += [threading.Thread(target=read, name=f"reader-{number}") for number in range(readers)]
+    threads += [threading.Thread(target=churn, args=(number,), name=f"churn-{number}") for number in range(churners)]
+    started = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        stop.wait(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(previous_interval)
+    elapsed = time.perf_counter() - started
+
+    with ComponentManager.scope(SHARED_SCOPE):
+        violations.extend(live_violations(game, deck))
+        finished = not game.game_active
+        game.dispose()
+    ComponentManager.delete_scope(SHARED_SCOPE)
+    return {"seconds": round(elapsed, 2), "finished": finished, **counts,
+            "violations": violations[:10], "errors": errors[:10]}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0, help="time limit of a game")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--churners", type=int, default=2)
+    parser.add_argument("--games", type=int, default=5, help="shared games played one after another")
+    args = parser.parse_args(argv)
+
+    # the setup output of the games, redirected once, since every thread prints
+    with contextlib.redirect_stdout(io.StringIO()):
+        runs = [stress(args.players, args.seconds, args.readers, args.churners) for _ in range(args.games)]
+    print(json.dumps({"runs": runs}, indent=2))
+    return 1 if any(run["violations"] or run["errors"] for run in runs) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
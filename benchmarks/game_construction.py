@@ -0,0 +1,73 @@
+"""
+Games constructed per second.
+
+Creates and disposes games for a fixed time, like rooms that churn constantly,
+and compares cloning the deck template with building the deck from scratch.
+
+Usage: python benchmarks/game_construction.py [--seconds S] [--players N]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hot_paths import SEED
+from squirreluno.card_logic import Stack
+from squirreluno.rules import Game
+from squirreluno.utils import ComponentManager, UIDObject
+
+def games_per_second(seconds: float, players: list):
+    random.seed(SEED)
+    games = 0
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        scope_id = f"construction-{games}"
+        with ComponentManager.scope(scope_id):
+            Game(players).dispose()
+        ComponentManager.delete_scope(scope_id)
+        games += 1
+    return games / (time.perf_counter() - started)
+
+def decks_per_second(seconds: float, build):
+    random.seed(SEED)
+    decks = 0
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for uid in build():
+            UIDObject.remove(uid)
+        decks += 1
+    return decks / (time.perf_counter() - started)
+
+def rebuild_deck():
+    # the deck setup before the template: constructors, then a shuffle of the stack
+    stack = Stack("global", Game._create_cards())
+    stack.shuffle_deck()
+    UIDObject.remove(stack.uid)
+    return stack.cards
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--players", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    players = [f"player-{index}" for index in range(args.players)]
+    template = Game.deck_template()
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = {"games_per_s": round(games_per_second(args.seconds, players), 1),
+                  "decks_per_s": {"template_clone": round(decks_per_second(args.seconds,
+                                                                          lambda: template.instantiate("global")), 1),
+                                  "rebuild": round(decks_per_second(args.seconds, rebuild_deck), 1)},
+                  "cards_per_deck": len(template)}
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Benchmark suite for the card and game hot paths.
+
+Every case runs with a fixed seed, so two runs shuffle and deal the same cards.
+The results are printed as JSON and can be stored as baseline; the compare mode
+flags every case whose median got slower than the baseline by more than the
+threshold and exits with 1.
+
+Usage:
+    python benchmarks/hot_paths.py [--output baseline.json] [--case NAME ...]
+    python benchmarks/hot_paths.py --compare baseline.json [--threshold 0.1]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from squirreluno.card_logic import CardColor, DrawCard, JokerCard, NumberCard, Stack
+from squirreluno.messages import format_ansi
+from squirreluno.rule_engine import RuleEngine
+from squirreluno.rules import Game
+from squirreluno.terminal import TerminalRenderer
+from squirreluno.utils import ComponentManager
+
+SEED = 1234
+DEFAULT_REPEATS = 5
+DEFAULT_THRESHOLD = 0.10
+PLAYERS = ["Alice", "Bob", "Carol", "Dave"]
+MAX_SCRIPTED_TURNS = 300
+
+CASES = {}
+
+def case(name: str, number: int):
+    """
+    Registers a benchmark case.
+
+    The case function gets the number of operations to run and returns the seconds
+    spent in the measured part, so it can leave its setup out of the timing.
+
+    Args:
+        name (str): The name of the case in the report.
+        number (int): The default number of operations per repeat.
+    """
+    def register(function):
+        CASES[name] = (function, number)
+        return function
+    return register
+
+def make_cards(count: int):
+    colors = [color for color in CardColor if color != CardColor.NO_COLOR]
+    cards = {}
+    for index in range(count):
+        card = NumberCard(index % 9 + 1, colors[index % len(colors)])
+        cards[card.uid] = card
+    return cards
+
+@contextlib.contextmanager
+def stacks(*owners_and_cards):
+    """
+    Registers stacks as components of a throwaway scope, like a running game does.
+    """
+    scope_id = f"bench-{random.random()}"
+    with ComponentManager.scope(scope_id):
+        created = []
+        for owner, cards, sorted_stack in owners_and_cards:
+            for card in cards.values():
+                card.owner = owner
+            stack = Stack(owner, cards, sorted_stack=sorted_stack)
+            ComponentManager.register_component(owner, stack)
+            created.append(stack)
+        yield created
+    ComponentManager.delete_scope(scope_id)
+
+@case("card_transfer_owner", 20000)
+def bench_transfer_owner(number):
+    with stacks(("draw", make_cards(108), False), ("hand", {}, True)) as (draw, hand):
+        cards = list(draw.cards.values())[:7]
+        started = time.perf_counter()
+        for index in range(number // 2):
+            card = cards[index % len(cards)]
+            card.transfer_owner("draw", "hand")
+            card.transfer_owner("hand", "draw")
+        return time.perf_counter() - started
+
+def bench_add_card(number, sorted_stack):
+    with stacks(("hand", make_cards(15), sorted_stack)) as (hand,):
+        extra = list(make_cards(8).values())
+        started = time.perf_counter()
+        for index in range(number):
+            card = extra[index % len(extra)]
+            hand.add_card(card)
+            hand.remove_card(card)
+        return time.perf_counter() - started
+
+@case("stack_add_card_unsorted", 20000)
+def bench_add_card_unsorted(number):
+    return bench_add_card(number, False)
+
+@case("stack_add_card_sorted", 20000)
+def bench_add_card_sorted(number):
+    return bench_add_card(number, True)
+
+@case("stack_shuffle_deck", 2000)
+def bench_shuffle_deck(number):
+    with stacks(("draw", make_cards(108), False)) as (draw,):
+        started = time.perf_counter()
+        for _ in range(number):
+            draw.shuffle_deck()
+        return time.perf_counter() - started
+
+@case("stack_str", 2000)
+def bench_stack_str(number):
+    with stacks(("hand", make_cards(15), True)) as (hand,):
+        started = time.perf_counter()
+        for _ in range(number):
+            str(hand)
+        return time.perf_counter() - started
+
+@case("stack_str_changed", 2000)
+def bench_stack_str_changed(number):
+    # every render follows a change, so the layout cache cannot help
+    with stacks(("hand", make_cards(15), True)) as (hand,):
+        extra = make_cards(1).popitem()[1]
+        started = time.perf_counter()
+        for index in range(number):
+            if index % 2:
+                hand.remove_card(extra)
+            else:
+                hand.add_card(extra)
+            str(hand)
+        return time.perf_counter() - started
+
+def new_game(scope_id):
+    with ComponentManager.scope(scope_id):
+        return Game(PLAYERS)
+
+def drop_game(game, scope_id):
+    with ComponentManager.scope(scope_id):
+        game.dispose()
+    ComponentManager.delete_scope(scope_id)
+
+@case("game_master_init", 50)
+def bench_game_master_init(number):
+    elapsed = 0.0
+    for index in range(number):
+        started = time.perf_counter()
+        game = new_game(f"init-{index}")
+        elapsed += time.perf_counter() - started
+        drop_game(game, f"init-{index}")
+    return elapsed
+
+@case("discard_reshuffle", 200)
+def bench_discard_reshuffle(number):
+    elapsed = 0.0
+    for index in range(number):
+        scope_id = f"reshuffle-{index}"
+        game = new_game(scope_id)
+        with ComponentManager.scope(scope_id):
+            # the setup leaves all undealt cards in the game stack, the reshuffle moves them to the draw stack
+            started = time.perf_counter()
+            game._refill_draw_stack()
+            elapsed += time.perf_counter() - started
+        drop_game(game, scope_id)
+    return elapsed
+
+@case("player_draw", 2000)
+def bench_player_draw(number):
+    game = new_game("draw")
+    player = game.players[game.player_turn]
+    elapsed = 0.0
+    with ComponentManager.scope("draw"):
+        for _ in range(number):
+            game.drawn_this_turn = False
+            game.player_actions.clear()
+            # only the record of the draw, its text is formatted when a terminal shows it
+            started = time.perf_counter()
+            game.make_player_action(player, None, "draw")
+            elapsed += time.perf_counter() - started
+            game.player_actions[-1].card.transfer_owner(player.uid, "draw")
+    drop_game(game, "draw")
+    return elapsed
+
+def class_dispatch_can_play(game_card, player_card):
+    """
+    The match check before the rule engine, with type checks per card class.
+    """
+    if game_card.color == CardColor.NO_COLOR or player_card.color == CardColor.NO_COLOR:
+        color_match = True
+    else:
+        color_match = game_card.color == player_card.color
+    if type(game_card) is NumberCard and type(player_card) is NumberCard:
+        symbol_match = game_card.number == player_card.number
+    elif type(game_card) is JokerCard and type(player_card) is JokerCard:
+        symbol_match = game_card.title == player_card.title
+    elif JokerCard in (type(game_card), type(player_card)):
+        symbol_match = False
+    else:
+        symbol_match = None
+    return color_match or symbol_match
+
+def card_pairs(count: int):
+    random.seed(SEED)
+    deck = list(Game.deck_template().instantiate("global").values())
+    return [(random.choice(deck), random.choice(deck)) for _ in range(count)]
+
+@case("rule_match_table", 20000)
+def bench_rule_match_table(number):
+    pairs = card_pairs(number)
+    can_play = RuleEngine.compile().can_play
+    started = time.perf_counter()
+    for game_card, player_card in pairs:
+        can_play(game_card, player_card)
+    return time.perf_counter() - started
+
+@case("rule_match_classes", 20000)
+def bench_rule_match_classes(number):
+    pairs = card_pairs(number)
+    started = time.perf_counter()
+    for game_card, player_card in pairs:
+        class_dispatch_can_play(game_card, player_card)
+    return time.perf_counter() - started
+
+def scripted_turn(game):
+    """
+    Plays the first matching card, otherwise draws. Draw cards are kept, so the
+    scripted games stay comparable with runs from before the colour decisions.
+    """
+    player = game.players[game.player_turn]
+    top_card = game.game_stack.last_added_card
+    for index, card in enumerate(player.hands.cards.values(), start=1):
+        if not isinstance(card, DrawCard) and game._is_valid_card_to_play(top_card, card):
+            game.apply_action(player.uid, str(index))
+            break
+    else:
+        if len(game.draw_stack.cards) == 0:
+            return False
+        game.apply_action(player.uid, "draw")
+    if game.game_active:
+        game.apply_action(player.uid, "next")
+    return True
+
+@case("scripted_game", 20)
+def bench_scripted_game(number):
+    elapsed = 0.0
+    for index in range(number):
+        scope_id = f"scripted-{index}"
+        started = time.perf_counter()
+        game = new_game(scope_id)
+        with ComponentManager.scope(scope_id):
+            turns = 0
+            # without draw cards a game can stall, so it ends after a fixed number of turns
+            while game.game_active and turns < MAX_SCRIPTED_TURNS and scripted_turn(game):
+                turns += 1
+        elapsed += time.perf_counter() - started
+        drop_game(game, scope_id)
+    return elapsed
+
+@case("terminal_render", 2000)
+def bench_terminal_render(number):
+    game = new_game("render")
+    # the hands of two players in turn, like the frames of consecutive turns
+    frames = [[f"Your cards:\n{player.hands}", *map(format_ansi, game.player_actions)] for player in list(game.players.values())[:2]]
+    renderer = TerminalRenderer(io.StringIO())
+    started = time.perf_counter()
+    for index in range(number):
+        renderer.render(frames[index % len(frames)])
+    elapsed = time.perf_counter() - started
+    drop_game(game, "render")
+    return elapsed
+
+def run_case(name: str, repeats: int, number: int = None):
+    function, default_number = CASES[name]
+    number = number or default_number
+    timings = []
+    for _ in range(repeats):
+        random.seed(SEED)
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed = function(number)
+        timings.append(elapsed / number)
+    return {"number": number,
+            "repeats": repeats,
+            "min_us": round(min(timings) * 1e6, 3),
+            "median_us": round(statistics.median(timings) * 1e6, 3)}
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """
+    Compares the medians of a run with a stored baseline.
+
+    Returns:
+        dict[str, dict]: The ratio per case that exists in both, with the regressions flagged.
+    """
+    comparison = {}
+    for name, result in results.items():
+        previous = baseline.get("cases", {}).get(name)
+        if previous is None:
+            continue
+        ratio = result["median_us"] / previous["median_us"]
+        comparison[name] = {"baseline_median_us": previous["median_us"],
+                            "ratio": round(ratio, 3),
+                            "regression": ratio > 1 + threshold}
+    return comparison
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="run only these cases")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--number", type=int, default=None, help="operations per repeat for every case")
+    parser.add_argument("--output", help="also write the report to this file, e.g. as new baseline")
+    parser.add_argument("--compare", metavar="BASELINE", help="report of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown of the median before a case counts as regression")
+    args = parser.parse_args(argv)
+
+    results = {name: run_case(name, args.repeats, args.number) for name in args.case or CASES}
+    report = {"seed": SEED, "python": platform.python_version(), "cases": results}
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            report["comparison"] = compare(results, json.load(baseline_file), args.threshold)
+        report["regressions"] = sorted(name for name, entry in report["comparison"].items() if entry["regression"])
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    print(json.dumps(report, indent=2))
+    return 1 if report.get("regressions") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
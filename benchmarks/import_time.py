@@ -0,0 +1,71 @@
+"""
+Import time of the package modules, compared with a committed budget.
+
+Every module is imported in a fresh interpreter with python -X importtime, the
+median of the cumulative import time over the runs is compared with the budget
+in import_budget.json. The times depend on the machine and its load, so a
+module over its budget is only reported as a warning. The hard check is that
+the headless modules never load the web stack or the database driver, see also
+tests/test_imports.py. Exits with 1 on such an import.
+
+Usage: python benchmarks/import_time.py [--runs N] [--budget FILE] [--module NAME ...]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DEFAULT_BUDGET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_budget.json")
+DEFAULT_RUNS = 5
+# modules only the server layer may import
+HEAVY_MODULES = ("flask", "flask_socketio", "engineio", "socketio", "eventlet", "sqlalchemy")
+HEADLESS_MODULES = ("squirreluno.rules", "squirreluno.worker", "squirreluno.cli")
+
+def measure_import(module: str):
+    """
+    Imports a module in a fresh interpreter.
+
+    Returns:
+        tuple[float, list[str]]: The cumulative import time in ms and the heavy modules that got imported.
+    """
+    code = (f"import sys, {module}\n"
+            f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_DIR,
+                            capture_output=True, text=True, check=True)
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            cumulative_us = int(fields[1])
+    heavy = [name for name in result.stdout.strip().split(",") if name]
+    return cumulative_us / 1000, heavy
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--budget", default=DEFAULT_BUDGET)
+    parser.add_argument("--module", action="append", help="measure only these modules")
+    args = parser.parse_args(argv)
+
+    with open(args.budget) as budget_file:
+        budget = json.load(budget_file)
+    report = {"modules": {}, "warnings": [], "violations": []}
+    for module in args.module or budget:
+        runs = [measure_import(module) for _ in range(args.runs)]
+        median_ms = statistics.median(milliseconds for milliseconds, _ in runs)
+        heavy = sorted({name for _, imported in runs for name in imported})
+        report["modules"][module] = {"median_ms": round(median_ms, 2),
+                                     "budget_ms": budget.get(module),
+                                     "heavy_imports": heavy}
+        if module in budget and median_ms > budget[module]:
+            report["warnings"].append(f"{module} takes {median_ms:.1f} ms, budget {budget[module]} ms")
+        if module in HEADLESS_MODULES and heavy:
+            report["violations"].append(f"{module} imports {', '.join(heavy)}")
+    print(json.dumps(report, indent=2))
+    return 1 if report["violations"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
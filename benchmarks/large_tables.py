@@ -0,0 +1,101 @@
+"""
+Large tables: the latency of a turn and how often the played cards are reshuffled.
+
+Bots play games at tables of 20 and 50 players, choosing their moves from
+Game.legal_actions like the bots of legal_actions.py. A turn lasts from the
+first action of a player until the next player is on turn, the refill of the
+draw stack before every action included. The report holds the percentiles of
+the turn latency, the reshuffles per 100 turns and the cards moved by an
+average reshuffle.
+
+Usage: python benchmarks/large_tables.py [--players 20 50] [--games N] [--turns N]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hot_paths import SEED
+from legal_actions import bot_turn
+from squirreluno.rules import Game
+from squirreluno.utils import ComponentManager
+
+DEFAULT_TABLES = (20, 50)
+
+class CountingGame(Game):
+    """
+    Counts the reshuffles of its game and the cards they move.
+    """
+    def __init__(self, players: list, **kwargs):
+        self.reshuffles = 0
+        self.reshuffled_cards = 0
+        super().__init__(players, **kwargs)
+
+    def _reshuffle_played_cards(self):
+        self.reshuffles += 1
+        self.reshuffled_cards += len(self.game_stack.cards) - 1
+        super()._reshuffle_played_cards()
+
+def play_table(player_count: int, games: int, max_turns: int):
+    turn_seconds = []
+    turns = 0
+    reshuffles = 0
+    reshuffled_cards = 0
+    finished = 0
+    for game_index in range(games):
+        scope_id = f"table-{player_count}-{game_index}"
+        random.seed(SEED + game_index)
+        with ComponentManager.scope(scope_id):
+            game = CountingGame([f"Player {number}" for number in range(1, player_count + 1)])
+            # the first refill moves the undealt cards to the draw stack, it belongs to the setup
+            game._refill_draw_stack()
+            game.reshuffles = game.reshuffled_cards = 0
+            game_turns = 0
+            playing = True
+            while playing and game.game_active and game_turns < max_turns:
+                player_turn = game.player_turn
+                started = time.perf_counter()
+                while playing and game.game_active and game.player_turn == player_turn:
+                    game._refill_draw_stack()
+                    playing = bot_turn(game)
+                turn_seconds.append(time.perf_counter() - started)
+                game_turns += 1
+            turns += game_turns
+            reshuffles += game.reshuffles
+            reshuffled_cards += game.reshuffled_cards
+            finished += not game.game_active
+            game.dispose()
+        ComponentManager.delete_scope(scope_id)
+    turn_seconds.sort()
+    return {"decks": Game.decks_for(player_count),
+            "refill_threshold": max(Game.min_refill_threshold, player_count),
+            "games": games,
+            "finished": finished,
+            "turns": turns,
+            "turn_p50_us": round(statistics.median(turn_seconds) * 1e6, 1),
+            "turn_p99_us": round(turn_seconds[int(len(turn_seconds) * 0.99)] * 1e6, 1),
+            "turn_max_us": round(turn_seconds[-1] * 1e6, 1),
+            "reshuffles_per_100_turns": round(reshuffles / turns * 100, 2),
+            "cards_per_reshuffle": round(reshuffled_cards / reshuffles, 1) if reshuffles else 0}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--players", type=int, nargs="*", default=list(DEFAULT_TABLES), help="sizes of the tables")
+    parser.add_argument("--games", type=int, default=5, help="games per table")
+    parser.add_argument("--turns", type=int, default=2000, help="turns after which a game is stopped")
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        tables = {str(count): play_table(count, args.games, args.turns) for count in args.players}
+    print(json.dumps({"seed": SEED, "tables": tables}, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Legal move generator: correctness against a per-card scan and the cost per call.
+
+Bots play games with every combination of house rules, choosing their moves from
+Game.legal_actions. After every action the legal cards of every player are compared
+with a scan that tests each card of the hand with the rule engine; a difference
+exits with 1. The timings compare that scan with the match index and with a
+cached result.
+
+Usage: python benchmarks/legal_actions.py [--games N] [--calls N]
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hot_paths import MAX_SCRIPTED_TURNS, PLAYERS, SEED
+from squirreluno.rule_engine import HouseRules
+from squirreluno.rules import Game
+from squirreluno.utils import ComponentManager
+
+def scanned_cards(game, player):
+    """
+    The playable hand indices found by testing every card, the reference for legal_actions.
+    """
+    top_card = game.game_stack.last_added_card
+    if not game.game_active or game.pending_decision is not None:
+        return []
+    cards = list(player.hands.cards.values())
+    if player.uid != game.player_turn:
+        if not game.house_rules.jump_in or game.pending_draw:
+            return []
+        return [index for index, card in enumerate(cards, start=1) if game.rule_engine.same_face(top_card, card)]
+    if game.layed_this_turn:
+        return []
+    return [index for index, card in enumerate(cards, start=1) if game._is_valid_card_to_play(top_card, card)]
+
+def bot_turn(game):
+    """
+    Plays the first legal card, otherwise draws, and ends the turn.
+    """
+    player = game.players[game.player_turn]
+    actions = game.legal_actions(player)
+    if actions["choose"]:
+        game.decide(player.uid, game.pending_decision.default)
+    elif actions["cards"]:
+        game.apply_action(player.uid, str(actions["cards"][0]))
+    elif actions["draw"]:
+        # an empty draw stack is refilled from the played cards, unless only the top card and markers are left
+        try:
+            game.apply_action(player.uid, "draw")
+        except ValueError:
+            return False
+    elif actions["next"]:
+        game.apply_action(player.uid, "next")
+    else:
+        return False
+    return True
+
+def check_games(games: int):
+    mismatches = []
+    checked = 0
+    for rules_index, names in enumerate(itertools.chain.from_iterable(
+            itertools.combinations(HouseRules.NAMES, size) for size in range(len(HouseRules.NAMES) + 1))):
+        for game_index in range(games):
+            scope_id = f"legal-{rules_index}-{game_index}"
+            random.seed(SEED + game_index)
+            with ComponentManager.scope(scope_id):
+                game = Game(PLAYERS, house_rules=HouseRules.from_names(names))
+                actions = 0
+                while game.game_active and actions < 3 * MAX_SCRIPTED_TURNS:
+                    game._refill_draw_stack()
+                    for player in game.players.values():
+                        checked += 1
+                        expected = scanned_cards(game, player)
+                        if game.legal_actions(player)["cards"] != expected:
+                            mismatches.append({"house_rules": list(names), "action": actions, "player": player.name})
+                    if not bot_turn(game):
+                        break
+                    actions += 1
+                game.dispose()
+            ComponentManager.delete_scope(scope_id)
+    return checked, mismatches
+
+def time_calls(calls: int):
+    random.seed(SEED)
+    with ComponentManager.scope("legal-timing"):
+        game = Game(PLAYERS)
+        game._refill_draw_stack()
+        player = game.players[game.player_turn]
+        # a large hand, where testing every card costs the most
+        for _ in range(20):
+            game.draw_stack.get_card_per_index(0).transfer_owner("draw", player.uid)
+
+        started = time.perf_counter()
+        for _ in range(calls):
+            scanned_cards(game, player)
+        scan = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(calls):
+            # a new version of the hand makes every call miss the cache
+            player.hands.version += 1
+            game.legal_actions(player)
+        indexed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(calls):
+            game.legal_actions(player)
+        cached = time.perf_counter() - started
+        hand_size = len(player.hands.cards)
+        game.dispose()
+    ComponentManager.delete_scope("legal-timing")
+    return {"hand_size": hand_size,
+            "scan_us": round(scan / calls * 1e6, 3),
+            "index_us": round(indexed / calls * 1e6, 3),
+            "cached_us": round(cached / calls * 1e6, 3)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=5, help="games per combination of house rules")
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        checked, mismatches = check_games(args.games)
+        timings = time_calls(args.calls)
+    report = {"checked": checked, "mismatches": mismatches[:10], "timings": timings}
+    print(json.dumps(report, indent=2))
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Memory per game, checked against a committed budget.
+
+Measures the bytes a game retains right after dealing and at the largest point
+of a scripted game, broken down by cards, stacks, players, action messages and
+registry entries. tracemalloc adds the allocated bytes per room as a room worker
+holds it, which is what sizes a server.
+Exits with 1 if a footprint is above its budget in memory_budget.json, so
+representation changes in card_logic.py show up before deploy. The budget is
+enforced by tests/test_memory_budget.py.
+
+Usage: python benchmarks/memory_budget.py [--games N] [--budget FILE] [--update]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hot_paths import MAX_SCRIPTED_TURNS, SEED, drop_game, new_game, scripted_turn
+from squirreluno.memory import game_footprint
+from squirreluno.utils import ComponentManager
+
+DEFAULT_BUDGET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "memory_budget.json")
+# headroom written on --update, so dict resizes between Python versions do not fail the check
+BUDGET_HEADROOM = 1.10
+GIGABYTE = 1024 ** 3
+
+def fresh_footprint():
+    random.seed(SEED)
+    game = new_game("memory-fresh")
+    footprint = game_footprint(game, "memory-fresh")
+    drop_game(game, "memory-fresh")
+    return footprint
+
+def played_footprint():
+    """
+    Plays a scripted game and returns the largest footprint seen after a turn.
+    """
+    random.seed(SEED)
+    game = new_game("memory-played")
+    largest = game_footprint(game, "memory-played")
+    with ComponentManager.scope("memory-played"):
+        turns = 0
+        while game.game_active and turns < MAX_SCRIPTED_TURNS and scripted_turn(game):
+            turns += 1
+            footprint = game_footprint(game, "memory-played")
+            if footprint["total"] > largest["total"]:
+                largest = footprint
+    drop_game(game, "memory-played")
+    return largest
+
+def allocated_per_room(games: int):
+    """
+    Returns the bytes tracemalloc sees allocated per live game, networking included.
+    """
+    random.seed(SEED)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    rooms = [(new_game(f"memory-room-{index}"), f"memory-room-{index}") for index in range(games)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    for game, scope_id in rooms:
+        drop_game(game, scope_id)
+    return allocated // games
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=50, help="live games for the tracemalloc measurement")
+    parser.add_argument("--budget", default=DEFAULT_BUDGET)
+    parser.add_argument("--update", action="store_true", help="write the current footprints as new budget")
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = {"fresh_game": fresh_footprint(),
+                  "played_game": played_footprint(),
+                  "allocated_per_room": allocated_per_room(args.games)}
+    report["rooms_per_gb"] = GIGABYTE // report["allocated_per_room"]
+
+    measured = {"fresh_game_bytes": report["fresh_game"]["total"],
+                "played_game_bytes": report["played_game"]["total"]}
+    if args.update:
+        with open(args.budget, "w") as budget_file:
+            json.dump({name: int(value * BUDGET_HEADROOM) for name, value in measured.items()}, budget_file, indent=2)
+            budget_file.write("\n")
+    with open(args.budget) as budget_file:
+        budget = json.load(budget_file)
+    report["budget"] = budget
+    report["over_budget"] = sorted(name for name, value in measured.items() if value > budget.get(name, value))
+    print(json.dumps(report, indent=2))
+    return 1 if report["over_budget"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Overhead of the per-room sampling profiler.
+
+Plays scripted turns for a fixed time, once without and then with the profiler
+attached at different sample intervals, and compares the turn throughput with
+the overhead the profiler measured itself.
+
+While a profile runs, the profiler lowers the GIL switch interval of the whole
+process to 50 us. That only costs when threads compete for the GIL, so further
+threads play their own games during every run, like the other rooms and the
+result writer of a worker, and the throughput counts the turns of all threads.
+The "switch_interval" run lowers the switch interval without sampling, to tell
+its cost apart from the cost of the samples.
+
+Usage: python benchmarks/profiler_overhead.py [--seconds S] [--rounds N] [--interval-ms MS ...] [--threads N]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hot_paths import SEED, MAX_SCRIPTED_TURNS, drop_game, new_game, scripted_turn
+from squirreluno import profiler as profiler_module
+from squirreluno.profiler import RoomProfiler
+from squirreluno.utils import ComponentManager
+
+def play(seconds, profiler=None, prefix="overhead"):
+    """
+    Plays scripted games back to back and returns the number of turns.
+    """
+    turns = 0
+    games = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        scope_id = f"{prefix}-{games}"
+        game = new_game(scope_id)
+        if profiler is not None:
+            profiler.game = game
+        with ComponentManager.scope(scope_id):
+            game_turns = 0
+            while (game.game_active and game_turns < MAX_SCRIPTED_TURNS and time.perf_counter() < deadline
+                   and scripted_turn(game)):
+                game_turns += 1
+        turns += game_turns
+        games += 1
+        drop_game(game, scope_id)
+    return turns
+
+def play_with_threads(seconds, threads, profiler=None):
+    """
+    Plays in this thread for the profiler and in further threads for the other rooms.
+
+    Returns:
+        int: The profiled turns.
+        int: The turns of all threads.
+    """
+    random.seed(SEED)
+    other_turns = []
+    others = [threading.Thread(target=lambda number=number: other_turns.append(play(seconds, prefix=f"other{number}")))
+              for number in range(threads)]
+    for thread in others:
+        thread.start()
+    turns = play(seconds, profiler)
+    for thread in others:
+        thread.join()
+    return turns, turns + sum(other_turns)
+
+def measure(seconds, setting, threads):
+    if setting is None:
+        turns, all_turns = play_with_threads(seconds, threads)
+        return {"turns_per_s": round(turns / seconds, 1), "all_turns_per_s": round(all_turns / seconds, 1)}
+    if setting == "switch_interval":
+        profiler_module._lower_switch_interval()
+        try:
+            switch_interval = sys.getswitchinterval()
+            turns, all_turns = play_with_threads(seconds, threads)
+        finally:
+            profiler_module._restore_switch_interval()
+        return {"turns_per_s": round(turns / seconds, 1), "all_turns_per_s": round(all_turns / seconds, 1),
+                "switch_interval_us": round(switch_interval * 1e6)}
+    # the profiler follows the game that is played at the moment, see play()
+    probe = new_game(f"probe-{setting}")
+    profiler = RoomProfiler(probe, interval_ms=setting)
+    report = {}
+    thread = threading.Thread(target=lambda: report.update(profiler.run(seconds)))
+    thread.start()
+    # the profiler has lowered the switch interval once its thread runs
+    while not report and sys.getswitchinterval() > profiler_module.SAMPLING_SWITCH_INTERVAL:
+        time.sleep(0.001)
+    switch_interval = sys.getswitchinterval()
+    turns, all_turns = play_with_threads(seconds, threads, profiler)
+    thread.join()
+    drop_game(probe, f"probe-{setting}")
+    return {"turns_per_s": round(turns / seconds, 1),
+            "all_turns_per_s": round(all_turns / seconds, 1),
+            "switch_interval_us": round(switch_interval * 1e6),
+            "samples": report["samples"],
+            "measured_overhead": report["overhead"],
+            "hottest_frames": report["collapsed"].splitlines()[0].split(";")[-3:] if report["samples"] else None}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--rounds", type=int, default=3, help="alternating runs per setting, the median is reported")
+    parser.add_argument("--interval-ms", type=float, nargs="*", default=[5.0, 1.0])
+    parser.add_argument("--threads", type=int, default=1, help="further threads that play during every run")
+    args = parser.parse_args(argv)
+
+    settings = [None, "switch_interval"] + args.interval_ms
+    runs = {setting: [] for setting in settings}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.rounds):
+            for setting in settings:
+                runs[setting].append(measure(args.seconds, setting, args.threads))
+
+    def median_run(results):
+        return sorted(results, key=lambda run: run["all_turns_per_s"])[len(results) // 2]
+
+    baseline = median_run(runs[None])
+    baseline["switch_interval_us"] = round(sys.getswitchinterval() * 1e6)
+    profiled = {}
+    for setting in settings[1:]:
+        run = median_run(runs[setting])
+        run["slowdown"] = round(1 - run["all_turns_per_s"] / baseline["all_turns_per_s"], 4)
+        profiled[setting if isinstance(setting, str) else f"{setting}ms"] = run
+    print(json.dumps({"threads": args.threads + 1, "baseline": baseline, "profiled": profiled}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark of the live game snapshots on a local SQLite database.
+
+Measures:
+
+* capture: the cost a turn pays to hand its state to the snapshotter.
+* pause: how much slower the turns of a game get while a flush of all rooms runs
+  on another thread, p99 against the 1 ms budget.
+* restore: reading all snapshots and rebuilding every room on startup.
+
+Usage: python benchmarks/snapshots.py [--rooms N] [--restore-rooms N]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from squirreluno.rules import Game
+from squirreluno.snapshots import SnapshotStore, Snapshotter
+from squirreluno.utils import ComponentManager
+
+PAUSE_BUDGET_MS = 1.0
+TURN_INTERVAL = 0.001
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return {"p50_ms": round(timings[len(timings) // 2] * 1000, 4),
+            "p99_ms": round(timings[int(len(timings) * 0.99)] * 1000, 4),
+            "max_ms": round(timings[-1] * 1000, 4)}
+
+def capture(game, samples_per_turn):
+    timings = []
+    # every player draws once per turn, until the draw stack runs out
+    while game.game_active:
+        game.apply_action(game.player_turn, "draw")
+        game.apply_action(game.player_turn, "next")
+        for sample in range(samples_per_turn):
+            started = time.perf_counter()
+            game._capture_snapshot()
+            timings.append(time.perf_counter() - started)
+        if len(game.draw_stack.cards) <= 1:
+            break
+    return percentiles(timings)
+
+def turn_latency(game, work):
+    """
+    Runs work on the calling thread while a second thread keeps exporting the game
+    like a turn loop does, and returns the latency of those turns.
+    """
+    timings = []
+    running = threading.Event()
+    running.set()
+
+    def turn_loop():
+        while running.is_set():
+            started = time.perf_counter()
+            game.export_state()
+            timings.append(time.perf_counter() - started)
+            time.sleep(TURN_INTERVAL)
+
+    thread = threading.Thread(target=turn_loop)
+    thread.start()
+    work()
+    running.clear()
+    thread.join()
+    return percentiles(timings)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=2000)
+    parser.add_argument("--samples-per-turn", type=int, default=50)
+    parser.add_argument("--restore-rooms", type=int, default=200, help="rooms rebuilt in the restore phase")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        snapshotter = Snapshotter(SnapshotStore(f"sqlite:///{directory}/snapshots.db"), interval=3600)
+        with ComponentManager.scope("capture"):
+            game = Game(["a", "b", "c", "d"], snapshotter=snapshotter)
+            capture_report = capture(game, args.samples_per_turn)
+            state = game.export_state()
+
+            for room in range(args.rooms):
+                snapshotter.capture(f"room-{room}", state)
+            idle = turn_latency(game, lambda: time.sleep(1))
+            flush_started = time.perf_counter()
+            flushing = turn_latency(game, snapshotter.flush)
+            flush_ms = (time.perf_counter() - flush_started) * 1000
+
+        started = time.perf_counter()
+        states = snapshotter.store.load_all()
+        load_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        for room_id in list(states)[:args.restore_rooms]:
+            with ComponentManager.scope(room_id):
+                Game.from_state(states[room_id])
+        rebuild_ms = (time.perf_counter() - started) * 1000
+        snapshotter.close()
+
+    report = {"capture": capture_report,
+              "flush": {"rooms": args.rooms,
+                        "flush_ms": round(flush_ms, 1),
+                        "turns_idle": idle,
+                        "turns_while_flushing": flushing,
+                        "pause_p99_ms": round(flushing["p99_ms"] - idle["p99_ms"], 4),
+                        "pause_budget_ms": PAUSE_BUDGET_MS},
+              "restore": {"rooms_loaded": len(states),
+                          "load_ms": round(load_ms, 1),
+                          "rooms_rebuilt": min(args.restore_rooms, len(states)),
+                          "rebuild_ms_per_room": round(rebuild_ms / max(min(args.restore_rooms, len(states)), 1), 3)}}
+    report["passed"] = (capture_report["p99_ms"] <= PAUSE_BUDGET_MS
+                        and report["flush"]["pause_p99_ms"] <= PAUSE_BUDGET_MS)
+    print(json.dumps(report, indent=2))
+    return 0 if report["passed"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Spectators: the cost of a spectated game's turns and of the fan-out to 10k spectators.
+
+The same seeded bot game is played without a spectator channel, with a channel
+and no spectators, and with a channel and 10k spectators. Publishing a frame does
+not depend on the number of spectators, so the last two must cost the same per
+action, and the channel itself only a few microseconds. The fan-out hands the
+frames to a stub sender outside of the turns. Exits with 1 if the spectators or
+the channel cost more than allowed, if a state change was published more than
+once, or if spectators got different payload objects for one frame.
+
+Usage: python benchmarks/spectators.py [--spectators N] [--repeats N] [--max-overhead 0.15] [--max-publish-us 10]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hot_paths import MAX_SCRIPTED_TURNS, PLAYERS, SEED
+from legal_actions import bot_turn
+from squirreluno.rules import Game
+from squirreluno.spectators import SpectatorChannel
+from squirreluno.utils import ComponentManager
+
+DEFAULT_SPECTATORS = 10000
+DEFAULT_MAX_OVERHEAD = 0.15
+DEFAULT_MAX_PUBLISH_US = 10.0
+
+def play(spectators: int = None, fan_out=None):
+    """
+    Plays the seeded bot game and times its actions.
+
+    Args:
+        spectators (int, optional): The spectators of the channel, None plays without a channel.
+        fan_out (callable, optional): Called with the channel after every action, outside of the timing.
+
+    Returns:
+        float: The seconds per action.
+        int: The actions.
+        SpectatorChannel: The channel, or None.
+    """
+    random.seed(SEED)
+    with ComponentManager.scope("spectated"):
+        game = Game(PLAYERS)
+        channel = None
+        if spectators is not None:
+            channel = game.spectators = SpectatorChannel()
+            for number in range(spectators):
+                channel.subscribe(f"sid-{number}")
+        elapsed = 0.0
+        actions = 0
+        while game.game_active and actions < 3 * MAX_SCRIPTED_TURNS:
+            started = time.perf_counter()
+            played = bot_turn(game)
+            elapsed += time.perf_counter() - started
+            if not played:
+                break
+            actions += 1
+            if fan_out is not None:
+                fan_out(channel)
+        game.dispose()
+    ComponentManager.delete_scope("spectated")
+    return elapsed / actions, actions, channel
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spectators", type=int, default=DEFAULT_SPECTATORS)
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--max-overhead", type=float, default=DEFAULT_MAX_OVERHEAD,
+                        help="allowed slowdown per action with spectators against a channel without spectators")
+    parser.add_argument("--max-publish-us", type=float, default=DEFAULT_MAX_PUBLISH_US,
+                        help="allowed microseconds per action of a channel with spectators against no channel")
+    args = parser.parse_args(argv)
+
+    timings = {"no_channel": [], "no_spectators": [], "spectators": []}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.repeats):
+            timings["no_channel"].append(play()[0])
+            timings["no_spectators"].append(play(0)[0])
+            timings["spectators"].append(play(args.spectators)[0])
+
+        sent = []
+        fan_out_seconds = []
+
+        def fan_out(channel):
+            # a stub send_to_client, it only keeps the payload
+            started = time.perf_counter()
+            frame, sids = channel.due()
+            for sid in sids:
+                sent.append(frame.payload)
+            fan_out_seconds.append(time.perf_counter() - started)
+            shared = all(payload is frame.payload for payload in sent)
+            sent.clear()
+            if not shared:
+                raise AssertionError("spectators got different payload objects")
+        _, actions, channel = play(args.spectators, fan_out)
+
+    medians = {name: statistics.median(values) for name, values in timings.items()}
+    overhead = medians["spectators"] / medians["no_spectators"] - 1
+    publish_us = (medians["spectators"] - medians["no_channel"]) * 1e6
+    frame = channel.current_frame()
+    report = {"seed": SEED,
+              "spectators": args.spectators,
+              "action_us": {name: round(value * 1e6, 2) for name, value in medians.items()},
+              "spectator_overhead": round(overhead, 3),
+              "publish_us": round(publish_us, 2),
+              "actions": actions,
+              "frames_published": channel.frames_published,
+              "frame_bytes": len(frame.payload),
+              "fan_out_us_per_frame": round(statistics.median(fan_out_seconds) * 1e6, 1),
+              "fan_out_ns_per_spectator": round(statistics.median(fan_out_seconds) / args.spectators * 1e9, 1)}
+    violations = []
+    if overhead > args.max_overhead:
+        violations.append(f"actions with spectators are {overhead:.0%} slower than without")
+    if publish_us > args.max_publish_us:
+        violations.append(f"the channel costs {publish_us:.1f} us per action")
+    if channel.frames_published != actions:
+        violations.append(f"{channel.frames_published} frames for {actions} state changes")
+    report["violations"] = violations
+    print(json.dumps(report, indent=2))
+    return 1 if violations else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Benchmark of the leaderboard and player stats queries on a local SQLite database.
+
+Seeds a database with finished games (default 10M, that takes a while and a few GB,
+pass --database to keep and reuse it) and measures the latency of the stats
+queries with and without the read-through cache against the targets.
+
+Usage: python benchmarks/stats_queries.py [--games N] [--database PATH] [--samples N]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from squirreluno.persistence import create_database_engine
+from squirreluno.stats import ReadThroughCache, StatsService
+
+SEED_BATCH_GAMES = 50000
+# p99 targets in milliseconds
+TARGETS_MS = {"uncached": 5.0, "cached": 0.05}
+
+def seed(path, games, players, names, seed_value):
+    """
+    Fills the result tables directly with sqlite3, the ResultWriter would take hours for 10M games.
+    """
+    create_database_engine(f"sqlite:///{path}").dispose()
+    rng = random.Random(seed_value)
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA synchronous=OFF")
+    aggregates = {}
+    started_at = time.time() - games
+    for first in range(0, games, SEED_BATCH_GAMES):
+        game_rows = []
+        player_rows = []
+        for index in range(first, min(first + SEED_BATCH_GAMES, games)):
+            seats = rng.sample(range(names), players)
+            finished_at = started_at + index
+            duration_ms = rng.randint(60000, 900000)
+            game_id = f"{index:032x}"
+            game_rows.append((game_id, f"u{seats[0]}", f"player{seats[0]}", players,
+                              finished_at - duration_ms / 1000, finished_at, duration_ms))
+            for position, seat in enumerate(seats):
+                name = f"player{seat}"
+                played, drawn = rng.randint(5, 40), rng.randint(0, 30)
+                player_rows.append((game_id, f"u{seat}", name, position, position == 0,
+                                    0 if position == 0 else rng.randint(1, 15), played, drawn, finished_at))
+                stats = aggregates.setdefault(name, [0, 0, 0, 0, 0, 0.0])
+                stats[0] += 1
+                stats[1] += position == 0
+                stats[2] += played
+                stats[3] += drawn
+                stats[4] += duration_ms
+                stats[5] = finished_at
+        with connection:
+            connection.executemany("INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?)", game_rows)
+            connection.executemany("INSERT INTO game_players VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", player_rows)
+    with connection:
+        connection.executemany("INSERT INTO player_stats VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               [(name, *stats) for name, stats in aggregates.items()])
+        connection.execute("ANALYZE")
+    connection.close()
+
+def measure(stats, queries, samples):
+    latencies = {}
+    for label, query in queries.items():
+        timings = []
+        for sample in range(samples):
+            started = time.perf_counter()
+            query(sample)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        latencies[label] = {"p50_ms": round(timings[len(timings) // 2] * 1000, 4),
+                            "p99_ms": round(timings[int(len(timings) * 0.99)] * 1000, 4)}
+    return latencies
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=10_000_000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--names", type=int, default=100000, help="number of distinct players")
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database", help="SQLite file to seed, reused if it exists")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.database or os.path.join(directory, "stats.db")
+        seed_seconds = None
+        if not os.path.exists(path):
+            started = time.perf_counter()
+            seed(path, args.games, args.players, args.names, args.seed)
+            seed_seconds = round(time.perf_counter() - started, 1)
+
+        engine = create_database_engine(f"sqlite:///{path}")
+        rng = random.Random(args.seed)
+        names = [f"player{rng.randrange(args.names)}" for _ in range(args.samples)]
+
+        def queries(stats, hot):
+            # the cached run asks for a few hot players, the uncached one for a different player every time
+            pick = (lambda sample: names[sample % 10]) if hot else (lambda sample: names[sample])
+            return {"top_players": lambda sample: stats.top_players(10),
+                    "player_stats": lambda sample: stats.player_stats(pick(sample)),
+                    "recent_games": lambda sample: stats.recent_games(pick(sample), 10)}
+
+        uncached = StatsService(engine, cache=ReadThroughCache(max_entries=0))
+        cached = StatsService(engine)
+        report = {"games": args.games,
+                  "seed_seconds": seed_seconds,
+                  "uncached": measure(uncached, queries(uncached, False), args.samples),
+                  "cached": measure(cached, queries(cached, True), args.samples),
+                  "cache_hit_rate": None}
+        report["cache_hit_rate"] = round(cached.cache.hits / (cached.cache.hits + cached.cache.misses), 4)
+        report["targets_p99_ms"] = TARGETS_MS
+        report["passed"] = all(latency["p99_ms"] <= TARGETS_MS[mode]
+                               for mode in TARGETS_MS for latency in report[mode].values())
+        engine.dispose()
+    print(json.dumps(report, indent=2))
+    return 0 if report["passed"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Turn timers: arm, reset and cancel costs of the timer wheel up to 100k armed deadlines.
+
+The wheel runs on a simulated clock. 1k and 100k deadlines between one second
+and a minute are armed, all of them reset to a new deadline, half of them
+cancelled and armed again, then the clock runs past the last deadline. Arming
+and cancelling are O(1), so an operation must cost about the same at 100k armed
+timers as at 1k. Every timer still armed must fire exactly once, not before its
+deadline and, with the wheel advanced every tick, at most two ticks after it;
+cancelled timers must not fire.
+
+Then headless games whose players never act are driven by their turn deadlines
+alone: every expired turn draws a card and hands the turn on.
+
+Exits with 1 if an operation at the largest count costs more than --max-ratio
+times the same operation at the smallest count, or on a violation.
+
+Usage: python benchmarks/turn_timers.py [--timers 100000] [--baseline 1000] [--max-ratio 3] [--games 200]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from hot_paths import PLAYERS, SEED
+from squirreluno.rules import Game
+from squirreluno.timers import TimerWheel
+from squirreluno.utils import ComponentManager
+
+DEFAULT_TIMERS = 100000
+DEFAULT_BASELINE = 1000
+DEFAULT_MAX_RATIO = 3.0
+MIN_DELAY = 1.0
+MAX_DELAY = 60.0
+TURN_TIMEOUT = 30.0
+EXPIRED_TURNS_PER_GAME = 20
+
+class SimulatedClock:
+    """
+    A clock that only moves when the benchmark moves it.
+    """
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def per_op_ns(seconds: float, count: int):
+    return seconds / count * 1e9
+
+def measure(count: int):
+    """
+    Arms, resets, cancels and fires count timers.
+
+    Returns:
+        dict: The nanoseconds per operation.
+        list[str]: The violations.
+    """
+    rng = random.Random(SEED)
+    clock = SimulatedClock()
+    wheel = TimerWheel(clock=clock)
+    fired = {}
+    deadlines = {}
+
+    def fire(key):
+        fired.setdefault(key, []).append(clock.now)
+
+    def arm_all(keys):
+        started = time.perf_counter()
+        for key in keys:
+            delay = rng.uniform(MIN_DELAY, MAX_DELAY)
+            wheel.arm(key, delay, fire, key)
+            deadlines[key] = clock.now + delay
+        return time.perf_counter() - started
+
+    keys = range(count)
+    timings = {"arm": arm_all(keys), "reset": arm_all(keys)}
+    cancelled = keys[::2]
+    started = time.perf_counter()
+    for key in cancelled:
+        wheel.cancel(key)
+    timings["cancel"] = time.perf_counter() - started
+    timings["rearm"] = arm_all(cancelled)
+    cancelled = keys[1::4]
+    for key in cancelled:
+        wheel.cancel(key)
+        del deadlines[key]
+
+    armed = len(wheel)
+    started = time.perf_counter()
+    end = clock.now + MAX_DELAY + 2 * wheel.tick
+    while clock.now < end:
+        clock.now += wheel.tick
+        wheel.advance()
+    timings["fire"] = time.perf_counter() - started
+
+    violations = []
+    if armed != len(deadlines):
+        violations.append(f"{armed} timers armed instead of {len(deadlines)}")
+    for key, deadline in deadlines.items():
+        times = fired.get(key, [])
+        if len(times) != 1:
+            violations.append(f"timer {key} fired {len(times)} times")
+        elif times[0] < deadline:
+            violations.append(f"timer {key} fired {deadline - times[0]:.3f}s early")
+        elif times[0] > deadline + 2 * wheel.tick:
+            violations.append(f"timer {key} fired {times[0] - deadline:.3f}s late")
+    stray = set(fired) - set(deadlines)
+    if stray:
+        violations.append(f"{len(stray)} cancelled timers fired")
+    if len(wheel):
+        violations.append(f"{len(wheel)} timers left after the last deadline")
+    counts = {"arm": count, "reset": count, "cancel": len(range(count)[::2]), "rearm": len(range(count)[::2]),
+              "fire": armed}
+    return {name: per_op_ns(seconds, counts[name]) for name, seconds in timings.items()}, violations[:10]
+
+def drive_games(games: int):
+    """
+    Lets the turn deadlines play games whose players never act.
+
+    Returns:
+        dict: The expired turns and the microseconds per expiry.
+        list[str]: The violations.
+    """
+    random.seed(SEED)
+    clock = SimulatedClock()
+    wheel = TimerWheel(clock=clock)
+
+    class TimedGame(Game):
+        def turn_changed(self):
+            if self.game_active:
+                wheel.arm(self.uid, TURN_TIMEOUT, self.expire, self.player_turn)
+            else:
+                wheel.cancel(self.uid)
+
+        def dispose(self):
+            # like a worker closing the room
+            wheel.cancel(self.uid)
+            super().dispose()
+
+        def expire(self, player_uid):
+            # the callback runs outside of any scope, like in the background task of a server
+            with ComponentManager.scope(self.scope_id):
+                before = len(self.players[player_uid].hands.cards)
+                expired = self.expire_turn(player_uid)
+                return expired, player_uid, self.player_turn, len(self.players[player_uid].hands.cards) - before
+
+    tables = []
+    for number in range(games):
+        scope_id = f"timed-{number}"
+        with ComponentManager.scope(scope_id):
+            game = TimedGame(PLAYERS)
+            game.scope_id = scope_id
+            game.turn_changed()
+        tables.append(game)
+
+    violations = []
+    expired = 0
+    elapsed = 0.0
+    for _ in range(EXPIRED_TURNS_PER_GAME):
+        clock.now += TURN_TIMEOUT
+        started = time.perf_counter()
+        results = wheel.advance()
+        elapsed += time.perf_counter() - started
+        if len(results) != games:
+            violations.append(f"{len(results)} of {games} turns expired")
+        for was_expired, player_uid, player_turn, drawn in results:
+            expired += was_expired
+            if player_turn == player_uid:
+                violations.append(f"player {player_uid} kept the turn after the deadline")
+            if drawn != 1:
+                violations.append(f"player {player_uid} drew {drawn} cards after the deadline")
+
+    for game in tables:
+        with ComponentManager.scope(game.scope_id):
+            game.dispose()
+        ComponentManager.delete_scope(game.scope_id)
+    if len(wheel):
+        violations.append(f"{len(wheel)} turn timers left of disposed games")
+    return {"expired_turns": expired, "expiry_us": round(elapsed / max(expired, 1) * 1e6, 1)}, violations[:10]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--timers", type=int, default=DEFAULT_TIMERS)
+    parser.add_argument("--baseline", type=int, default=DEFAULT_BASELINE)
+    parser.add_argument("--max-ratio", type=float, default=DEFAULT_MAX_RATIO,
+                        help="allowed cost per operation at --timers against --baseline")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--games", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    violations = []
+    results = {}
+    for count in (args.baseline, args.timers):
+        runs = []
+        for _ in range(args.repeats):
+            timings, found = measure(count)
+            runs.append(timings)
+            violations.extend(found)
+        results[count] = {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+    ratios = {name: results[args.timers][name] / results[args.baseline][name] for name in results[args.baseline]}
+    for name in ("arm", "reset", "cancel", "rearm"):
+        if ratios[name] > args.max_ratio:
+            violations.append(f"{name} costs {ratios[name]:.1f} times as much at {args.timers} timers")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        games, found = drive_games(args.games)
+    violations.extend(found)
+
+    report = {"seed": SEED,
+              "ns_per_op": {str(count): {name: round(value) for name, value in timings.items()}
+                            for count, timings in results.items()},
+              "ratio": {name: round(value, 2) for name, value in ratios.items()},
+              "games": {"games": args.games, **games},
+              "violations": violations[:20]}
+    print(json.dumps(report, indent=2))
+    return 1 if violations else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Benchmark of the write-behind result queue on a local SQLite database.
+
+Runs two phases:
+
+* burst: queues results as fast as possible and measures the sustained insert rate.
+* paced: finishes games at a fixed rate (default 10k games per minute) and checks
+  that the writer keeps up and that recording a result stays cheap for the game.
+
+Usage: python benchmarks/write_behind.py [--games N] [--players N] [--rate GAMES_PER_MINUTE]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from squirreluno.persistence import create_database_engine, GameResult, ResultWriter
+
+def make_result(index, players):
+    now = time.time()
+    return GameResult(f"p{index % 97}", f"player {index % 97}", now - 300, now,
+                      [{"player_uid": f"p{(index + seat) % 97}",
+                        "name": f"player {(index + seat) % 97}",
+                        "game_position": seat,
+                        "won": seat == 0,
+                        "cards_left": 0 if seat == 0 else seat + 2,
+                        "cards_played": 20 + seat,
+                        "cards_drawn": 10 + seat}
+                       for seat in range(players)])
+
+def wait_until_written(writer, games):
+    while writer.written_games + writer.dropped < games:
+        time.sleep(0.005)
+
+def burst(database_url, games, players):
+    writer = ResultWriter(create_database_engine(database_url))
+    results = [make_result(index, players) for index in range(games)]
+    started = time.perf_counter()
+    for result in results:
+        writer.record(result)
+    wait_until_written(writer, games)
+    elapsed = time.perf_counter() - started
+    writer.close()
+    return {"games": writer.written_games,
+            "dropped": writer.dropped,
+            "commits": writer.commits,
+            "seconds": round(elapsed, 3),
+            "games_per_s": round(writer.written_games / elapsed),
+            "rows_per_s": round(writer.written_rows / elapsed)}
+
+def paced(database_url, games, players, games_per_minute):
+    writer = ResultWriter(create_database_engine(database_url))
+    interval = 60 / games_per_minute
+    record_costs = []
+    max_pending = 0
+    started = time.perf_counter()
+    for index in range(games):
+        result = make_result(index, players)
+        before = time.perf_counter()
+        writer.record(result)
+        record_costs.append(time.perf_counter() - before)
+        max_pending = max(max_pending, writer.pending)
+        next_game = started + (index + 1) * interval
+        time.sleep(max(next_game - time.perf_counter(), 0))
+    finished = time.perf_counter()
+    wait_until_written(writer, games)
+    lag = time.perf_counter() - finished
+    writer.close()
+    record_costs.sort()
+    return {"games": writer.written_games,
+            "games_per_minute": games_per_minute,
+            "dropped": writer.dropped,
+            "commits": writer.commits,
+            "max_pending": max_pending,
+            "final_lag_ms": round(lag * 1000, 1),
+            "record_p50_us": round(record_costs[len(record_costs) // 2] * 1e6, 1),
+            "record_p99_us": round(record_costs[int(len(record_costs) * 0.99)] * 1e6, 1)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=20000)
+    parser.add_argument("--paced-games", type=int, default=2000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--rate", type=int, default=10000, help="finished games per minute in the paced phase")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        report = {"burst": burst(f"sqlite:///{directory}/burst.db", args.games, args.players),
+                  "paced": paced(f"sqlite:///{directory}/paced.db", args.paced_games, args.players, args.rate)}
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
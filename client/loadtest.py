@@ -0,0 +1,226 @@
+import argparse
+import asyncio
+import bisect
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from network import AsyncGameClient
+
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+SERVER_START_TIMEOUT = 15.0
+ACTION_TIMEOUT = 5.0
+
+class LatencyHistogram:
+    """
+    Fixed bucket latency histogram, cheap enough to record thousands of samples per second.
+    """
+    def __init__(self, bounds_ms=HISTOGRAM_BOUNDS_MS):
+        self.bounds_ms = bounds_ms
+        self.buckets = [0] * (len(bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds):
+        latency_ms = seconds * 1000
+        self.buckets[bisect.bisect_left(self.bounds_ms, latency_ms)] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def percentile(self, fraction):
+        """
+        Returns the upper bound of the bucket holding the given fraction of samples.
+        """
+        if self.count == 0:
+            return None
+        needed = fraction * self.count
+        seen = 0
+        for bound, bucket in zip(self.bounds_ms, self.buckets):
+            seen += bucket
+            if seen >= needed:
+                return min(bound, round(self.max_ms, 2))
+        return self.max_ms
+
+    def summary(self):
+        return {"count": self.count,
+                "mean_ms": round(self.total_ms / self.count, 2) if self.count else None,
+                "p50_ms": self.percentile(0.5),
+                "p90_ms": self.percentile(0.9),
+                "p99_ms": self.percentile(0.99),
+                "max_ms": round(self.max_ms, 2),
+                "buckets": {f"<={bound}": bucket for bound, bucket in zip(self.bounds_ms, self.buckets)}
+                           | {"inf": self.buckets[-1]}}
+
+class LoadStats:
+    def __init__(self):
+        self.connect_latency = LatencyHistogram()
+        self.action_latency = LatencyHistogram()
+        self.errors = {}
+        self.actions = 0
+
+    def error(self, kind):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def report(self, duration, bots):
+        error_count = sum(self.errors.values())
+        return {"bots": bots,
+                "duration_s": round(duration, 2),
+                "actions": self.actions,
+                "actions_per_s": round(self.actions / duration, 1) if duration else None,
+                "error_rate": round(error_count / max(self.actions + bots, 1), 4),
+                "errors": self.errors,
+                "connect_latency": self.connect_latency.summary(),
+                "action_latency": self.action_latency.summary()}
+
+class BotPlayer(AsyncGameClient):
+    """
+    Bot that joins a room and always plays a legal move: draw, then hand the turn on.
+    """
+    def __init__(self, server_url, room, name, stats, think_time):
+        super().__init__(server_url)
+        self.room = room
+        self.name = name
+        self.stats = stats
+        self.think_time = think_time
+        self.uid = None
+        self.pending_since = None
+        self.next_action = "draw"
+        self.stopped = False
+        self.ready = asyncio.Event()
+
+        self.sio.on("room_created", self._on_room_info)
+        self.sio.on("joined", self._on_room_info)
+        self.sio.on("room_update", self._on_room_update)
+        self.sio.on("error", self._on_error)
+        self.sio.on("room_lost", self._on_room_lost)
+
+    async def connect(self):
+        started = time.perf_counter()
+        try:
+            await super().connect()
+        except Exception:
+            self.stats.error("connect")
+            return False
+        self.stats.connect_latency.record(time.perf_counter() - started)
+        return True
+
+    async def _on_room_info(self, data):
+        self.uid = data.get("players", {}).get(self.name)
+        self.ready.set()
+        await self._maybe_play(data.get("player_turn"))
+
+    async def _on_room_update(self, data):
+        if data["player"] == self.uid and self.pending_since is not None:
+            self.stats.action_latency.record(time.perf_counter() - self.pending_since)
+            self.pending_since = None
+            self.next_action = "next" if data["result"] == "draw" else "draw"
+        await self._maybe_play(data["player_turn"])
+
+    async def _on_error(self, data):
+        self.stats.error("server")
+        self.pending_since = None
+
+    async def _on_room_lost(self, data):
+        self.stats.error("room_lost")
+
+    async def _maybe_play(self, player_turn):
+        if self.uid is None or player_turn != self.uid or self.pending_since is not None:
+            return
+        self.pending_since = time.perf_counter()
+        await asyncio.sleep(random.uniform(*self.think_time))
+        if self.stopped:
+            self.pending_since = None
+            return
+        self.pending_since = time.perf_counter()
+        self.stats.actions += 1
+        await self.emit("action", {"room": self.room, "player": self.uid, "action": self.next_action})
+
+async def run_room(server_url, room, names, stats, think_time, duration, connect_slots):
+    bots = [BotPlayer(server_url, room, name, stats, think_time) for name in names]
+    async with connect_slots:
+        connected = [await bot.connect() for bot in bots]
+    creator, *others = bots
+    if not all(connected):
+        return bots
+    await creator.emit("create_room", {"room": room, "players": names, "name": creator.name})
+    try:
+        await asyncio.wait_for(creator.ready.wait(), timeout=duration)
+    except asyncio.TimeoutError:
+        creator.stats.error("create_timeout")
+        return bots
+    for bot in others:
+        await bot.emit("join_room", {"room": room, "name": bot.name})
+    await asyncio.sleep(duration)
+    return bots
+
+async def run_load(server_url, bots, players_per_room, think_time, duration, connect_concurrency):
+    stats = LoadStats()
+    connect_slots = asyncio.Semaphore(connect_concurrency)
+    run_id = f"{os.getpid()}-{int(time.time())}"
+    rooms = []
+    for room_index in range(bots // players_per_room):
+        names = [f"bot{room_index}-{seat}" for seat in range(players_per_room)]
+        rooms.append(run_room(server_url, f"load-{run_id}-{room_index}", names, stats,
+                              think_time, duration, connect_slots))
+    started = time.perf_counter()
+    results = await asyncio.gather(*rooms)
+    elapsed = time.perf_counter() - started
+    all_bots = [bot for room_bots in results for bot in room_bots]
+    for bot in all_bots:
+        bot.stopped = True
+    await asyncio.sleep(max(think_time))
+    now = time.perf_counter()
+    for bot in all_bots:
+        if bot.pending_since is not None and now - bot.pending_since > ACTION_TIMEOUT:
+            stats.error("action_timeout")
+    await asyncio.gather(*(bot.disconnect() for bot in all_bots if bot.sio.connected))
+    return stats.report(elapsed, len(all_bots))
+
+def start_local_server(port, workers):
+    repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    process = subprocess.Popen([sys.executable, "-m", "squirreluno", "--router-workers", str(workers),
+                                "--port", str(port), "--startup-budget-ms", "5000"],
+                               cwd=repo_dir, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"Local server did not accept connections on port {port}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SquirrelUno load generator")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--bots", type=int, default=1000)
+    parser.add_argument("--players-per-room", type=int, default=4)
+    parser.add_argument("--think-time", type=float, nargs=2, default=(0.05, 0.5), metavar=("MIN", "MAX"),
+                        help="seconds a bot waits before each move")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--connect-concurrency", type=int, default=100)
+    parser.add_argument("--start-server", type=int, metavar="WORKERS", default=0,
+                        help="start a local router with this many workers on the port of --url")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.start_server:
+        server = start_local_server(int(args.url.rsplit(":", 1)[1]), args.start_server)
+    try:
+        report = asyncio.run(run_load(args.url, args.bots, args.players_per_room, tuple(args.think_time),
+                                      args.duration, args.connect_concurrency))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
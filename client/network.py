@@ -1,19 +1,75 @@
 import socketio
 import threading
+import json
 
 class GameClient:
-    def __init__(self, server_url):
+    def __init__(self, server_url, token=None):
         self.sio = socketio.Client()
         self.server_url = server_url
+        self.token = token
+        self.snapshot = None
+        self.table = None
+        self.sio.on("seat", self._on_seat)
+        self.sio.on("resume", self._on_snapshot)
+        self.sio.on("snapshot", self._on_snapshot)
+        self.sio.on("spectate", self._on_table)
+
+    def _auth(self):
+        # called again on every automatic reconnect, so a dropped connection resumes the seat
+        return {"token": self.token} if self.token else None
+
+    def _on_seat(self, data):
+        self.token = data["token"]
+        self.snapshot = data["snapshot"]
+
+    def _on_snapshot(self, data):
+        if isinstance(data, str):
+            # spectators catch up with the JSON of the current table
+            self._on_table(data)
+            return
+        self.snapshot = data
+
+    def _on_table(self, data):
+        self.table = json.loads(data)
+
+    def claim_seat(self, name):
+        self.sio.emit("claim_seat", {"name": name})
+
+    def spectate(self):
+        self.sio.emit("spectate")
+
+    def action(self, action):
+        self.sio.emit("action", {"action": action})
+
+    def decide(self, choice):
+        self.sio.emit("decide", {"choice": choice})
     
     def _connect(self):
-        self.sio.connect(self.server_url)
+        self.sio.connect(self.server_url, auth=self._auth)
         self.sio.wait()
         
     def start(self):
         threading.Thread(target=self._connect).start()
 
 
+class AsyncGameClient:
+    """
+    Asyncio counterpart of GameClient, many of them can share one event loop.
+    """
+    def __init__(self, server_url):
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.server_url = server_url
+
+    async def connect(self):
+        await self.sio.connect(self.server_url, transports=["websocket"])
+
+    async def emit(self, event, data=None):
+        await self.sio.emit(event, data)
+
+    async def disconnect(self):
+        await self.sio.disconnect()
+
+
 if __name__ == '__main__':
     server_url = "http://127.0.0.1:5000"
     client = GameClient(server_url)
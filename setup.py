@@ -9,11 +9,12 @@ setup(
     long_description=open('README.md').read(),
     long_description_content_type='text/markdown',
     url='https://github.com/yourusername/SquirrelUno',
-    packages=find_packages(),
+    packages=find_packages(include=['squirreluno']),
     include_package_data=True,
     entry_points={
         'console_scripts': [
-            'squirreluno=uno.__main__:main',
+            'squirreluno=squirreluno.cli:main',
+            'squirreluno-tournament=squirreluno.tournament:main',
         ],
     },
 )
@@ -0,0 +1,8 @@
+"""
+SquirrelUno, a version of the Uno card game.
+
+The rules core (utils, card_logic, rules) imports nothing but the standard
+library, so simulators and room workers can play games without loading Flask.
+The server layer (network, game_logic, sharding) and the database modules are
+only imported by the code that needs them, see cli.main.
+"""
@@ -0,0 +1,648 @@
+from __future__ import annotations
+from .utils import UIDObject, ComponentManager, Color
+from .metrics import histogram, timed
+from .terminal import visible_width
+from collections import OrderedDict
+from enum import Enum, IntEnum
+from typing import TYPE_CHECKING
+import random
+
+if TYPE_CHECKING:
+    from .rules import Player
+
+TRANSFER_SECONDS = histogram("squirreluno_transfer_owner_seconds", "Time per Card.transfer_owner.")
+CARD_COLOR_CODES = {'red': Color.RED,
+                    'blue': Color.BLUE,
+                    'yellow': Color.YELLOW,
+                    'green': Color.GREEN,
+                    'no_color': '\033[38;5;214m',  # Gold/Orange, only joker cards have no color
+                    'reset': Color.RESET}
+
+class CardType(Enum):
+    """
+    Enum for card types.6
+    """
+    NUMBER = "number"
+    JOKER = "joker"
+
+class CardKind(IntEnum):
+    """
+    Enum for the card classes, the index of a card class in the tables of the rule engine.
+    """
+    NUMBER = 0
+    JOKER = 1
+    DRAW = 2
+    REVERSE = 3
+    MARKER = 4
+    SKIP = 5
+
+class CardColor(Enum):
+    """
+    Enum for card colors.
+    """
+    NO_COLOR = "no_color"
+    RED = "red"
+    GREEN = "green"
+    BLUE = "blue"
+    YELLOW = "yellow"
+
+class Card(UIDObject):
+    """
+    Base class for all cards.
+    """
+    def __init__(self, card_type: CardType, color:CardColor):
+        """
+        Initializes the card with a type.
+        """
+        super().__init__()
+        self.card_type = card_type
+        self._color = color
+        self.owner = None
+        self._new_card = False
+        self._rendered = None
+        self._labels = None
+
+    def get_stack_based_on_owner(self, owner_uid: str):
+        """
+        Gets the stack based on the owner UID.
+
+        Args:
+            owner_uid (str): The UID of the owner.
+
+        Returns:
+            Stack: The stack owned by the owner UID.
+        """
+        try:
+            stack_obj = ComponentManager.get_component(owner_uid)
+        except KeyError:
+            stack_obj = None
+        if isinstance(stack_obj, Stack):
+            return stack_obj
+        for uid, stack_obj in ComponentManager.iterate_uid_objects(Stack):
+            if stack_obj.owner == owner_uid:
+                return stack_obj
+        raise ValueError(f"No stack found for owner UID: {owner_uid}")
+
+    @timed(TRANSFER_SECONDS)
+    def transfer_owner(self, owner_uid: str, other_uid: str, *, forced=False, new_card=False):
+        """
+        Transfers the card to a new owner.
+
+        Args:
+            owner_uid (str): The UID of the current owner.
+            other_uid (str): The UID of the new owner.
+            forced (bool, optional): If True, force the transfer. Defaults to False.
+            new_card (bool, optional): If True, mark as new card. Defaults to False.
+        """
+        if self.owner is None:
+            raise ValueError(f"Card cannot be transferred to {other_uid} because it has no previous owner")
+        if self.owner != owner_uid and not forced:
+            raise ValueError(f"Card {self.uid} does not belong to {owner_uid}")
+
+        owner_stack = self.get_stack_based_on_owner(owner_uid)
+        other_stack = self.get_stack_based_on_owner(other_uid)
+
+        owner_stack.remove_card(self)
+        other_stack.add_card(self, new_card)
+        self.owner = other_uid
+    
+    def set_new_card(self):
+        """
+        Marks the card as new.
+        """
+        self._new_card = True
+    
+    def clear_new_flag(self):
+        """
+        Clears the new card flag.
+        """
+        self._new_card = False
+        
+    @property
+    def color(self):
+        return self._color
+
+    def _cached_label(self, new_tag: str):
+        """
+        Returns the rendering of the card, with the new tag while the card is new.
+
+        Each variant and its visible width is built the first time it is shown. The
+        color, number and title of a card never change, so they stay valid for good.
+
+        Args:
+            new_tag (str): The tag in front of a new card.
+
+        Returns:
+            tuple[str, int]: The label and its width on the screen.
+        """
+        labels = self._labels or (None, None)
+        label = labels[self._new_card]
+        if label is None:
+            text = f"{new_tag}{self.render()}" if self._new_card else self.render()
+            label = (text, visible_width(text))
+            # a new tuple instead of an update, clones of the card must not share it
+            self._labels = (labels[0], label) if self._new_card else (label, labels[1])
+        return label
+
+    def label_width(self):
+        """
+        Returns the number of columns str(card) takes on the screen.
+        """
+        return visible_width(str(self))
+
+    def to_spec(self):
+        """
+        Describes the card as plain data, e.g. for snapshots.
+
+        Returns:
+            dict: The kind, uid, color, owner and new flag of the card.
+        """
+        return {"kind": type(self).__name__,
+                "uid": self.uid,
+                "color": self.color.value,
+                "owner": self.owner,
+                "new": self._new_card}
+
+    @classmethod
+    def from_spec(cls, spec: dict):
+        """
+        Recreates a card from the data returned by to_spec.
+
+        Args:
+            spec (dict): The card description.
+
+        Returns:
+            Card: The recreated card with its original UID and owner.
+        """
+        card = CARD_CLASSES[spec["kind"]]._from_spec(spec)
+        card._assign_uid(spec["uid"])
+        card.owner = spec["owner"]
+        card._new_card = spec["new"]
+        return card
+
+    @classmethod
+    def _from_spec(cls, spec: dict):
+        """
+        overwrite function
+        """
+        raise NotImplementedError(f"{cls.__name__} cannot be restored from a spec")
+    
+    def __str__(self):
+        """
+        String representation of the card.
+        """
+        new_tag = ""
+        if self._new_card:
+            new_tag = "NEW "
+        return f"{new_tag}{self.card_type} {self.owner}"
+
+class NumberCard(Card):
+    """
+    Represents a numbered card.
+    """
+    KIND = CardKind.NUMBER
+
+    def __init__(self, number: int, color: CardColor):
+        """
+        Initializes a numbered card with a number and color.
+        """
+        super().__init__(CardType.NUMBER, color)
+        self.__number = number
+
+    @property
+    def number(self):
+        """
+        Returns the number of the card.
+        """
+        return self.__number
+
+    @property
+    def symbol(self):
+        """
+        Returns what cards of the same kind are matched by, the number.
+        """
+        return self.__number
+
+    def to_spec(self):
+        spec = super().to_spec()
+        spec["number"] = self.number
+        return spec
+
+    @classmethod
+    def _from_spec(cls, spec: dict):
+        return cls(spec["number"], CardColor(spec["color"]))
+
+    def render(self):
+        """
+        Renders the card with color, built once per card.
+        """
+        if self._rendered is None:
+            color_start = CARD_COLOR_CODES.get(self.color.value, CARD_COLOR_CODES['reset'])
+            self._rendered = f"{color_start}{self.color.value} {self.number}{CARD_COLOR_CODES['reset']}"
+        return self._rendered
+
+    def __str__(self):
+        """
+        String representation of the numbered card.
+        """
+        return self._cached_label(f"{Color.LIGHT_GREEN}NEW {Color.RESET}")[0]
+
+    def label_width(self):
+        return self._cached_label(f"{Color.LIGHT_GREEN}NEW {Color.RESET}")[1]
+
+class JokerCard(Card):
+    """
+    Represents a joker card.
+    """
+    KIND = CardKind.JOKER
+
+    def __init__(self, color: CardColor, title: str):
+        """
+        Initializes a joker card with a color and title.
+        """
+        super().__init__(CardType.JOKER, color)
+        self.__title = title
+
+    @property
+    def title(self):
+        """
+        Returns the title of the joker card.
+        """
+        return self.__title
+
+    @property
+    def symbol(self):
+        """
+        Returns what cards of the same kind are matched by, the title.
+        """
+        return self.__title
+
+    def to_spec(self):
+        spec = super().to_spec()
+        spec["title"] = self.title
+        return spec
+
+    @classmethod
+    def _from_spec(cls, spec: dict):
+        return cls(CardColor(spec["color"]), spec["title"])
+    
+    def render(self):
+        """
+        Renders the joker card with color, built once per card.
+        """
+        if self._rendered is None:
+            color_start = CARD_COLOR_CODES.get(self.color.value, CARD_COLOR_CODES['reset'])
+            color_end = CARD_COLOR_CODES['reset']
+            if self.color != CardColor.NO_COLOR:
+                self._rendered = f"{color_start}{self.color.value} {self.title}{color_end}"
+            else:
+                self._rendered = f"{color_start}{self.title}{color_end}"
+        return self._rendered
+
+    def __str__(self):
+        """
+        String representation of the joker card.
+        """
+        return self._cached_label(f"{Color.LIGHT_MAGENTA}NEW {Color.RESET}")[0]
+
+    def label_width(self):
+        return self._cached_label(f"{Color.LIGHT_MAGENTA}NEW {Color.RESET}")[1]
+
+class DrawCard(JokerCard):
+    """
+    Represents a draw card (special type of joker card).
+
+    The bonus holds the cards stacked onto the draw card with the draw stacking house rule.
+    """
+    KIND = CardKind.DRAW
+
+    def __init__(self, color: CardColor, title: str):
+        """
+        Initializes a draw card with a color and title.
+        """
+        super().__init__(color, title)
+        self.bonus = 0
+
+    @property
+    def count(self):
+        """
+        Returns the number of cards the draw card gives, without the bonus.
+        """
+        return int(self.title.split(" ")[1])
+
+    def to_spec(self):
+        spec = super().to_spec()
+        spec["bonus"] = self.bonus
+        return spec
+
+    @classmethod
+    def _from_spec(cls, spec: dict):
+        card = super()._from_spec(spec)
+        card.bonus = spec["bonus"]
+        return card
+
+    def __str__(self):
+        """
+        String representation of the draw card.
+        """
+        past_render = super().__str__()
+        if self.bonus > 0:
+            past_render += f" {Color.CYAN}({Color.PINK}+{Color.CYAN}{self.bonus}){Color.RESET}"
+        return past_render
+
+    def label_width(self):
+        # the bonus can change, so only the part of the joker card comes from the cache
+        width = super().label_width()
+        if self.bonus > 0:
+            width += len(f" (+{self.bonus})")
+        return width
+    
+class ReverseCard(JokerCard):
+    """
+    Represents a reverse card (special type of joker card).
+    """
+    KIND = CardKind.REVERSE
+
+    def __init__(self, color: CardColor, title: str):
+        """
+        Initializes a reverse card with a color and title.
+        """
+        super().__init__(color, title)
+
+class SkipCard(JokerCard):
+    """
+    Skips the next player (special type of joker card), only dealt with the skip cards house rule.
+    """
+    KIND = CardKind.SKIP
+
+    def __init__(self, color: CardColor, title: str):
+        """
+        Initializes a skip card with a color and title.
+        """
+        super().__init__(color, title)
+
+class MarkerCard(JokerCard):
+    """
+    Marks the next wished color (special type of joker card).
+    """
+    KIND = CardKind.MARKER
+
+    def __init__(self, color: CardColor, title: str):
+        """
+        Initializes a mark card with a color and title.
+        """
+        super().__init__(color, title)
+
+    @classmethod
+    def place_marker(cls, color: str, title: str):
+        """
+        Lays a marker for the wished color on the game stack.
+
+        Args:
+            color (str): The wished color, one of COLOR_OPTIONS.
+            title (str): The title of the draw card the color was wished with.
+
+        Returns:
+            MarkerCard: The new marker.
+        """
+        new_mark = cls(CardColor(color), title)
+        # the marker never was in the global stack, so it is added instead of transferred
+        new_mark.owner = "game"
+        new_mark.get_stack_based_on_owner("game").add_card(new_mark)
+        return new_mark
+
+class Stack(UIDObject):
+    """
+    Represents a stack of cards.
+    """
+    def __init__(self, owner: str, cards: dict[str, Card], sorted_stack=False):
+        """
+        Initializes a stack with an owner and cards.
+
+        Args:
+            owner (str): The owner of the stack.
+            cards (dict[str, Card]): The cards in the stack.
+            sorted_stack (bool, optional): If True, the stack is sorted. Defaults to False.
+        """
+        super().__init__()
+        self.sorted_stack = sorted_stack
+        card_list = cards.items()
+        if sorted_stack:
+            card_list = sorted(card_list, key=lambda item: item[1].color.value)
+        self.cards = OrderedDict(card_list)
+        self.owner = owner
+        self.last_added_card = None
+        # the rendered layout of __str__, every change of the cards resets it
+        self._layout = None
+        # counts the changes of the cards and their order, e.g. for caches of the legal moves
+        self.version = 0
+        self._match_index = None
+        
+    def shuffle_deck(self, remain_last_card=False):
+        """
+        Shuffles the deck.
+
+        Args:
+            remain_last_card (bool, optional): If True, the last card remains in place. Defaults to False.
+        """
+        if remain_last_card:
+            last_card_uid = self.last_added_card.uid
+        
+        items = list(self.cards.items())
+        random.shuffle(items)
+        self.cards = OrderedDict(items)
+        self._layout = None
+        self.version += 1
+        
+        if remain_last_card:
+            last_card = self.cards.pop(last_card_uid)
+            self.cards[last_card_uid] = last_card
+    
+    def clear_new_flag(self):
+        """
+        Clears the new card flag for all cards in the stack.
+        """
+        for uid, card_obj in self.cards.items():
+            card_obj.clear_new_flag()
+        self._layout = None
+
+    def get_card_per_index(self, index: int):
+        """
+        Gets a card by index.
+
+        Args:
+            index (int): The index of the card.
+
+        Returns:
+            Card: The card at the specified index.
+        """
+        try:
+            return list(self.cards.values())[index]
+        except IndexError:
+            raise ValueError(f"No card at index: {index}")
+
+    def top_card(self):
+        """
+        Returns the last card of the stack, the top of a draw stack, without copying the stack.
+
+        Returns:
+            Card: The last card, or None if the stack is empty.
+        """
+        return next(reversed(self.cards.values()), None)
+
+    def match_index(self):
+        """
+        Returns the UIDs of the cards by color and by kind and symbol.
+
+        The rule engine finds the playable cards of a hand with a few set unions
+        instead of testing every card. The index is built on first use, only hands
+        need it, and add_card and remove_card keep it up to date.
+
+        Returns:
+            tuple[dict, dict]: The UIDs by CardColor and by (CardKind, symbol).
+        """
+        if self._match_index is None:
+            self._match_index = ({}, {})
+            for card_obj in self.cards.values():
+                self._index_card(card_obj)
+        return self._match_index
+
+    def _index_card(self, card_obj: Card):
+        by_color, by_symbol = self._match_index
+        by_color.setdefault(card_obj.color, set()).add(card_obj.uid)
+        by_symbol.setdefault((card_obj.KIND, card_obj.symbol), set()).add(card_obj.uid)
+
+    def _unindex_card(self, card_obj: Card):
+        by_color, by_symbol = self._match_index
+        by_color[card_obj.color].discard(card_obj.uid)
+        by_symbol[(card_obj.KIND, card_obj.symbol)].discard(card_obj.uid)
+
+    def add_card(self, card_obj: Card, new_flag=False):
+        """
+        Adds a card to the stack.
+
+        Args:
+            card_obj (Card): The card to add.
+            new_flag (bool, optional): If True, marks the card as new. Defaults to False.
+        """
+        if new_flag:
+            card_obj.set_new_card()
+        self.cards[card_obj.uid] = card_obj
+        self.last_added_card = card_obj
+        self._layout = None
+        self.version += 1
+        if self._match_index is not None:
+            self._index_card(card_obj)
+        if self.sorted_stack:
+            # the stack already is sorted, so only the cards of a later color move behind the new card
+            color_value = card_obj.color.value
+            for uid in [uid for uid, card in self.cards.items() if card.color.value > color_value]:
+                self.cards.move_to_end(uid)
+
+    def remove_card(self, card_obj: Card):
+        """
+        Removes a card from the stack.
+
+        Args:
+            card_obj (Card): The card to remove.
+        """
+        if card_obj.uid in self.cards:
+            del self.cards[card_obj.uid]
+            self._layout = None
+            self.version += 1
+            if self._match_index is not None:
+                self._unindex_card(card_obj)
+        else:
+            raise ValueError(f"Card with UID {card_obj.uid} not found in stack")
+
+    def __str__(self):
+        if self._layout is None:
+            self._layout = self._render_layout()
+        return self._layout
+
+    def _render_layout(self):
+        """
+        Lists the cards with their numbers, in columns once there are more than 10.
+
+        The columns are aligned by the visible widths of the cards, the ANSI
+        sequences in the labels take no room on the screen.
+
+        Returns:
+            str: The rendered stack.
+        """
+        entries = [(f"{index + 1}: {card}", len(f"{index + 1}: ") + card.label_width())
+                   for index, card in enumerate(self.cards.values())]
+        num_cards = len(entries)
+
+        if num_cards <= 10:
+            # Display cards vertically
+            return "\n".join(entry for entry, _ in entries)
+        
+        # Calculate the number of rows and columns needed for more than 10 cards
+        rows = min(10, (num_cards + 3) // 4)
+        columns = (num_cards + rows - 1) // rows
+
+        # Determine the maximum visible width of card descriptions
+        max_len = max(width for _, width in entries)
+
+        result = []
+        for i in range(rows):
+            row = []
+            for j in range(columns):
+                index = i * columns + j
+                if index < num_cards:
+                    card_str, width = entries[index]
+                    row.append(card_str + " " * (max_len - width))  # Left align with fixed width
+                else:
+                    row.append(" " * max_len)  # Fill empty spaces
+            result.append(" | ".join(row))
+
+        return "\n".join(result)
+
+
+CARD_CLASSES = {card_class.__name__: card_class
+                for card_class in (NumberCard, JokerCard, DrawCard, ReverseCard, SkipCard, MarkerCard)}
+
+class DeckTemplate:
+    """
+    A deck built once per process, every game gets fresh clones of its cards.
+
+    Building a card runs the constructors of its class chain and draws a UID; a
+    clone copies the attributes of the prototype and only draws the UID. The
+    prototypes are not registered, so no game can reach them.
+    """
+    def __init__(self, cards: dict[str, Card], decks: int = 1):
+        """
+        Initializes the template and unregisters the prototype cards.
+
+        Args:
+            cards (dict[str, Card]): The cards of a freshly built deck, in their initial order.
+            decks (int, optional): The number of decks a game is dealt, every one gets its own clones. Defaults to 1.
+        """
+        for card in cards.values():
+            UIDObject.remove(card.uid)
+        self.__prototypes = tuple(cards.values()) * decks
+
+    def __len__(self):
+        return len(self.__prototypes)
+
+    def instantiate(self, owner: str, shuffle=True):
+        """
+        Clones the deck for a new game.
+
+        Args:
+            owner (str): The owner of the cloned cards.
+            shuffle (bool, optional): If True, the cards come in random order. Defaults to True.
+
+        Returns:
+            dict[str, Card]: The cloned cards by UID.
+        """
+        prototypes = list(self.__prototypes)
+        if shuffle:
+            random.shuffle(prototypes)
+        cards = {}
+        for prototype, uid in zip(prototypes, UIDObject._generate_uids(len(prototypes))):
+            card = prototype.clone(uid)
+            card.owner = owner
+            cards[card.uid] = card
+        return cards
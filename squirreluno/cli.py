@@ -0,0 +1,158 @@
+from threading import Thread
+import argparse
+import os
+
+# the hot seat lobby of the terminal game, rooms of the router take any number of players
+DEFAULT_MAX_PLAYERS = 6
+
+def parse_args(argv=None):
+    """
+    Parses the command line, falling back to SQUIRRELUNO_* environment variables.
+
+    Args:
+        argv (list[str], optional): The arguments to parse. Defaults to sys.argv.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    env = os.environ.get
+    parser = argparse.ArgumentParser(prog="squirreluno")
+    parser.add_argument("--production", action="store_true",
+                        default=env("SQUIRRELUNO_PRODUCTION", "") == "1",
+                        help="serve with eventlet instead of the debug server")
+    parser.add_argument("--host", default=env("SQUIRRELUNO_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(env("SQUIRRELUNO_PORT", "5000")))
+    parser.add_argument("--workers", type=int, default=int(env("SQUIRRELUNO_WORKERS", "1000")),
+                        help="size of the eventlet green thread pool for connections")
+    parser.add_argument("--grace-period", type=float, default=float(env("SQUIRRELUNO_GRACE_PERIOD", "30")),
+                        help="seconds to let the turn in flight finish on shutdown")
+    parser.add_argument("--startup-budget-ms", type=int, default=int(env("SQUIRRELUNO_STARTUP_BUDGET_MS", "1500")),
+                        help="time allowed until the server accepts connections")
+    parser.add_argument("--seat-grace-period", type=float, default=float(env("SQUIRRELUNO_SEAT_GRACE_PERIOD", "60")),
+                        help="seconds a disconnected player's seat is held for a reconnect")
+    parser.add_argument("--database", default=env("SQUIRRELUNO_DATABASE"),
+                        help="SQLAlchemy URL to record finished games in, e.g. sqlite:///squirreluno.db")
+    parser.add_argument("--snapshots", default=env("SQUIRRELUNO_SNAPSHOTS"),
+                        help="SQLAlchemy URL to snapshot live games in and restore them from, "
+                             "e.g. sqlite:///snapshots.db")
+    parser.add_argument("--router-workers", type=int, default=int(env("SQUIRRELUNO_ROUTER_WORKERS", "0")),
+                        help="run as room router in front of this many worker processes")
+    parser.add_argument("--no-metrics", dest="metrics", action="store_false",
+                        default=env("SQUIRRELUNO_METRICS", "1") != "0",
+                        help="switch off the instrumentation behind /metrics")
+    parser.add_argument("--admin-token", default=env("SQUIRRELUNO_ADMIN_TOKEN"),
+                        help="enables the /admin routes for requests with this token")
+    parser.add_argument("--house-rules", nargs="*", default=env("SQUIRRELUNO_HOUSE_RULES", "").split(),
+                        help="house rules of the game: draw_stacking, skip_cards, jump_in "
+                             "(rooms of the router choose theirs in create_room)")
+    parser.add_argument("--players", nargs="*", default=None,
+                        help="player names, skips the interactive lobby")
+    parser.add_argument("--spectator-delay", type=float, default=float(env("SQUIRRELUNO_SPECTATOR_DELAY", "0")),
+                        help="seconds the spectators see the table later than the players")
+    parser.add_argument("--turn-timeout", type=float, default=float(env("SQUIRRELUNO_TURN_TIMEOUT", "0")),
+                        help="seconds a player has for a turn before drawing and passing automatically, 0 for no limit")
+    parser.add_argument("--max-players", type=int, default=int(env("SQUIRRELUNO_MAX_PLAYERS", str(DEFAULT_MAX_PLAYERS))),
+                        help="names the interactive lobby asks for at most, larger tables are dealt more decks")
+    return parser.parse_args(argv)
+
+def ask_players(max_players: int = DEFAULT_MAX_PLAYERS):
+    players = []
+    while True:
+        if len(players) >= max_players:
+            break
+
+        name = input("Create Player: ")
+        if name == "#del":
+            del_name = players.pop(-1)
+            print(f"{del_name} deleted")
+        elif name == "go":
+            break
+        else:
+            players.append(name)
+    return players
+
+def main(argv=None):
+    args = parse_args(argv)
+    from . import metrics
+
+    # before the game modules are imported, they wrap their functions at import time
+    metrics.configure(args.metrics)
+    if args.production or args.router_workers:
+        # eventlet has to patch the standard library before Flask is imported. Its green DNS
+        # resolver costs about half a second of startup, the server only resolves names rarely
+        os.environ.setdefault("EVENTLET_NO_GREENDNS", "yes")
+        import eventlet
+        eventlet.monkey_patch()
+
+    server_options = {"workers": args.workers,
+                      "grace_period": args.grace_period,
+                      "startup_budget_ms": args.startup_budget_ms}
+    snapshotter = None
+    if args.snapshots:
+        from .snapshots import SnapshotStore, Snapshotter
+
+        snapshotter = Snapshotter(SnapshotStore(args.snapshots))
+
+    if args.router_workers:
+        from .sharding import RoomRouter
+
+        router = RoomRouter(args.router_workers, port=args.port, database_url=args.database,
+                            snapshotter=snapshotter, turn_timeout=args.turn_timeout,
+                            seat_grace_period=args.seat_grace_period)
+        if args.database:
+            from .persistence import create_database_engine
+            from .stats import StatsService
+
+            # the workers write the results, so the router's cache only expires by its TTL
+            StatsService(create_database_engine(args.database)).register_routes(router)
+        if args.admin_token:
+            from .profiler import register_profile_route
+
+            register_profile_route(router, args.admin_token, router.profile_room)
+        router.start_server(args.host, production=True, **server_options)
+        return
+
+    from .game_logic import GameMaster
+    from .rule_engine import HouseRules
+    from .utils import Color
+
+    result_writer = None
+    stats = None
+    if args.database:
+        from .persistence import create_database_engine, ResultWriter
+        from .stats import StatsService
+
+        engine = create_database_engine(args.database)
+        result_writer = ResultWriter(engine)
+        stats = StatsService(engine)
+        result_writer.add_commit_listener(stats.invalidate_results)
+
+    game_options = {"seat_grace_period": args.seat_grace_period,
+                    "result_writer": result_writer,
+                    "snapshotter": snapshotter,
+                    "spectator_delay": args.spectator_delay,
+                    "turn_timeout": args.turn_timeout}
+    state = snapshotter.store.load_all().get(GameMaster.SNAPSHOT_ID) if snapshotter else None
+    if state is not None:
+        print(f"Continuing the game of {', '.join(player['name'] for player in state['players'])}")
+        game = GameMaster.from_state(state, port=args.port, **game_options)
+    else:
+        players = args.players or ask_players(args.max_players)
+        print(f"{Color.YELLOW}Setting up the game...{Color.RESET}")
+        game = GameMaster(players, port=args.port, house_rules=HouseRules.from_names(args.house_rules), **game_options)
+    if stats is not None:
+        stats.register_routes(game)
+    if args.admin_token:
+        from .profiler import profile_in_background, register_profile_route
+
+        register_profile_route(game, args.admin_token, lambda room_id, seconds, interval_ms:
+                               profile_in_background(game, seconds, interval_ms=interval_ms))
+    game_thread = Thread(target=game.start)
+    game_thread.start()
+    try:
+        game.start_server(args.host, production=args.production, **server_options)
+    finally:
+        if result_writer is not None:
+            result_writer.close()
+        if snapshotter is not None:
+            snapshotter.close()
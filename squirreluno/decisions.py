@@ -0,0 +1,71 @@
+from __future__ import annotations
+import time
+
+DEFAULT_DECISION_TIMEOUT = 30.0
+COLOR_OPTIONS = ("red", "green", "blue", "yellow")
+
+class PendingDecision:
+    """
+    A choice the game waits for in the middle of an action, e.g. the color after a draw card.
+
+    The game keeps the decision as part of its state instead of asking the terminal,
+    so no thread waits for the player. The action continues when the choice arrives
+    with Game.decide, or with the default once the deadline has passed.
+    """
+    def __init__(self, kind: str, player_uid: str, options: tuple, default: str, deadline: float, card_uid: str = None):
+        """
+        Initializes a decision.
+
+        Args:
+            kind (str): What is chosen, the game continues with its _resolve_<kind> method.
+            player_uid (str): The UID of the player who decides.
+            options (tuple[str]): The valid choices.
+            default (str): The choice taken when the deadline passes.
+            deadline (float): The wall clock time of the deadline, it stays valid in a restored snapshot.
+            card_uid (str, optional): The UID of the card that asked for the decision.
+        """
+        self.kind = kind
+        self.player_uid = player_uid
+        self.options = tuple(options)
+        self.default = default
+        self.deadline = deadline
+        self.card_uid = card_uid
+
+    def is_expired(self, now: float = None):
+        """
+        Checks if the deadline has passed.
+
+        Args:
+            now (float, optional): The current wall clock time. Defaults to time.time().
+
+        Returns:
+            bool: True if the default has to be taken.
+        """
+        return (time.time() if now is None else now) >= self.deadline
+
+    def to_data(self):
+        """
+        Describes the decision as plain data, e.g. for snapshots and clients.
+
+        Returns:
+            dict: The fields of the decision.
+        """
+        return {"kind": self.kind,
+                "player": self.player_uid,
+                "options": list(self.options),
+                "default": self.default,
+                "deadline": self.deadline,
+                "card": self.card_uid}
+
+    @classmethod
+    def from_data(cls, data: dict):
+        """
+        Recreates a decision from the data returned by to_data.
+
+        Args:
+            data (dict): The decision description.
+
+        Returns:
+            PendingDecision: The recreated decision.
+        """
+        return cls(data["kind"], data["player"], data["options"], data["default"], data["deadline"], data.get("card"))
@@ -0,0 +1,221 @@
+from __future__ import annotations
+from .rules import Game, Player
+from .network import Networking
+from .sessions import SessionRegistry, DEFAULT_SEAT_GRACE_PERIOD
+from .spectators import SpectatorChannel, SPECTATE_EVENT, DEFAULT_FAN_OUT_INTERVAL, DEFAULT_SPECTATOR_DELAY
+from .timers import TimerWheel
+
+PLAYER_POLL_INTERVAL = 0.5
+
+class GameMaster(Game, Networking):
+    """
+    Manages the overall game logic and serves it to the clients.
+
+    With a turn timeout every turn has a deadline in the timer wheel shared by all
+    games of the process. It is armed whenever the turn changes and cancelled when
+    the game ends; a player who misses it draws and the turn is handed on.
+    """
+    # the deadlines of the turns, advanced by the background task of the games
+    turn_timers = TimerWheel()
+
+    def __init__(self, players: list, port: int = 5000, *, state: dict = None,
+                 seat_grace_period: float = DEFAULT_SEAT_GRACE_PERIOD, result_writer=None, snapshotter=None,
+                 house_rules=None, spectator_delay: float = DEFAULT_SPECTATOR_DELAY, turn_timeout: float = None):
+        """
+        Initializes the GameMaster with a list of players.
+
+        Args:
+            players (list): A list of player names.
+            port (int, optional): The port of the socket server. Defaults to 5000.
+            state (dict, optional): A state returned by export_state to continue instead of dealing a new game.
+            seat_grace_period (float, optional): The time in seconds a seat is held for a disconnected player.
+            result_writer (ResultWriter, optional): The write-behind queue finished games are recorded in.
+            snapshotter (Snapshotter, optional): Takes a snapshot of the game after every turn.
+            house_rules (HouseRules, optional): The house rules of a new game.
+            spectator_delay (float, optional): The seconds spectators see the table later than the players.
+            turn_timeout (float, optional): The seconds a player has for a turn, None or 0 for no limit.
+        """
+        self.turn_timeout = turn_timeout
+        super().__init__(players, state=state, result_writer=result_writer, snapshotter=snapshotter,
+                         house_rules=house_rules, port=port)
+        self.sessions = SessionRegistry(seat_grace_period)
+        self.spectators = SpectatorChannel(spectator_delay)
+        # the table before the first turn
+        self.spectators.publish(self.table_snapshot())
+        self.on_event("claim_seat", self._on_claim_seat)
+        self.on_event("action", self._on_action)
+        self.on_event("decide", self._on_decide)
+        self.on_event("spectate", self._on_spectate)
+        self.on_event("stop_spectating", self._on_stop_spectating)
+
+    def client_snapshot(self, sid: str):
+        session = self.sessions.get_by_sid(sid)
+        if session is None:
+            if sid in self.spectators:
+                frame = self.spectators.current_frame()
+                return frame.payload if frame is not None else None
+            return None
+        return self.player_snapshot(self.players[session.player_uid])
+
+    def client_connected(self, sid: str, auth=None):
+        token = auth.get("token") if isinstance(auth, dict) else None
+        if token is None:
+            return
+        session = self.sessions.resume(token, sid)
+        if session is None:
+            self.send_to_client(sid, "session_expired")
+            return
+        player = self.players[session.player_uid]
+        player.network_obj = sid
+        self.send_to_client(sid, "resume", self.player_snapshot(player))
+
+    def client_disconnected(self, sid: str):
+        self.spectators.unsubscribe(sid)
+        session = self.sessions.detach(sid)
+        if session is not None:
+            self.players[session.player_uid].network_obj = None
+
+    def _on_claim_seat(self, sid: str, data: dict):
+        """
+        Gives a connection the seat of a player and a token to resume it later.
+
+        Args:
+            sid (str): The socket session id of the client.
+            data (dict): {"name": str}, the name of the player.
+        """
+        name = data.get("name") if isinstance(data, dict) else None
+        player = next((player for player in self.players.values() if player.name == name), None)
+        if player is None:
+            self.send_to_client(sid, "error", {"message": f"No match for Player: {name}"})
+            return
+        try:
+            session = self.sessions.issue(player.uid, sid)
+        except ValueError as error:
+            self.send_to_client(sid, "error", {"message": str(error)})
+            return
+        player.network_obj = sid
+        self.send_to_client(sid, "seat", {"token": session.token, "snapshot": self.player_snapshot(player)})
+
+    def _on_action(self, sid: str, data: dict):
+        """
+        Applies an action for the seat of a connection.
+
+        Args:
+            sid (str): The socket session id of the client.
+            data (dict): {"action": str}, as typed in the terminal game, e.g. "draw", "next" or a card index.
+        """
+        self._act_for_seat(sid, data, "action", self.apply_action)
+
+    def _on_decide(self, sid: str, data: dict):
+        """
+        Makes the pending decision for the seat of a connection, e.g. the color after a draw card.
+
+        Args:
+            sid (str): The socket session id of the client.
+            data (dict): {"choice": str}, one of the options of the pending decision.
+        """
+        self._act_for_seat(sid, data, "choice", self.decide)
+
+    def _act_for_seat(self, sid: str, data: dict, field: str, method):
+        """
+        Calls a game method with the player of the seat the connection holds, never one named by the client.
+
+        Args:
+            sid (str): The socket session id of the client.
+            data (dict): The event payload.
+            field (str): The payload field with the argument of the method.
+            method (callable): Called with the player UID and the argument.
+        """
+        session = self.sessions.get_by_sid(sid)
+        if session is None:
+            self.send_to_client(sid, "error", {"message": "Claim a seat first"})
+            return
+        value = data.get(field) if isinstance(data, dict) else None
+        if not isinstance(value, str):
+            self.send_to_client(sid, "error", {"message": f"Missing {field}"})
+            return
+        try:
+            method(session.player_uid, value)
+        except ValueError as error:
+            self.send_to_client(sid, "error", {"message": str(error)})
+            return
+        self.send_snapshots()
+
+    def send_snapshots(self):
+        """
+        Sends every seated player the snapshot of the game after a change.
+        """
+        for player in self.players.values():
+            if player.network_obj is not None:
+                self.send_to_client(player.network_obj, "snapshot", self.player_snapshot(player))
+
+    def _on_spectate(self, sid: str, data=None):
+        """
+        Adds a connection to the spectators, it gets the public table as JSON with every fan-out.
+
+        Args:
+            sid (str): The socket session id of the client.
+            data: Unused.
+        """
+        self.spectators.subscribe(sid)
+
+    def _on_stop_spectating(self, sid: str, data=None):
+        self.spectators.unsubscribe(sid)
+
+    def fan_out_spectators(self):
+        """
+        Sends the newest released frame to the spectators who haven't seen it, until the server shuts down.
+
+        Runs as background task, so the turns never wait for the spectators. Every
+        spectator is sent the same payload object through its bounded queue.
+        """
+        while not self.shutdown_requested:
+            frame, sids = self.spectators.due()
+            for sid in sids:
+                self.send_to_client(sid, SPECTATE_EVENT, frame.payload)
+            self.sleep(DEFAULT_FAN_OUT_INTERVAL)
+
+    def turn_changed(self):
+        """
+        Arms the deadline of the player who has the turn now, or cancels it once the game ended.
+        """
+        if not self.turn_timeout:
+            return
+        if self.game_active:
+            self.turn_timers.arm(self.uid, self.turn_timeout, self._expire_turn, self.player_turn)
+        else:
+            self.turn_timers.cancel(self.uid)
+
+    def _expire_turn(self, player_uid: str):
+        if self.expire_turn(player_uid):
+            self.send_snapshots()
+
+    def run_turn_timers(self):
+        """
+        Advances the turn timers every tick until the server shuts down.
+
+        Runs as background task, so no room needs a thread or a sleep of its own.
+        """
+        while not self.shutdown_requested:
+            self.turn_timers.advance()
+            self.sleep(self.turn_timers.tick)
+        self.turn_timers.cancel(self.uid)
+
+    def wait_for_players(self):
+        """
+        Idles until the server shuts down, yielding to the socket server in between.
+
+        A decision whose deadline passed in the meantime gets its default.
+        """
+        while not self.shutdown_requested:
+            self.sleep(PLAYER_POLL_INTERVAL)
+            if self.expire_decision():
+                self.send_snapshots()
+    
+    def start(self):
+        self.start_background_task(self.fan_out_spectators)
+        if self.turn_timeout:
+            # the deadline of the first turn
+            self.turn_changed()
+            self.start_background_task(self.run_turn_timers)
+        self.wait_for_players()
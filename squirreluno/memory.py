@@ -0,0 +1,106 @@
+from __future__ import annotations
+from enum import Enum
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+from .utils import ComponentManager, UIDObject
+import gc
+import sys
+
+# objects every game refers to, they are not retained by a single game
+SHARED_TYPES = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType, Enum, bool, type(None))
+# attributes of a game that point to objects outside of the game
+SHARED_ATTRIBUTES = ("result_writer", "snapshotter", "rule_engine", "house_rules")
+# the Flask app and socket server of the Networking base class are left out
+NETWORKING_PREFIX = "_Networking__"
+
+class FootprintWalker:
+    """
+    Sums up the sizes of an object graph and counts every object only once.
+
+    The walk follows instance attributes and the items of containers. It stops at
+    types, modules, functions and enum members, which are shared by all games, and
+    at objects already counted, so the categories of a footprint never overlap.
+    """
+    def __init__(self):
+        self.objects = 0
+        self.__seen = set()
+
+    def size(self, *roots, skip_attribute=None):
+        """
+        Returns the bytes of the objects reachable from the roots that were not counted yet.
+
+        Args:
+            *roots: The objects to start from.
+            skip_attribute (callable, optional): Called with an attribute name, True leaves the attribute out.
+
+        Returns:
+            int: The size in bytes.
+        """
+        total = 0
+        pending = list(roots)
+        while pending:
+            obj = pending.pop()
+            if isinstance(obj, SHARED_TYPES) or id(obj) in self.__seen:
+                continue
+            self.__seen.add(id(obj))
+            self.objects += 1
+            total += sys.getsizeof(obj)
+            if isinstance(obj, (str, bytes, int, float)):
+                continue
+            if isinstance(obj, dict):
+                pending.extend(obj.keys())
+                pending.extend(obj.values())
+            elif isinstance(obj, (list, tuple, set, frozenset)):
+                pending.extend(obj)
+            elif hasattr(obj, "__dict__"):
+                # attribute names are interned and shared, only the values belong to the object
+                attributes = vars(obj)
+                total += sys.getsizeof(attributes)
+                pending.extend(value for name, value in attributes.items()
+                               if skip_attribute is None or not skip_attribute(name))
+            else:
+                pending.extend(gc.get_referents(obj))
+        return total
+
+def _registry_entry_size(registry: dict):
+    # average bytes of one slot in a shared registry dict
+    return sys.getsizeof(registry) // max(len(registry), 1)
+
+def game_footprint(game, scope_id: str = None):
+    """
+    Measures the memory a game retains.
+
+    The cards are counted first, then the stacks without their cards, then the
+    players without their hands, the action messages and the remaining state of
+    the game. The registry part are the slots of the game objects in the
+    shared UIDObject pool plus the component scope of the game. The Flask app
+    and socket server of a GameMaster are not included.
+
+    Args:
+        game (Game): The game to measure.
+        scope_id (str, optional): The component scope of the game, None for the default registry.
+
+    Returns:
+        dict: The bytes per category, the total and the number of objects.
+    """
+    walker = FootprintWalker()
+    stacks = list(game._iterate_stacks())
+    cards = [card for stack in stacks for card in stack.cards.values()]
+    footprint = {"cards": walker.size(*cards),
+                 "stacks": walker.size(*stacks),
+                 "players": walker.size(*game.players.values()),
+                 "player_actions": walker.size(game.player_actions, game.messages_for_next_player)}
+
+    def skip_attribute(name):
+        return name.startswith(NETWORKING_PREFIX) or name in SHARED_ATTRIBUTES
+    footprint["game_master"] = walker.size(game, skip_attribute=skip_attribute)
+
+    uid_count = 1 + len(stacks) + len(cards) + len(game.players)
+    registry = uid_count * _registry_entry_size(UIDObject._objects)
+    if scope_id is None:
+        registry += (1 + len(stacks)) * _registry_entry_size(ComponentManager._components)
+    else:
+        registry += walker.size(ComponentManager._scoped_components.get(scope_id, {}))
+    footprint["registry"] = registry
+    footprint["total"] = sum(footprint.values())
+    footprint["objects"] = walker.objects
+    return footprint
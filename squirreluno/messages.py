@@ -0,0 +1,153 @@
+from __future__ import annotations
+from .utils import UIDObject, Color
+from enum import Enum
+
+class MessageKind(Enum):
+    """
+    Enum for the kinds of turn messages.
+    """
+    INVALID_MOVE = "invalid_move"
+    DELETED_CARD = "deleted_card"
+    DREW_CARD = "drew_card"
+    PLAYED_CARD = "played_card"
+    WRONG_CARD = "wrong_card"
+    JOKER_ACTION = "joker_action"
+    GAVE_CARDS = "gave_cards"
+    RECEIVED_CARDS = "received_cards"
+    STILL_YOUR_TURN = "still_your_turn"
+    DIRECTION_REVERSED = "direction_reversed"
+    WISHED_COLOR = "wished_color"
+    STACKED_DRAW = "stacked_draw"
+    DREW_PENALTY = "drew_penalty"
+    SKIPPED_PLAYER = "skipped_player"
+    TIMED_OUT = "timed_out"
+
+class TurnMessage:
+    """
+    What happened in a turn, as a record of references instead of a formatted string.
+
+    The game only creates these records; the presentation adapters turn them into
+    text when somebody looks, format_ansi for the terminal and to_data for sockets
+    and snapshots.
+    """
+    __slots__ = ("kind", "player", "other", "card", "cards", "text")
+
+    def __init__(self, kind: MessageKind, *, player=None, other=None, card=None, cards=(), text: str = None):
+        """
+        Initializes a message.
+
+        Args:
+            kind (MessageKind): What happened.
+            player (Player, optional): The player who acted.
+            other (Player, optional): The player affected by the action.
+            card (Card, optional): The card the message is about.
+            cards (tuple[Card], optional): Several cards, e.g. the ones a player received.
+            text (str, optional): Input of the player, e.g. an invalid action.
+        """
+        self.kind = kind
+        self.player = player
+        self.other = other
+        self.card = card
+        self.cards = cards
+        self.text = text
+
+    def to_data(self):
+        """
+        Describes the message as plain data with the UIDs of its players and cards.
+
+        Returns:
+            dict: The kind and the set fields of the message.
+        """
+        data = {"kind": self.kind.value}
+        if self.player is not None:
+            data["player"] = self.player.uid
+        if self.other is not None:
+            data["other"] = self.other.uid
+        if self.card is not None:
+            data["card"] = self.card.uid
+        if self.cards:
+            data["cards"] = [card.uid for card in self.cards]
+        if self.text is not None:
+            data["text"] = self.text
+        return data
+
+    @classmethod
+    def from_data(cls, data: dict, players: dict):
+        """
+        Recreates a message from the data returned by to_data.
+
+        Cards that no longer exist, e.g. deleted ones, come back as None.
+
+        Args:
+            data (dict): The message description.
+            players (dict[str, Player]): The players of the game by UID.
+
+        Returns:
+            TurnMessage: The recreated message.
+        """
+        return cls(MessageKind(data["kind"]),
+                   player=players.get(data.get("player")),
+                   other=players.get(data.get("other")),
+                   card=_find_card(data.get("card")),
+                   cards=tuple(_find_card(uid) for uid in data.get("cards", ())),
+                   text=data.get("text"))
+
+def _find_card(uid: str):
+    if uid is None:
+        return None
+    try:
+        return UIDObject.get(uid)
+    except ValueError:
+        return None
+
+def export_messages(messages: list):
+    """
+    Converts messages to plain data, strings of older snapshots stay as they are.
+    """
+    return [message.to_data() if isinstance(message, TurnMessage) else message for message in messages]
+
+def restore_messages(entries: list, players: dict):
+    """
+    Converts the data of export_messages back to messages.
+    """
+    return [TurnMessage.from_data(entry, players) if isinstance(entry, dict) else entry for entry in entries]
+
+def _card_text(card, rendered=False):
+    if card is None:
+        return "a removed card"
+    return card.render() if rendered else str(card)
+
+ANSI_FORMATS = {
+    MessageKind.INVALID_MOVE: lambda message: f"{Color.RED}'{message.text}' is not a valid move.{Color.RESET}",
+    MessageKind.DELETED_CARD: lambda message: f"{Color.BG_RED}{Color.WHITE}DELETED {_card_text(message.card)}{Color.RESET}",
+    MessageKind.DREW_CARD: lambda message: f"{Color.CYAN}You drew {_card_text(message.card, True)} {Color.CYAN}from the stack.{Color.RESET}",
+    MessageKind.PLAYED_CARD: lambda message: f"{Color.GREEN}You played the card {_card_text(message.card)}",
+    MessageKind.WRONG_CARD: lambda message: f"{Color.RED}Your card {_card_text(message.card)} doesn't match the top card!{Color.RESET}",
+    MessageKind.JOKER_ACTION: lambda message: f"Action {_card_text(message.card, True)} {message.player.name} vs {message.other.name}",
+    MessageKind.GAVE_CARDS: lambda message: f"{Color.LIGHT_YELLOW}You generously gave {message.other.name} more cards!{Color.RESET}",
+    MessageKind.RECEIVED_CARDS: lambda message: "".join(f"{Color.CYAN}{message.player.name} gave u {_card_text(card, True)}{Color.CYAN} from the stack\n"
+                                                        for card in message.cards),
+    MessageKind.STILL_YOUR_TURN: lambda message: f"{Color.CYAN}Oh, it's still your turn, {message.player.name}!{Color.RESET}",
+    MessageKind.DIRECTION_REVERSED: lambda message: f"{Color.CYAN}Game direction has been reversed!{Color.RESET}",
+    MessageKind.WISHED_COLOR: lambda message: f"{Color.CYAN}{message.player.name} wished for {message.text}{Color.RESET}",
+    MessageKind.STACKED_DRAW: lambda message: (f"{Color.LIGHT_YELLOW}{message.player.name} stacked {_card_text(message.card, True)}"
+                                               f"{Color.LIGHT_YELLOW}, stack a draw card or draw the cards!{Color.RESET}"),
+    MessageKind.DREW_PENALTY: lambda message: (f"{Color.CYAN}You drew {', '.join(_card_text(card, True) for card in message.cards)} "
+                                               f"{Color.CYAN}from the stack.{Color.RESET}"),
+    MessageKind.SKIPPED_PLAYER: lambda message: f"{Color.CYAN}{message.other.name} has to sit this round out!{Color.RESET}",
+    MessageKind.TIMED_OUT: lambda message: f"{Color.LIGHT_YELLOW}{message.player.name} ran out of time.{Color.RESET}",
+}
+
+def format_ansi(message):
+    """
+    Formats a message for the terminal.
+
+    Args:
+        message (TurnMessage | str): The message, strings of older snapshots are returned as they are.
+
+    Returns:
+        str: The message with ANSI colors.
+    """
+    if isinstance(message, str):
+        return message
+    return ANSI_FORMATS[message.kind](message)
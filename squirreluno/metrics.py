@@ -0,0 +1,259 @@
+from __future__ import annotations
+from bisect import bisect_left
+from functools import wraps
+import os
+import time
+
+# upper bounds in seconds, from 10 microseconds to one second
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+ENV_SWITCH = "SQUIRRELUNO_METRICS"
+
+enabled = os.environ.get(ENV_SWITCH, "1") != "0"
+
+class Histogram:
+    """
+    Fixed bucket histogram of durations.
+
+    Observing is a bisect and two additions without a lock. Under concurrent
+    native threads an observation may get lost, which is fine for monitoring.
+    """
+    def __init__(self, name: str, documentation: str, buckets=DEFAULT_BUCKETS):
+        """
+        Initializes an empty histogram.
+
+        Args:
+            name (str): The metric name.
+            documentation (str): The HELP text.
+            buckets (tuple[float], optional): The sorted upper bounds of the buckets.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """
+        Records one value.
+
+        Args:
+            value (float): The duration in seconds.
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def render(self):
+        """
+        Returns the histogram in the Prometheus text format.
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        cumulative += self.counts[-1]
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f"{self.name}_sum {self.sum}")
+        lines.append(f"{self.name}_count {cumulative}")
+        return "\n".join(lines)
+
+    def snapshot(self):
+        """
+        Returns the current values, see MetricsRegistry.snapshot.
+        """
+        return {"type": "histogram", "documentation": self.documentation, "buckets": self.buckets,
+                "counts": list(self.counts), "sum": self.sum}
+
+    def merge(self, snapshot: dict):
+        """
+        Adds the values of a snapshot of a histogram with the same buckets.
+
+        Args:
+            snapshot (dict): The result of snapshot().
+        """
+        if tuple(snapshot["buckets"]) != self.buckets:
+            raise ValueError(f"Histogram {self.name} has other buckets")
+        self.counts = [count + other for count, other in zip(self.counts, snapshot["counts"])]
+        self.sum += snapshot["sum"]
+
+class Counter:
+    """
+    Monotonic counter.
+    """
+    def __init__(self, name: str, documentation: str):
+        """
+        Initializes the counter with zero.
+
+        Args:
+            name (str): The metric name, without the _total suffix.
+            documentation (str): The HELP text.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        """
+        Increments the counter.
+
+        Args:
+            amount (int, optional): The increment. Defaults to 1.
+        """
+        self.value += amount
+
+    def render(self):
+        """
+        Returns the counter in the Prometheus text format.
+        """
+        return (f"# HELP {self.name}_total {self.documentation}\n"
+                f"# TYPE {self.name}_total counter\n"
+                f"{self.name}_total {self.value}")
+
+    def snapshot(self):
+        """
+        Returns the current value, see MetricsRegistry.snapshot.
+        """
+        return {"type": "counter", "documentation": self.documentation, "value": self.value}
+
+    def merge(self, snapshot: dict):
+        """
+        Adds the value of a snapshot of a counter.
+
+        Args:
+            snapshot (dict): The result of snapshot().
+        """
+        self.value += snapshot["value"]
+
+class NullMetric:
+    """
+    Stand-in for every metric while instrumentation is switched off.
+    """
+    def observe(self, value: float):
+        pass
+
+    def inc(self, amount: int = 1):
+        pass
+
+class MetricsRegistry:
+    """
+    Collection of the metrics of one process.
+    """
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        """
+        Adds a metric, or returns the one already registered under its name.
+
+        Args:
+            metric (Histogram | Counter): The metric.
+
+        Returns:
+            Histogram | Counter: The registered metric.
+        """
+        return self.metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        """
+        Returns all metrics in the Prometheus text format.
+        """
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+    def snapshot(self):
+        """
+        Returns the current values of all metrics as plain data, e.g. to send them to another process.
+
+        Returns:
+            dict[str, dict]: The values per metric name.
+        """
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def merge(self, snapshot: dict):
+        """
+        Adds the values of a snapshot, metrics missing here are registered from it.
+
+        Args:
+            snapshot (dict[str, dict]): The result of snapshot(), e.g. of another process.
+        """
+        for name, values in snapshot.items():
+            metric = self.metrics.get(name)
+            if metric is None:
+                if values["type"] == "histogram":
+                    metric = self.register(Histogram(name, values["documentation"], values["buckets"]))
+                else:
+                    metric = self.register(Counter(name, values["documentation"]))
+            metric.merge(values)
+
+REGISTRY = MetricsRegistry()
+NULL_METRIC = NullMetric()
+
+def configure(enable: bool):
+    """
+    Switches the instrumentation on or off.
+
+    Must be called before the game modules are imported, because they create their
+    metrics and wrap their functions at import time. Worker processes started
+    afterwards inherit the setting through the environment.
+
+    Args:
+        enable (bool): False to make every metric a no-op.
+    """
+    global enabled
+    enabled = enable
+    os.environ[ENV_SWITCH] = "1" if enable else "0"
+
+def histogram(name: str, documentation: str, buckets=DEFAULT_BUCKETS):
+    """
+    Creates and registers a histogram, or a no-op stand-in if instrumentation is off.
+
+    Args:
+        name (str): The metric name.
+        documentation (str): The HELP text.
+        buckets (tuple[float], optional): The sorted upper bounds of the buckets.
+
+    Returns:
+        Histogram | NullMetric: The metric.
+    """
+    if not enabled:
+        return NULL_METRIC
+    return REGISTRY.register(Histogram(name, documentation, buckets))
+
+def counter(name: str, documentation: str):
+    """
+    Creates and registers a counter, or a no-op stand-in if instrumentation is off.
+
+    Args:
+        name (str): The metric name, without the _total suffix.
+        documentation (str): The HELP text.
+
+    Returns:
+        Counter | NullMetric: The metric.
+    """
+    if not enabled:
+        return NULL_METRIC
+    return REGISTRY.register(Counter(name, documentation))
+
+def timed(metric):
+    """
+    Decorator that records the duration of every call in a histogram.
+
+    With instrumentation switched off the function is returned unwrapped, so it
+    costs nothing.
+
+    Args:
+        metric (Histogram | NullMetric): The histogram to record in.
+    """
+    def decorate(function):
+        if metric is NULL_METRIC:
+            return function
+
+        @wraps(function)
+        def timed_function(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                metric.observe(time.perf_counter() - started)
+        return timed_function
+    return decorate
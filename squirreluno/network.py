@@ -0,0 +1,486 @@
+from flask import Flask, Response, render_template, request, jsonify
+from flask_socketio import SocketIO, send, emit
+from .utils import GameHost
+from .metrics import REGISTRY, histogram, timed
+from collections import deque
+from functools import partial
+import threading
+import signal
+import time
+import os
+
+DEFAULT_MAX_QUEUE = 64
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_SLOW_CLIENT_DEADLINE = 10.0
+SLOW_CLIENT_CHECK_INTERVAL = 1.0
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_WORKERS = 1000
+DEFAULT_GRACE_PERIOD = 30.0
+# from the process spawn, the imports of eventlet and Flask-SocketIO take most of it
+DEFAULT_STARTUP_BUDGET_MS = 1500
+SHUTDOWN_POLL_INTERVAL = 0.05
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# the import of this module, when the age of the process can't be read from /proc
+_IMPORTED_AT = time.monotonic()
+
+def process_age_ms():
+    """
+    Returns the time since the process was spawned, interpreter startup and imports included.
+
+    On Linux the start time comes from /proc, in clock ticks. Elsewhere the time
+    since this module was imported is returned, which misses the imports before.
+
+    Returns:
+        float: The age of the process in milliseconds.
+    """
+    try:
+        with open("/proc/self/stat") as stat_file:
+            # the command in parentheses may contain spaces, the fields after it don't
+            started_ticks = int(stat_file.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as uptime_file:
+            uptime = float(uptime_file.read().split()[0])
+        return (uptime - started_ticks / os.sysconf("SC_CLK_TCK")) * 1000
+    except (OSError, ValueError, IndexError):
+        return (time.monotonic() - _IMPORTED_AT) * 1000
+
+EMIT_SECONDS = histogram("squirreluno_emit_seconds", "Time per socket emit to a client.")
+
+class ClientChannel:
+    """
+    Bounded outbound buffer for a single socket connection.
+
+    Messages wait in the queue until the client acknowledged enough of the
+    messages already in flight. When the queue overflows, the pending deltas
+    are dropped and the channel switches to "snapshot required" mode: further
+    deltas are discarded until the client caught up and got a full snapshot.
+    """
+    def __init__(self, sid: str, max_queue: int, max_in_flight: int):
+        """
+        Initializes a channel for a connected client.
+
+        Args:
+            sid (str): The socket session id of the client.
+            max_queue (int): The maximum number of queued messages.
+            max_in_flight (int): The maximum number of unacknowledged messages.
+        """
+        self.sid = sid
+        self.max_queue = max_queue
+        self.max_in_flight = max_in_flight
+        self.queue = deque()
+        self.in_flight = 0
+        self.snapshot_required = False
+        self.slow_since = None
+        self.dropped = 0
+        self.__lock = threading.Lock()
+
+    def push(self, event: str, data):
+        """
+        Queues a message for the client.
+
+        Args:
+            event (str): The socket event name.
+            data: The payload of the event.
+
+        Returns:
+            bool: True if the message was queued, False if it was dropped.
+        """
+        with self.__lock:
+            if self.snapshot_required:
+                self.dropped += 1
+                return False
+            if len(self.queue) >= self.max_queue:
+                self.dropped += len(self.queue) + 1
+                self.queue.clear()
+                self.snapshot_required = True
+                self._update_slow_marker()
+                return False
+            self.queue.append((event, data))
+            return True
+
+    def pop_sendable(self):
+        """
+        Takes all messages that fit into the in-flight window.
+
+        Returns:
+            list[tuple[str, object]]: The messages to emit now.
+        """
+        with self.__lock:
+            batch = []
+            while self.queue and self.in_flight < self.max_in_flight:
+                batch.append(self.queue.popleft())
+                self.in_flight += 1
+            self._update_slow_marker()
+            return batch
+
+    def take_snapshot_slot(self):
+        """
+        Leaves "snapshot required" mode once every message in flight was acknowledged.
+
+        Returns:
+            bool: True if the caller has to send a snapshot now.
+        """
+        with self.__lock:
+            if not self.snapshot_required or self.in_flight > 0:
+                return False
+            self.snapshot_required = False
+            self.in_flight += 1
+            self._update_slow_marker()
+            return True
+
+    def acknowledge(self):
+        """
+        Marks one message in flight as received by the client.
+        """
+        with self.__lock:
+            if self.in_flight > 0:
+                self.in_flight -= 1
+            self._update_slow_marker()
+
+    def is_slow(self, now: float, deadline: float):
+        """
+        Checks if the client has been lagging behind for longer than the deadline.
+
+        Args:
+            now (float): The current monotonic time.
+            deadline (float): The allowed lag in seconds.
+
+        Returns:
+            bool: True if the client should be disconnected.
+        """
+        return self.slow_since is not None and now - self.slow_since > deadline
+
+    @property
+    def depth(self):
+        """
+        Returns the number of queued and unacknowledged messages.
+        """
+        return len(self.queue) + self.in_flight
+
+    def _update_slow_marker(self):
+        backlogged = self.snapshot_required or (self.queue and self.in_flight >= self.max_in_flight)
+        if not backlogged:
+            self.slow_since = None
+        elif self.slow_since is None:
+            self.slow_since = time.monotonic()
+
+class Networking(GameHost):
+    def __init__(self, port, *, max_queue=DEFAULT_MAX_QUEUE, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 slow_client_deadline=DEFAULT_SLOW_CLIENT_DEADLINE):
+        super().__init__()
+        self.__app = Flask(__name__)
+        self.__socketio = SocketIO(self.__app)
+        self.__port = port
+        self.__clients = {}
+        self.__shutdown_requested = threading.Event()
+        self.__turn_idle = threading.Event()
+        self.__turn_idle.set()
+        self.max_queue = max_queue
+        self.max_in_flight = max_in_flight
+        self.slow_client_deadline = slow_client_deadline
+
+        @self.__socketio.on("connect")
+        def on_connect(auth=None):
+            print(request.sid, "connected")
+            self.__clients[request.sid] = ClientChannel(request.sid, self.max_queue, self.max_in_flight)
+            self.client_connected(request.sid, auth)
+
+        @self.__socketio.on("disconnect")
+        def on_disconnect():
+            if self.__clients.pop(request.sid, None) is not None:
+                self.client_disconnected(request.sid)
+
+        @self.__app.route("/queues")
+        def queue_gauges():
+            return jsonify(self.queue_depth_gauges())
+
+        @self.__app.route("/metrics")
+        def prometheus_metrics():
+            return Response(self.metrics_registry().render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+    def on_event(self, event: str, handler):
+        """
+        Registers a handler for a socket event sent by clients.
+
+        The handler is called with the sid of the sending client and the event payload.
+
+        Args:
+            event (str): The socket event name.
+            handler (callable): The function handling the event.
+        """
+        @self.__socketio.on(event)
+        def on_client_event(data=None):
+            return handler(request.sid, data)
+
+    def test_client(self, auth=None):
+        """
+        Connects a Flask-SocketIO test client, e.g. to drive the socket handlers in tests.
+
+        Args:
+            auth (dict, optional): The authentication data sent with the connection.
+
+        Returns:
+            flask_socketio.SocketIOTestClient: The connected client.
+        """
+        return self.__socketio.test_client(self.__app, auth=auth)
+
+    def route(self, rule: str, view):
+        """
+        Registers an HTTP view next to the socket server.
+
+        The view is called with the query arguments and the URL variables of the rule,
+        its return value is sent as JSON, or as plain text if it is a string.
+
+        Args:
+            rule (str): The URL rule, e.g. "/stats/players/<name>".
+            view (callable): The function returning the response data.
+        """
+        def json_view(**kwargs):
+            result = view(request.args, **kwargs)
+            if isinstance(result, str):
+                return Response(result, content_type="text/plain; charset=utf-8")
+            return jsonify(result)
+        self.__app.add_url_rule(rule, endpoint=rule, view_func=json_view)
+
+    def client_connected(self, sid: str, auth=None):
+        """
+        overwrite function
+
+        Called after a client connected.
+
+        Args:
+            sid (str): The socket session id of the client.
+            auth (dict, optional): The authentication data sent with the connection.
+        """
+
+    def client_disconnected(self, sid: str):
+        """
+        overwrite function
+
+        Called after a client disconnected or was evicted.
+
+        Args:
+            sid (str): The socket session id of the client.
+        """
+
+    def send_to_client(self, sid: str, event: str, data=None):
+        """
+        Sends an event through the bounded queue of a client.
+
+        Args:
+            sid (str): The socket session id of the client.
+            event (str): The socket event name.
+            data: The payload of the event.
+
+        Returns:
+            bool: True if the event was queued, False if it was dropped.
+        """
+        channel = self.__clients.get(sid)
+        if channel is None:
+            return False
+        queued = channel.push(event, data)
+        self._flush_client(channel)
+        return queued
+
+    def broadcast(self, event: str, data=None):
+        """
+        Sends an event to every connected client.
+
+        Args:
+            event (str): The socket event name.
+            data: The payload of the event.
+        """
+        for sid in list(self.__clients):
+            self.send_to_client(sid, event, data)
+
+    def client_snapshot(self, sid: str):
+        """
+        overwrite function
+
+        Returns the full state a client needs after its deltas were dropped.
+
+        Args:
+            sid (str): The socket session id of the client.
+
+        Returns:
+            object: The snapshot payload, or None if there is nothing to resend.
+        """
+        return None
+
+    def metrics_registry(self):
+        """
+        overwrite function
+
+        Returns the metrics served on /metrics, e.g. merged with the metrics of other processes.
+
+        Returns:
+            MetricsRegistry: The metrics of this process by default.
+        """
+        return REGISTRY
+
+    def queue_depth_gauges(self):
+        """
+        Returns the outbound queue state of every connected client.
+
+        Returns:
+            dict[str, dict]: Queue depth, messages in flight, dropped messages and snapshot mode per sid.
+        """
+        return {sid: {"depth": channel.depth,
+                      "in_flight": channel.in_flight,
+                      "dropped": channel.dropped,
+                      "snapshot_required": channel.snapshot_required}
+                for sid, channel in list(self.__clients.items())}
+
+    def _flush_client(self, channel: ClientChannel):
+        """
+        Emits everything the in-flight window of a client allows.
+
+        Args:
+            channel (ClientChannel): The channel to flush.
+        """
+        ack = partial(self._on_client_ack, channel.sid)
+        for event, data in channel.pop_sendable():
+            self._emit(event, data, channel.sid, ack)
+        if channel.take_snapshot_slot():
+            self._emit("snapshot", self.client_snapshot(channel.sid), channel.sid, ack)
+
+    @timed(EMIT_SECONDS)
+    def _emit(self, event: str, data, sid: str, ack):
+        self.__socketio.emit(event, data, to=sid, callback=ack)
+
+    def _on_client_ack(self, sid: str, *args):
+        channel = self.__clients.get(sid)
+        if channel is None:
+            return
+        channel.acknowledge()
+        self._flush_client(channel)
+
+    def _watch_slow_clients(self):
+        """
+        Disconnects clients that stayed slow for longer than the configured deadline.
+        """
+        while True:
+            self.__socketio.sleep(SLOW_CLIENT_CHECK_INTERVAL)
+            now = time.monotonic()
+            for sid, channel in list(self.__clients.items()):
+                if channel.is_slow(now, self.slow_client_deadline):
+                    print(sid, "evicted as slow consumer")
+                    self.__clients.pop(sid, None)
+                    self.__socketio.server.disconnect(sid, namespace="/")
+                    self.client_disconnected(sid)
+
+    @property
+    def shutdown_requested(self):
+        """
+        Returns True once a graceful shutdown has begun and no new turns may start.
+        """
+        return self.__shutdown_requested.is_set()
+
+    def begin_turn(self):
+        """
+        Marks a turn as in flight, so a graceful shutdown waits for it.
+        """
+        self.__turn_idle.clear()
+
+    def end_turn(self):
+        """
+        Marks the turn in flight as finished.
+        """
+        self.__turn_idle.set()
+
+    @property
+    def turn_in_progress(self):
+        """
+        Returns True between begin_turn and end_turn.
+        """
+        return not self.__turn_idle.is_set()
+
+    def sleep(self, seconds: float = 0):
+        """
+        Sleeps in a way that is compatible with the async mode of the server.
+
+        Args:
+            seconds (float, optional): The time to sleep. Defaults to 0.
+        """
+        self.__socketio.sleep(seconds)
+
+    def start_background_task(self, target, *args, **kwargs):
+        """
+        Starts a background task using the async mode of the server.
+
+        Args:
+            target (callable): The function to run.
+
+        Returns:
+            object: A Thread compatible handle of the task.
+        """
+        return self.__socketio.start_background_task(target, *args, **kwargs)
+
+    def shutdown(self, grace_period: float = DEFAULT_GRACE_PERIOD):
+        """
+        Stops the server after the turn in flight has finished.
+
+        Args:
+            grace_period (float, optional): The maximum time to wait for the turn in seconds.
+        """
+        self.__shutdown_requested.set()
+        deadline = time.monotonic() + grace_period
+        while not self.__turn_idle.is_set() and time.monotonic() < deadline:
+            self.sleep(SHUTDOWN_POLL_INTERVAL)
+        if not self.__turn_idle.is_set():
+            print(f"Turn still in flight after {grace_period}s, stopping anyway")
+        self.server_stopping()
+        self.__socketio.stop()
+
+    def server_stopping(self):
+        """
+        overwrite function
+
+        Called during a graceful shutdown right before the server stops.
+        """
+
+    def start_server(self, host: str = DEFAULT_HOST, port: int = None, *, production=False,
+                     workers=DEFAULT_WORKERS, grace_period=DEFAULT_GRACE_PERIOD,
+                     startup_budget_ms=DEFAULT_STARTUP_BUDGET_MS):
+        """
+        Starts the socket server and blocks until it is stopped.
+
+        Without ``production`` the Werkzeug debugger and reloader are enabled.
+
+        Args:
+            host (str, optional): The address to listen on. Defaults to 127.0.0.1.
+            port (int, optional): The port to listen on. Defaults to the port passed at creation.
+            production (bool, optional): If True, serve with a plain eventlet WSGI server. Defaults to False.
+            workers (int, optional): The size of the eventlet green thread pool for connections.
+            grace_period (float, optional): The time in seconds to let a turn finish on shutdown.
+            startup_budget_ms (int, optional): The time allowed from the process spawn until connections are accepted.
+        """
+        port = self.__port if port is None else port
+        self.__socketio.start_background_task(self._watch_slow_clients)
+        if not production:
+            self.__socketio.run(self.__app, host=host, port=port, debug=True)
+            return
+
+        if self.__socketio.async_mode != "eventlet":
+            raise RuntimeError(f"Production mode requires eventlet, got async mode '{self.__socketio.async_mode}'")
+        import eventlet
+        import eventlet.wsgi
+
+        listener = eventlet.listen((host, port))
+        startup_ms = process_age_ms()
+        print(f"Accepting connections on {host}:{port} {startup_ms:.0f} ms after the process started")
+        if startup_ms > startup_budget_ms:
+            print(f"Startup took longer than the budget of {startup_budget_ms} ms")
+
+        def on_signal(signum, frame):
+            if not self.shutdown_requested:
+                self.start_background_task(self.shutdown, grace_period)
+
+        signal.signal(signal.SIGTERM, on_signal)
+        signal.signal(signal.SIGINT, on_signal)
+        try:
+            eventlet.wsgi.server(listener, self.__app, log_output=False, max_size=workers)
+        except SystemExit:
+            pass
+        finally:
+            listener.close()
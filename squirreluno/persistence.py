@@ -0,0 +1,288 @@
+from __future__ import annotations
+from sqlalchemy import (create_engine, event, MetaData, Table, Column, Index,
+                        Integer, String, Float, Boolean, ForeignKey)
+from .utils import get_native_threading
+import time
+import uuid
+
+DEFAULT_BATCH_ROWS = 500
+DEFAULT_FLUSH_INTERVAL_MS = 200
+DEFAULT_QUEUE_SIZE = 100000
+
+metadata = MetaData()
+
+games_table = Table(
+    "games", metadata,
+    Column("id", String(32), primary_key=True),
+    Column("winner_uid", String(8), nullable=False),
+    Column("winner_name", String(64), nullable=False),
+    Column("player_count", Integer, nullable=False),
+    Column("started_at", Float, nullable=False),
+    Column("finished_at", Float, nullable=False),
+    Column("duration_ms", Integer, nullable=False),
+    Index("ix_games_finished_at", "finished_at"),
+)
+
+game_players_table = Table(
+    "game_players", metadata,
+    Column("game_id", String(32), ForeignKey("games.id"), primary_key=True),
+    Column("player_uid", String(8), primary_key=True),
+    Column("name", String(64), nullable=False),
+    Column("game_position", Integer, nullable=False),
+    Column("won", Boolean, nullable=False),
+    Column("cards_left", Integer, nullable=False),
+    Column("cards_played", Integer, nullable=False),
+    Column("cards_drawn", Integer, nullable=False),
+    Column("finished_at", Float, nullable=False),
+    # "recent games of a player" is a range scan over this index
+    Index("ix_game_players_name_finished_at", "name", "finished_at"),
+)
+
+# aggregates per player name, updated in the same transaction as the results
+player_stats_table = Table(
+    "player_stats", metadata,
+    Column("name", String(64), primary_key=True),
+    Column("games", Integer, nullable=False),
+    Column("wins", Integer, nullable=False),
+    Column("cards_played", Integer, nullable=False),
+    Column("cards_drawn", Integer, nullable=False),
+    Column("total_duration_ms", Integer, nullable=False),
+    Column("last_game_at", Float, nullable=False),
+    # "top players" reads the first rows of this index
+    Index("ix_player_stats_wins_games", "wins", "games"),
+)
+
+class GameResult:
+    """
+    The outcome of one finished game, ready to be written as rows.
+    """
+    def __init__(self, winner_uid: str, winner_name: str, started_at: float, finished_at: float, players: list):
+        """
+        Initializes a result.
+
+        Args:
+            winner_uid (str): The UID of the winning player.
+            winner_name (str): The name of the winning player.
+            started_at (float): The unix time the game started.
+            finished_at (float): The unix time the game was won.
+            players (list[dict]): One dict per player with the columns of game_players.
+        """
+        self.game_id = uuid.uuid4().hex
+        self.winner_uid = winner_uid
+        self.winner_name = winner_name
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.players = players
+
+    def game_row(self):
+        return {"id": self.game_id,
+                "winner_uid": self.winner_uid,
+                "winner_name": self.winner_name,
+                "player_count": len(self.players),
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "duration_ms": int((self.finished_at - self.started_at) * 1000)}
+
+    def player_rows(self):
+        return [dict(player, game_id=self.game_id, finished_at=self.finished_at) for player in self.players]
+
+def create_database_engine(url: str, schema: MetaData = metadata):
+    """
+    Creates an engine and the result tables. SQLite databases are switched to WAL mode.
+
+    Args:
+        url (str): The SQLAlchemy database URL.
+        schema (MetaData, optional): The tables to create. Defaults to the result tables.
+
+    Returns:
+        sqlalchemy.engine.Engine: The engine.
+    """
+    engine = create_engine(url, future=True)
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+    schema.create_all(engine)
+    return engine
+
+class ResultWriter:
+    """
+    Write-behind queue for game results.
+
+    record() only puts the result on a queue, a background thread collects the
+    results and inserts them in one transaction every batch_rows rows or every
+    flush_interval_ms, whatever comes first. When the database falls so far behind
+    that the queue is full, results are dropped and counted instead of blocking
+    the game.
+    """
+    def __init__(self, engine, *, batch_rows=DEFAULT_BATCH_ROWS, flush_interval_ms=DEFAULT_FLUSH_INTERVAL_MS,
+                 queue_size=DEFAULT_QUEUE_SIZE):
+        """
+        Initializes the writer and starts its thread.
+
+        Args:
+            engine (sqlalchemy.engine.Engine): The engine, see create_database_engine.
+            batch_rows (int, optional): The number of rows that triggers a commit.
+            flush_interval_ms (int, optional): The longest time a result waits for its commit.
+            queue_size (int, optional): The number of results that may wait for the database.
+        """
+        self.engine = engine
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval_ms / 1000
+        self.dropped = 0
+        self.written_games = 0
+        self.written_rows = 0
+        self.commits = 0
+        self.commit_listeners = []
+        native_threading, native_queue = get_native_threading()
+        self.__empty = native_queue.Empty
+        self.__full = native_queue.Full
+        self.__queue = native_queue.Queue(maxsize=queue_size)
+        self.__thread = native_threading.Thread(target=self._run, name="result-writer", daemon=True)
+        self.__thread.start()
+
+    def record(self, result: GameResult):
+        """
+        Queues a result without waiting for the database.
+
+        Args:
+            result (GameResult): The result to write.
+
+        Returns:
+            bool: True if the result was queued, False if it was dropped.
+        """
+        try:
+            self.__queue.put_nowait(result)
+            return True
+        except self.__full:
+            self.dropped += 1
+            return False
+
+    def add_commit_listener(self, listener):
+        """
+        Registers a function that is called with the results of every commit.
+
+        The listener runs on the writer thread, e.g. to invalidate caches.
+
+        Args:
+            listener (callable): Called with the list of committed GameResult objects.
+        """
+        self.commit_listeners.append(listener)
+
+    def close(self, timeout: float = None):
+        """
+        Writes all queued results and stops the thread.
+
+        Args:
+            timeout (float, optional): The longest time to wait for the last commit.
+        """
+        self.__queue.put(None)
+        self.__thread.join(timeout)
+
+    @property
+    def pending(self):
+        """
+        Returns the number of results waiting for their commit.
+        """
+        return self.__queue.qsize()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            results = []
+            rows = 0
+            deadline = None
+            while rows < self.batch_rows:
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    result = self.__queue.get(timeout=timeout)
+                except self.__empty:
+                    break
+                if result is None:
+                    stopping = True
+                    break
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                results.append(result)
+                rows += 1 + len(result.players)
+            if results:
+                self._write(results)
+
+    def _write(self, results: list):
+        game_rows = [result.game_row() for result in results]
+        player_rows = [row for result in results for row in result.player_rows()]
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(games_table.insert(), game_rows)
+                connection.execute(game_players_table.insert(), player_rows)
+                update_player_stats(connection, aggregate_player_stats(results))
+        except Exception as error:
+            print(f"Could not write {len(results)} game results: {error}")
+            return
+        self.commits += 1
+        self.written_games += len(game_rows)
+        self.written_rows += len(game_rows) + len(player_rows)
+        for listener in self.commit_listeners:
+            try:
+                listener(results)
+            except Exception as error:
+                print(f"Commit listener failed after {len(results)} game results: {error}")
+
+def aggregate_player_stats(results: list):
+    """
+    Sums up the per-player columns of a batch of results.
+
+    Args:
+        results (list[GameResult]): The results of one batch.
+
+    Returns:
+        dict[str, dict]: The increments of player_stats per player name.
+    """
+    increments = {}
+    for result in results:
+        duration_ms = result.game_row()["duration_ms"]
+        for player in result.players:
+            stats = increments.setdefault(player["name"], {"name": player["name"], "games": 0, "wins": 0,
+                                                           "cards_played": 0, "cards_drawn": 0,
+                                                           "total_duration_ms": 0, "last_game_at": 0.0})
+            stats["games"] += 1
+            stats["wins"] += int(player["won"])
+            stats["cards_played"] += player["cards_played"]
+            stats["cards_drawn"] += player["cards_drawn"]
+            stats["total_duration_ms"] += duration_ms
+            stats["last_game_at"] = max(stats["last_game_at"], result.finished_at)
+    return increments
+
+def update_player_stats(connection, increments: dict):
+    """
+    Adds the increments to player_stats, creating missing rows.
+
+    Args:
+        connection (sqlalchemy.engine.Connection): The connection of the running transaction.
+        increments (dict[str, dict]): The result of aggregate_player_stats.
+    """
+    if not increments:
+        return
+    columns = player_stats_table.c
+    summed = ("games", "wins", "cards_played", "cards_drawn", "total_duration_ms")
+    if connection.dialect.name in ("sqlite", "postgresql"):
+        if connection.dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        statement = insert(player_stats_table)
+        updates = {name: columns[name] + statement.excluded[name] for name in summed}
+        updates["last_game_at"] = statement.excluded.last_game_at
+        connection.execute(statement.on_conflict_do_update(index_elements=[columns.name], set_=updates),
+                           list(increments.values()))
+        return
+
+    for name, increment in increments.items():
+        updates = {column: columns[column] + increment[column] for column in summed}
+        updates["last_game_at"] = increment["last_game_at"]
+        updated = connection.execute(player_stats_table.update().where(columns.name == name).values(**updates))
+        if updated.rowcount == 0:
+            connection.execute(player_stats_table.insert(), increment)
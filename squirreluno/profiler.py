@@ -0,0 +1,202 @@
+from __future__ import annotations
+from collections import Counter
+from .utils import get_native_threading, get_native_time
+import hmac
+import sys
+import time
+
+DEFAULT_SAMPLE_INTERVAL_MS = 5.0
+DEFAULT_MAX_OVERHEAD = 0.02
+DEFAULT_PROFILE_SECONDS = 10.0
+MAX_PROFILE_SECONDS = 120.0
+PROFILE_POLL_INTERVAL = 0.1
+# GIL switch interval while profiling, see RoomProfiler
+SAMPLING_SWITCH_INTERVAL = 0.00005
+
+_switch_interval_lock = get_native_threading()[0].Lock()
+_running_profilers = 0
+_saved_switch_interval = None
+
+class RoomProfiler:
+    """
+    Sampling profiler for the turns of one game.
+
+    A native thread wakes up every sample interval and looks at the stacks of all
+    threads. A stack is counted for the game while the game is inside a turn and
+    the stack runs one of its turn functions on this game, the turns of the other
+    rooms of a worker are not attributed to it. Under eventlet the stack of the hub
+    thread is the stack of the green thread that runs at that moment, so this also
+    works for games driven by green threads.
+
+    A turn holds the GIL, so by default the sampler would only get to look after
+    the switch interval of 5 ms, when short turns are long over. While a profile
+    runs the switch interval is lowered, so samples land inside the turns. The
+    switch interval applies to the whole process, every thread of it pays for the
+    more frequent switches while a profile runs; benchmarks/profiler_overhead.py
+    measures that together with the sampling.
+
+    The sampler measures its own cost and stretches the interval whenever it would
+    use more than max_overhead of the wall time.
+    """
+    def __init__(self, game, *, interval_ms: float = DEFAULT_SAMPLE_INTERVAL_MS,
+                 max_overhead: float = DEFAULT_MAX_OVERHEAD):
+        """
+        Initializes the profiler.
+
+        Args:
+            game (Game): The game to profile.
+            interval_ms (float, optional): The shortest time between two samples.
+            max_overhead (float, optional): The share of wall time the sampling may use.
+        """
+        self.game = game
+        self.interval = interval_ms / 1000
+        self.max_overhead = max_overhead
+        self.stacks = Counter()
+        self.samples = 0
+        self.ticks = 0
+        self.sampling_seconds = 0.0
+        self.wall_seconds = 0.0
+        self.__turn_codes = {type(game).apply_action.__code__, type(game).game_cycle.__code__}
+
+    def run(self, seconds: float):
+        """
+        Samples the game until the time is up. Blocks the calling thread.
+
+        Args:
+            seconds (float): The profiling time.
+
+        Returns:
+            dict: The report, see report().
+        """
+        own_thread = get_native_threading()[0].get_ident()
+        native_sleep = get_native_time().sleep
+        interval = self.interval
+        _lower_switch_interval()
+        try:
+            started = time.perf_counter()
+            deadline = started + seconds
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                self._sample(own_thread)
+                cost = time.perf_counter() - now
+                self.sampling_seconds += cost
+                self.ticks += 1
+                interval = max(self.interval, cost / self.max_overhead)
+                native_sleep(max(min(interval - cost, deadline - time.perf_counter()), 0))
+            self.wall_seconds = time.perf_counter() - started
+        finally:
+            _restore_switch_interval()
+        return self.report()
+
+    def _sample(self, own_thread: int):
+        if not self.game.turn_in_progress:
+            return
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            stack = []
+            in_turn = False
+            while frame is not None:
+                code = frame.f_code
+                in_turn = in_turn or (code in self.__turn_codes and frame.f_locals.get("self") is self.game)
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if in_turn:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def collapsed(self):
+        """
+        Returns the samples in the collapsed stack format of flamegraph.pl and speedscope.
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def report(self):
+        """
+        Returns the samples together with the measured overhead.
+        """
+        return {"samples": self.samples,
+                "ticks": self.ticks,
+                "wall_seconds": round(self.wall_seconds, 3),
+                "sampling_seconds": round(self.sampling_seconds, 6),
+                "overhead": round(self.sampling_seconds / self.wall_seconds, 5) if self.wall_seconds else 0.0,
+                "collapsed": self.collapsed()}
+
+def _lower_switch_interval():
+    global _running_profilers, _saved_switch_interval
+    with _switch_interval_lock:
+        if _running_profilers == 0:
+            _saved_switch_interval = sys.getswitchinterval()
+            sys.setswitchinterval(min(_saved_switch_interval, SAMPLING_SWITCH_INTERVAL))
+        _running_profilers += 1
+
+def _restore_switch_interval():
+    global _running_profilers
+    with _switch_interval_lock:
+        _running_profilers -= 1
+        if _running_profilers == 0:
+            sys.setswitchinterval(_saved_switch_interval)
+
+class ProfileRequest:
+    """
+    A profile that runs in the background until its report arrives.
+    """
+    def __init__(self):
+        self.report = None
+
+    @property
+    def done(self):
+        return self.report is not None
+
+def profile_in_background(game, seconds: float, **kwargs):
+    """
+    Profiles a game on a native thread.
+
+    Args:
+        game (Game): The game to profile.
+        seconds (float): The profiling time.
+        **kwargs: Further keyword arguments of the RoomProfiler.
+
+    Returns:
+        ProfileRequest: Gets its report when the profile is finished.
+    """
+    request = ProfileRequest()
+
+    def run():
+        request.report = RoomProfiler(game, **kwargs).run(seconds)
+
+    native_threading, _ = get_native_threading()
+    native_threading.Thread(target=run, name="room-profiler", daemon=True).start()
+    return request
+
+def register_profile_route(networking, admin_token: str, start_profile):
+    """
+    Adds the admin route /admin/profile to a server.
+
+    Query arguments: token, room, seconds, interval_ms and format. With
+    format=collapsed the stacks are sent as plain text for flamegraph tools,
+    otherwise the whole report is sent as JSON.
+
+    Args:
+        networking (Networking): The server to serve the route on.
+        admin_token (str): The token a request has to send.
+        start_profile (callable): Called with room id, seconds and interval in ms, returns a ProfileRequest.
+    """
+    def profile(args):
+        if not hmac.compare_digest(args.get("token", "").encode(), admin_token.encode()):
+            return {"error": "invalid admin token"}
+        seconds = min(args.get("seconds", DEFAULT_PROFILE_SECONDS, type=float), MAX_PROFILE_SECONDS)
+        interval_ms = args.get("interval_ms", DEFAULT_SAMPLE_INTERVAL_MS, type=float)
+        room_id = args.get("room")
+        request = start_profile(room_id, seconds, interval_ms)
+        deadline = time.monotonic() + seconds + 5
+        while not request.done and time.monotonic() < deadline:
+            networking.sleep(PROFILE_POLL_INTERVAL)
+        if not request.done:
+            return {"error": f"no profile of room {room_id} arrived"}
+        if "error" in request.report or args.get("format") != "collapsed":
+            return dict(request.report, room=room_id)
+        return request.report["collapsed"]
+    networking.route("/admin/profile", profile)
@@ -0,0 +1,271 @@
+from __future__ import annotations
+from .card_logic import CardKind, CardColor
+from .messages import MessageKind, TurnMessage
+from .decisions import COLOR_OPTIONS
+
+KIND_COUNT = len(CardKind)
+
+class HouseRules:
+    """
+    The optional rules a room is played with.
+
+    Games with the same house rules share one compiled RuleEngine, so the rules
+    must not be changed after a game was created with them.
+    """
+    NAMES = ("draw_stacking", "skip_cards", "jump_in")
+
+    def __init__(self, *, draw_stacking=False, skip_cards=False, jump_in=False):
+        """
+        Initializes the house rules, all of them are off by default.
+
+        Args:
+            draw_stacking (bool, optional): A draw card can be answered with another draw card, the last
+                player who can't stack draws all of the cards.
+            skip_cards (bool, optional): The deck gets a skip card per color, it skips the next player.
+            jump_in (bool, optional): A player can play a card identical to the top card out of turn
+                and continues from there.
+        """
+        self.draw_stacking = draw_stacking
+        self.skip_cards = skip_cards
+        self.jump_in = jump_in
+
+    @classmethod
+    def from_names(cls, names):
+        """
+        Creates house rules from the names of the enabled rules.
+
+        Args:
+            names (Iterable[str]): Names out of HouseRules.NAMES.
+
+        Returns:
+            HouseRules: The house rules.
+        """
+        names = set(names or ())
+        unknown = names.difference(cls.NAMES)
+        if unknown:
+            raise ValueError(f"Unknown house rules: {', '.join(sorted(unknown))}")
+        return cls(**{name: True for name in names})
+
+    def names(self):
+        """
+        Returns the names of the enabled rules, the plain data of the house rules.
+
+        Returns:
+            list[str]: The enabled rules.
+        """
+        return [name for name in self.NAMES if getattr(self, name)]
+
+    @property
+    def key(self):
+        """
+        Returns a hashable key of the house rules.
+        """
+        return tuple(getattr(self, name) for name in self.NAMES)
+
+def _same_color(top_card, card):
+    return (top_card.color is CardColor.NO_COLOR or card.color is CardColor.NO_COLOR
+            or top_card.color is card.color)
+
+def _same_color_or_number(top_card, card):
+    return top_card.number == card.number or _same_color(top_card, card)
+
+def _same_color_or_title(top_card, card):
+    return top_card.title == card.title or _same_color(top_card, card)
+
+def _stacks(top_card, card):
+    return True
+
+def _never(top_card, card):
+    return False
+
+def _no_effect(game, card, current_player, next_player):
+    return None, None
+
+def _joker_effect(game, card, current_player, next_player):
+    return TurnMessage(MessageKind.JOKER_ACTION, player=current_player, other=next_player,
+                       card=game.game_stack.last_added_card), None
+
+def _wish_color(game, card, current_player):
+    # the color is chosen later, the game continues with it in _resolve_color
+    held_colors = [held.color.value for held in current_player.hands.cards.values() if held is not card]
+    default = max(COLOR_OPTIONS, key=held_colors.count)
+    game.request_decision("color", current_player, COLOR_OPTIONS, default, card=card)
+
+def _draw_effect(game, card, current_player, next_player):
+    drawn = []
+    for _ in range(card.count + card.bonus):
+        drawn_card = game.take_top_card()
+        if drawn_card is None:
+            break
+        drawn_card.transfer_owner("draw", next_player.uid, forced=True, new_card=True)
+        drawn.append(drawn_card)
+    _wish_color(game, card, current_player)
+    return (TurnMessage(MessageKind.GAVE_CARDS, player=current_player, other=next_player),
+            TurnMessage(MessageKind.RECEIVED_CARDS, player=current_player, other=next_player, cards=tuple(drawn)))
+
+def _stacking_draw_effect(game, card, current_player, next_player):
+    # the cards are drawn by the first player who can't stack, see Game._draw_penalty
+    card.bonus = game.pending_draw
+    game.pending_draw = card.count + card.bonus
+    _wish_color(game, card, current_player)
+    return (TurnMessage(MessageKind.GAVE_CARDS, player=current_player, other=next_player),
+            TurnMessage(MessageKind.STACKED_DRAW, player=current_player, other=next_player, card=card))
+
+def _reverse_effect(game, card, current_player, next_player):
+    if len(game.players) == 2:
+        return TurnMessage(MessageKind.STILL_YOUR_TURN, player=current_player), None
+    game.game_direction = 1 if game.game_direction == -1 else -1
+    return TurnMessage(MessageKind.DIRECTION_REVERSED, player=current_player), None
+
+def _skip_effect(game, card, current_player, next_player):
+    game.skip_next = True
+    return TurnMessage(MessageKind.SKIPPED_PLAYER, player=current_player, other=next_player), None
+
+class RuleEngine:
+    """
+    The match rules and card effects of a set of house rules, compiled into tables.
+
+    Both tables are indexed with the integer KIND of the card classes: the match
+    table with top card kind times KIND_COUNT plus played card kind, the effect
+    table with the kind of the played card. A move costs one table lookup instead
+    of type checks in the card classes.
+    """
+    _compiled = {}
+
+    def __init__(self, house_rules: HouseRules):
+        """
+        Compiles the tables for the house rules.
+
+        Args:
+            house_rules (HouseRules): The house rules.
+        """
+        self.house_rules = house_rules
+        self.__match = tuple(self._match_rule(top_kind, card_kind)
+                             for top_kind in CardKind for card_kind in CardKind)
+        # while a stacked draw waits, only another draw card can be played
+        self.__stacked_match = tuple(_stacks if card_kind is CardKind.DRAW else _never
+                                     for _ in CardKind for card_kind in CardKind)
+        effects = {CardKind.NUMBER: _no_effect,
+                   CardKind.JOKER: _joker_effect,
+                   CardKind.DRAW: _stacking_draw_effect if house_rules.draw_stacking else _draw_effect,
+                   CardKind.REVERSE: _reverse_effect,
+                   CardKind.MARKER: _no_effect,
+                   CardKind.SKIP: _skip_effect}
+        self.__effects = tuple(effects[kind] for kind in CardKind)
+
+    @classmethod
+    def compile(cls, house_rules: HouseRules = None):
+        """
+        Returns the engine of the house rules, compiled once per process.
+
+        Args:
+            house_rules (HouseRules, optional): The house rules. Defaults to none of them.
+
+        Returns:
+            RuleEngine: The shared engine.
+        """
+        house_rules = house_rules if house_rules is not None else HouseRules()
+        engine = cls._compiled.get(house_rules.key)
+        if engine is None:
+            engine = cls._compiled[house_rules.key] = cls(house_rules)
+        return engine
+
+    @staticmethod
+    def _match_rule(top_kind: CardKind, card_kind: CardKind):
+        if top_kind is CardKind.NUMBER and card_kind is CardKind.NUMBER:
+            return _same_color_or_number
+        # the marker of a wished color only matches by its color
+        if top_kind is card_kind and top_kind is not CardKind.MARKER and top_kind is not CardKind.NUMBER:
+            return _same_color_or_title
+        return _same_color
+
+    def can_play(self, top_card, card, stacked_draw=False):
+        """
+        Checks if a card can be played on the top card.
+
+        Args:
+            top_card (Card): The top card of the game stack.
+            card (Card): The card to play.
+            stacked_draw (bool, optional): True while a stacked draw waits for the player.
+
+        Returns:
+            bool: True if the card can be played.
+        """
+        table = self.__stacked_match if stacked_draw else self.__match
+        return table[top_card.KIND * KIND_COUNT + card.KIND](top_card, card)
+
+    def apply_effect(self, game, card, current_player, next_player):
+        """
+        Executes the effect of a played card.
+
+        Args:
+            game (Game): The game.
+            card (Card): The played card.
+            current_player (Player): The current player.
+            next_player (Player): The next player.
+
+        Returns:
+            TurnMessage: Description of the action, None for the default message.
+            TurnMessage: Message for the next player, or None.
+        """
+        return self.__effects[card.KIND](game, card, current_player, next_player)
+
+    def playable(self, top_card, hand, stacked_draw=False):
+        """
+        Finds the cards of a hand that can be played on the top card, by the rules of can_play.
+
+        The candidates come from the match index of the hand, a few set unions
+        instead of a test per card.
+
+        Args:
+            top_card (Card): The top card of the game stack.
+            hand (Stack): The hand of the player.
+            stacked_draw (bool, optional): True while a stacked draw waits for the player.
+
+        Returns:
+            set[str]: The UIDs of the playable cards.
+        """
+        by_color, by_symbol = hand.match_index()
+        if stacked_draw:
+            return set().union(*(uids for (kind, _), uids in by_symbol.items() if kind is CardKind.DRAW))
+        if top_card.color is CardColor.NO_COLOR:
+            return set(hand.cards)
+        playable = by_color.get(top_card.color, set()) | by_color.get(CardColor.NO_COLOR, set())
+        # the marker of a wished color only matches by its color
+        if top_card.KIND is not CardKind.MARKER:
+            playable |= by_symbol.get((top_card.KIND, top_card.symbol), set())
+        return playable
+
+    def identical(self, top_card, hand):
+        """
+        Finds the cards of a hand that are identical to the top card, the cards to jump in with.
+
+        Args:
+            top_card (Card): The top card of the game stack.
+            hand (Stack): The hand of the player.
+
+        Returns:
+            set[str]: The UIDs of the identical cards.
+        """
+        if top_card.color is CardColor.NO_COLOR:
+            return set()
+        by_color, by_symbol = hand.match_index()
+        return by_color.get(top_card.color, set()) & by_symbol.get((top_card.KIND, top_card.symbol), set())
+
+    @staticmethod
+    def same_face(top_card, card):
+        """
+        Checks if a card is identical to the top card, the condition to jump in.
+
+        Args:
+            top_card (Card): The top card of the game stack.
+            card (Card): The card to play.
+
+        Returns:
+            bool: True if kind, color and number or title are the same.
+        """
+        if top_card.KIND is not card.KIND or top_card.color is not card.color or card.color is CardColor.NO_COLOR:
+            return False
+        if card.KIND is CardKind.NUMBER:
+            return top_card.number == card.number
+        return top_card.title == card.title
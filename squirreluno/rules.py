@@ -0,0 +1,1163 @@
+from __future__ import annotations
+from .card_logic import (CardType,
+                         CardKind,
+                         CardColor,
+                         Card,
+                         NumberCard,
+                         DrawCard,
+                         ReverseCard,
+                         SkipCard,
+                         MarkerCard,
+                         Stack,
+                         DeckTemplate)
+
+from .utils import UIDObject, GameHost, ComponentManager, Color
+from .terminal import TERMINAL
+from .messages import MessageKind, TurnMessage, export_messages, restore_messages, format_ansi
+from .decisions import PendingDecision, DEFAULT_DECISION_TIMEOUT
+from .rule_engine import HouseRules, RuleEngine
+from .metrics import histogram, counter, timed
+from functools import wraps
+import threading
+import random
+import time
+
+ACTION_SECONDS = histogram("squirreluno_player_action_seconds", "Time per Game.make_player_action.")
+RESHUFFLE_SECONDS = histogram("squirreluno_reshuffle_seconds", "Time per reshuffle of the played cards.")
+DRAWS = counter("squirreluno_draws", "Cards drawn by players.")
+PLAYS = counter("squirreluno_plays", "Cards played by players.")
+INVALID_ACTIONS = counter("squirreluno_invalid_actions", "Actions rejected as invalid or not matching.")
+RESHUFFLES = counter("squirreluno_reshuffles", "Reshuffles of the played cards into the draw stack.")
+
+def synchronized(method):
+    """
+    Runs a method of the game under the lock of the game.
+
+    Args:
+        method (callable): The method to wrap.
+
+    Returns:
+        callable: The wrapped method.
+    """
+    @wraps(method)
+    def locked_method(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return locked_method
+
+class Player(UIDObject):
+    """
+    Represents a player in the game.
+    """
+    def __init__(self, name:str, game_position:int):
+        """
+        Initializes a player with a name and game position.
+
+        Args:
+            name (str): The name of the player.
+            game_position (int): The position of the player in the game.
+        """
+        super().__init__()
+        self.name = name
+        self.game_position = game_position
+        self.hands = Stack(self.uid, {}, sorted_stack=True)
+        self.network_obj = None
+        self.cards_played = 0
+        self.cards_drawn = 0
+
+    @classmethod
+    def get_uid(cls, name: str):
+        """
+        Gets the UID of a player by name.
+
+        Args:
+            name (str): The name of the player.
+
+        Returns:
+            str: The UID of the player.
+        """
+        for uid, player_obj in ComponentManager.iterate_uid_objects(Player):
+            if player_obj.name == name:
+                return uid
+        raise ValueError(f"No match for Player: {name}")
+
+    def card_count(self):
+        """
+        Returns the count of cards in the player's hand.
+
+        Returns:
+            int: The number of cards in the player's hand.
+        """
+        return len(self.hands.cards)
+
+class Game(GameHost):
+    """
+    The rules of one game, without a server.
+
+    Simulators and room workers use the Game directly, it imports nothing of the
+    web stack. GameMaster adds the socket server on top.
+
+    Every game has its own reentrant lock. The entry points that change or read
+    the game from outside, like apply_action, decide and the snapshots, hold it,
+    so the game thread and the socket handlers never see a half applied turn.
+    The lock is created with the game, after eventlet patched threading, so it
+    is a green lock under eventlet and a native one otherwise. A terminal turn
+    doesn't hold it while it waits for input.
+    """
+    SNAPSHOT_ID = "game"
+    # the time a player has for a decision in the middle of an action, e.g. the color after a draw card
+    decision_timeout = DEFAULT_DECISION_TIMEOUT
+    # the cards dealt to every player at the start
+    cards_per_player = 7
+    # every started group of players gets another deck, so large tables don't run out of cards
+    players_per_deck = 6
+    # the draw stack gets refilled below this many cards, or one card per player at larger tables
+    min_refill_threshold = 10
+    # the screen of the terminal game, shared by all games of the process
+    terminal = TERMINAL
+    # the SpectatorChannel the table is published to after every turn, GameMaster opens one
+    spectators = None
+
+    def __init__(self, players: list, *, state: dict = None, result_writer=None, snapshotter=None,
+                 house_rules: HouseRules = None, **host_options):
+        """
+        Initializes the game with a list of players.
+
+        Args:
+            players (list): A list of player names.
+            state (dict, optional): A state returned by export_state to continue instead of dealing a new game.
+            result_writer (ResultWriter, optional): The write-behind queue finished games are recorded in.
+            snapshotter (Snapshotter, optional): Takes a snapshot of the game after every turn.
+            house_rules (HouseRules, optional): The house rules of the game. A restored game keeps its own.
+            **host_options: Keyword arguments of the host class, e.g. the port of a GameMaster.
+        """
+        super().__init__(**host_options)
+
+        self.lock = threading.RLock()
+        ComponentManager.register_component("game_master", self)
+        self.__legal_actions = {}
+        self.result_writer = result_writer
+        self.snapshotter = snapshotter
+        if state is not None:
+            self._restore_state(state)
+            return
+
+        self.rule_engine = RuleEngine.compile(house_rules)
+        self.house_rules = self.rule_engine.house_rules
+        self.players = self._init_players(players)
+        self.player_turn = next(iter(self.players))
+        template = self.deck_template(self.house_rules, self.decks_for(len(players)))
+        self.global_stack = Stack("global", template.instantiate("global"))
+        ComponentManager.register_component("global", self.global_stack)
+        self.draw_stack = Stack("draw", {})
+        ComponentManager.register_component("draw", self.draw_stack)
+        self.game_stack = Stack("game", {})
+        ComponentManager.register_component("game", self.game_stack)
+
+        self._initialize_game()
+
+        self.started_at = time.time()
+        self.game_direction = 1
+        self.game_active = True
+        self.last_user_action = None
+        self.drawn_this_turn = False
+        self.layed_this_turn = False
+        self.player_actions = []
+        self.messages_for_next_player = []
+        self.pending_decision = None
+        self.pending_draw = 0
+        self.skip_next = False
+
+    def _initialize_game(self):
+        """
+        Initializes the game by laying down the first card, dealing cards to players, and filling the draw stack.
+        """
+        self._lay_down_first_card()
+        self._give_players_cards()
+        self._fill_draw_stack()
+
+    def _lay_down_first_card(self):
+        """
+        Lays down the first card of the game.
+        """
+        while True:
+            random_card_uid = random.choice(list(self.global_stack.cards))
+            random_card_obj = ComponentManager.get_uid_object(random_card_uid)
+
+            if random_card_obj.card_type != CardType.JOKER:
+                random_card_obj.transfer_owner("global", "draw")
+                break
+
+    def _give_players_cards(self):
+        """
+        Deals cards to players at the start of the game.
+        """
+        for player in self.players.values():
+            for _ in range(self.cards_per_player):
+                self._transfer_random_card("global", player.uid)
+
+    def _fill_draw_stack(self):
+        """
+        Fills the draw stack with cards from the global stack.
+        """
+        cards_tuple = tuple(self.global_stack.cards.values())
+        for card in cards_tuple:
+            card.transfer_owner("global", "game")
+
+    def _transfer_random_card(self, from_stack: str, to_stack: str):
+        """
+        Transfers a random card from one stack to another.
+
+        The global stack is instantiated shuffled, so its top card is a random one
+        and dealing doesn't copy the stack for every card.
+
+        Args:
+            from_stack (str): The source stack.
+            to_stack (str): The destination stack.
+        """
+        self.global_stack.top_card().transfer_owner(from_stack, to_stack)
+
+    @classmethod
+    def decks_for(cls, player_count: int):
+        """
+        Returns the number of decks a table of players is dealt.
+
+        Args:
+            player_count (int): The number of players.
+
+        Returns:
+            int: One deck per started players_per_deck players.
+        """
+        return max(1, -(-player_count // cls.players_per_deck))
+
+    @classmethod
+    def deck_template(cls, house_rules: HouseRules = None, decks: int = 1):
+        """
+        Returns the deck template of the game class, built on first use.
+
+        Every subclass gets its own templates, so a subclass with other cards in
+        _create_cards is not dealt the deck of its parent. House rules that add
+        cards, like the skip cards, get a template of their own, so does every
+        number of decks.
+
+        Args:
+            house_rules (HouseRules, optional): The house rules of the game.
+            decks (int, optional): The number of decks, see decks_for. Defaults to 1.
+
+        Returns:
+            DeckTemplate: The template new games clone their cards from.
+        """
+        templates = cls.__dict__.get("_deck_templates")
+        if templates is None:
+            templates = cls._deck_templates = {}
+        skip_cards = house_rules is not None and house_rules.skip_cards
+        template = templates.get((skip_cards, decks))
+        if template is None:
+            template = templates[skip_cards, decks] = DeckTemplate(cls._create_cards(house_rules), decks)
+        return template
+
+    @classmethod
+    def _create_cards(cls, house_rules: HouseRules = None):
+        """
+        Creates the initial set of cards for the game.
+
+        Args:
+            house_rules (HouseRules, optional): The house rules, some of them add cards.
+
+        Returns:
+            dict[str, Card]: The created cards.
+        """
+        cards = {}
+        for color in CardColor:
+            if color == CardColor.NO_COLOR:
+                continue
+
+            for number in range(1, 10):
+                new_card = NumberCard(number, color)
+                new_card.owner = "global"
+                cards[new_card.uid] = new_card
+
+            cls._add_joker_cards(cards, color, house_rules)
+
+        return cards
+
+    @classmethod
+    def _add_joker_cards(cls, cards, color, house_rules: HouseRules = None):
+        """
+        Adds joker cards to the set of cards.
+
+        Args:
+            cards (dict[str, Card]): The set of cards.
+            color (CardColor): The color of the joker cards.
+            house_rules (HouseRules, optional): The house rules, some of them add cards.
+        """
+        draw_2 = DrawCard(color, "draw 2")
+        draw_2.owner = "global"
+        cards[draw_2.uid] = draw_2
+
+        draw_4 = DrawCard(color, "draw 4")
+        draw_4.owner = "global"
+        cards[draw_4.uid] = draw_4
+        
+        card_reverse = ReverseCard(color, "reverse")
+        card_reverse.owner = "global"
+        cards[card_reverse.uid] = card_reverse
+
+        draw_4_no_color = DrawCard(CardColor.NO_COLOR, "draw 4")
+        draw_4_no_color.owner = "global"
+        cards[draw_4_no_color.uid] = draw_4_no_color
+
+        if house_rules is not None and house_rules.skip_cards:
+            card_skip = SkipCard(color, "skip")
+            card_skip.owner = "global"
+            cards[card_skip.uid] = card_skip
+
+    def _init_players(self, players: list):
+        """
+        Initializes player objects.
+
+        Args:
+            players (list): A list of player names.
+
+        Returns:
+            dict[str, Player]: The created players.
+        """
+        created_players = {}
+        for index, player_name in enumerate(players):
+            new_player = Player(player_name, index)
+            created_players[new_player.uid] = new_player
+            ComponentManager.register_component(new_player.uid, new_player.hands)
+        return created_players
+
+    @classmethod
+    def from_state(cls, state: dict, **kwargs):
+        """
+        Creates a game that continues a game saved with export_state.
+
+        Args:
+            state (dict): The saved game state.
+            **kwargs: Further keyword arguments of the game class, e.g. the port of a GameMaster.
+
+        Returns:
+            Game: The restored game.
+        """
+        return cls([player["name"] for player in state["players"]], state=state, **kwargs)
+
+    @synchronized
+    def export_state(self):
+        """
+        Describes the whole game as plain data that can be pickled or stored.
+
+        Returns:
+            dict: The players, the cards of every stack and the turn state.
+        """
+        return {"players": [{"uid": player.uid, "name": player.name, "game_position": player.game_position,
+                             "cards_played": player.cards_played, "cards_drawn": player.cards_drawn}
+                            for player in self.players.values()],
+                "stacks": {stack.owner: [card.to_spec() for card in stack.cards.values()]
+                           for stack in self._iterate_stacks()},
+                "last_added_cards": {stack.owner: self._last_added_uid(stack) for stack in self._iterate_stacks()},
+                "player_turn": self.player_turn,
+                "started_at": self.started_at,
+                "game_direction": self.game_direction,
+                "game_active": self.game_active,
+                "last_user_action": self.last_user_action,
+                "drawn_this_turn": self.drawn_this_turn,
+                "layed_this_turn": self.layed_this_turn,
+                "player_actions": export_messages(self.player_actions),
+                "messages_for_next_player": export_messages(self.messages_for_next_player),
+                "pending_decision": self.pending_decision.to_data() if self.pending_decision is not None else None,
+                "pending_draw": self.pending_draw,
+                "skip_next": self.skip_next,
+                "house_rules": self.house_rules.names()}
+
+    @staticmethod
+    def _last_added_uid(stack: Stack):
+        card = stack.last_added_card
+        if card is None or card.uid not in stack.cards:
+            return None
+        return card.uid
+
+    def _restore_state(self, state: dict):
+        """
+        Rebuilds players, stacks and cards from a saved game state.
+
+        Args:
+            state (dict): The saved game state.
+        """
+        self.rule_engine = RuleEngine.compile(HouseRules.from_names(state.get("house_rules")))
+        self.house_rules = self.rule_engine.house_rules
+        self.players = {}
+        for player_state in state["players"]:
+            player = Player(player_state["name"], player_state["game_position"])
+            player._assign_uid(player_state["uid"])
+            player.hands.owner = player.uid
+            player.cards_played = player_state.get("cards_played", 0)
+            player.cards_drawn = player_state.get("cards_drawn", 0)
+            self.players[player.uid] = player
+            ComponentManager.register_component(player.uid, player.hands)
+
+        self.global_stack = Stack("global", {})
+        ComponentManager.register_component("global", self.global_stack)
+        self.draw_stack = Stack("draw", {})
+        ComponentManager.register_component("draw", self.draw_stack)
+        self.game_stack = Stack("game", {})
+        ComponentManager.register_component("game", self.game_stack)
+
+        for stack in self._iterate_stacks():
+            for card_spec in state["stacks"].get(stack.owner, ()):
+                card = Card.from_spec(card_spec)
+                stack.cards[card.uid] = card
+            last_added_uid = state["last_added_cards"].get(stack.owner)
+            stack.last_added_card = stack.cards.get(last_added_uid)
+
+        self.player_turn = state["player_turn"]
+        self.started_at = state.get("started_at", time.time())
+        self.game_direction = state["game_direction"]
+        self.game_active = state["game_active"]
+        self.last_user_action = state["last_user_action"]
+        self.drawn_this_turn = state["drawn_this_turn"]
+        self.layed_this_turn = state["layed_this_turn"]
+        self.player_actions = restore_messages(state["player_actions"], self.players)
+        self.messages_for_next_player = restore_messages(state["messages_for_next_player"], self.players)
+        pending_decision = state.get("pending_decision")
+        self.pending_decision = PendingDecision.from_data(pending_decision) if pending_decision is not None else None
+        self.pending_draw = state.get("pending_draw", 0)
+        self.skip_next = state.get("skip_next", False)
+
+    @synchronized
+    def player_snapshot(self, player: Player):
+        """
+        Describes everything a client needs to continue playing as the given player.
+
+        Cards are encoded as [uid, kind, color, number or title], the messages of the
+        turn as the plain data of TurnMessage.to_data, for the player whose turn it is.
+        The legal actions are those of legal_actions.
+
+        Args:
+            player (Player): The player the snapshot is for.
+
+        Returns:
+            dict: The hand of the player and the public table state.
+        """
+        top_card = self.game_stack.last_added_card
+        return {"player": player.uid,
+                "hand": [self._compact_card(card) for card in player.hands.cards.values()],
+                "top_card": self._compact_card(top_card) if top_card is not None else None,
+                "card_counts": {uid: other.card_count() for uid, other in self.players.items()},
+                "player_turn": self.player_turn,
+                "game_direction": self.game_direction,
+                "drawn_this_turn": self.drawn_this_turn,
+                "layed_this_turn": self.layed_this_turn,
+                "messages": export_messages(self.player_actions) if player.uid == self.player_turn else [],
+                "legal_actions": self.legal_actions(player),
+                "pending_decision": self.pending_decision.to_data() if self.pending_decision is not None else None}
+
+    @synchronized
+    def table_snapshot(self):
+        """
+        Describes the public table state, everything a spectator may see.
+
+        Returns:
+            dict: The top card, the card count per player, whose turn it is and the direction.
+        """
+        top_card = self.game_stack.last_added_card
+        return {"top_card": self._compact_card(top_card) if top_card is not None else None,
+                "players": [[uid, player.name, player.card_count()] for uid, player in self.players.items()],
+                "player_turn": self.player_turn,
+                "game_direction": self.game_direction,
+                "game_active": self.game_active}
+
+    @staticmethod
+    def _compact_card(card: Card):
+        value = card.number if isinstance(card, NumberCard) else card.title
+        return [card.uid, type(card).__name__, card.color.value, value]
+
+    def _iterate_stacks(self):
+        """
+        Yields every stack of the game, the shared ones first.
+        """
+        yield self.global_stack
+        yield self.draw_stack
+        yield self.game_stack
+        for player in self.players.values():
+            yield player.hands
+
+    @synchronized
+    def dispose(self):
+        """
+        Removes the game with its cards, stacks and players from the registries.
+
+        Must be called in the component scope the game was created in.
+        """
+        for stack in list(self._iterate_stacks()):
+            for card_uid in stack.cards:
+                UIDObject.remove(card_uid)
+            UIDObject.remove(stack.uid)
+            ComponentManager.delete_component(stack.owner)
+        for player_uid in self.players:
+            UIDObject.remove(player_uid)
+        ComponentManager.delete_component("game_master")
+        UIDObject.remove(self.uid)
+
+    def get_players_for_cycle(self):
+        """
+        Gets the current and next player for the game cycle.
+
+        Returns:
+            Player: The current player.
+            Player: The next player.
+        """
+        current_player = self.players[self.player_turn]
+        next_player_pos = self._get_next_player_position(current_player.game_position)
+        return current_player, self._player_at(next_player_pos)
+
+    def _get_next_player_position(self, current_position):
+        """
+        Gets the position of the next player based on the current position.
+
+        Args:
+            current_position (int): The current player's position.
+
+        Returns:
+            int: The next player's position.
+        """
+        next_position = (current_position + self.game_direction) % len(self.players)
+        return next_position
+
+    def show_winner(self, winner: Player):
+        """
+        Displays the winner of the game.
+
+        Args:
+            winner (Player): The winning player.
+        """
+        border = "#############################################################"
+        green_row = f"{Color.BG_GREEN}{' '*len(border)}{Color.RESET}"
+        win_str = f"{Color.DARK_GRAY}Player {Color.WHITE}{winner.name}{Color.DARK_GRAY} has conquered the game!{Color.RESET}"
+        self.terminal.render([f"{Color.ORANGE}{border}{Color.RESET}",
+                              *[green_row] * 6,
+                              f"{Color.BG_GREEN}{win_str}{Color.BG_GREEN}{' '*(3*(len(border)-len(win_str)))}{Color.RESET}",
+                              *[green_row] * 6,
+                              Color.RESET,
+                              f"{Color.ORANGE}{border}{Color.RESET}"], prompt_rows=2)
+        input(f"{Color.MAGENTA}Press Enter to bask in the glory of the victor!{Color.RESET}")
+
+    def show_censor_part(self, player: Player):
+        """
+        Displays a pause screen between player turns.
+
+        Args:
+            player (Player): The next player.
+        """
+        self.terminal.render([f"{Color.ORANGE}#############################################################{Color.RESET}",
+                              *[""] * 7,
+                              f"{Color.LIGHT_YELLOW}Next player, please step up: {Color.LIGHT_RED}{player.name}{Color.RESET}",
+                              *[""] * 7,
+                              f"{Color.ORANGE}#############################################################{Color.RESET}"],
+                             prompt_rows=2)
+        input(f"{Color.MAGENTA}Press Enter to continue the chaos!{Color.RESET}")
+
+    def show_current_player_deck(self, player: Player):
+        """
+        Displays the current player's deck and actions.
+
+        Args:
+            player (Player): The current player.
+
+        Returns:
+            str: The player's chosen action.
+        """
+        others_hands = self._get_others_hands(player)
+
+        self.terminal.render([f"{Color.ORANGE}=================================================={Color.RESET}",
+                              f"{Color.LIGHT_YELLOW}It's your turn, {Color.LIGHT_RED}{player.name}{Color.LIGHT_YELLOW}!{Color.RESET}",
+                              f"{Color.LIGHT_YELLOW}Top card on the stack:{Color.RESET} {self.game_stack.last_added_card}",
+                              f"{Color.LIGHT_YELLOW}Rival players' decks:{Color.RESET}\n{others_hands}",
+                              f"{Color.LIGHT_WHITE}Your cards:{Color.RESET}\n{player.hands}",
+                              "",
+                              *map(format_ansi, self.player_actions),
+                              ""], prompt_rows=6)
+
+        player_action = input(f"{Color.LIGHT_YELLOW}What will you do?\n"
+                              f"{Color.LIGHT_YELLOW}Type a number from {Color.LIGHT_RED}1{Color.LIGHT_YELLOW} to {Color.LIGHT_RED}{len(player.hands.cards)}{Color.LIGHT_YELLOW} for the corresponding card in your hand,\n{Color.RESET}"
+                              f"{Color.LIGHT_RED}draw{Color.LIGHT_YELLOW} to take a card, or {Color.LIGHT_RED}skip{Color.LIGHT_YELLOW} to pass your turn.\n{Color.RESET}"
+                              f"{Color.LIGHT_YELLOW}Choose wisely, {Color.LIGHT_RED}{player.name}{Color.LIGHT_YELLOW}...\nAction: {Color.LIGHT_CYAN}")
+        print(Color.RESET)
+        return player_action
+    
+    def _get_others_hands(self, player: Player):
+        """
+        Gets the hands of other players.
+
+        Args:
+            player (Player): The current player.
+
+        Returns:
+            str: A string representation of other players' hands.
+        """
+        others_hands = []
+        for other in self.players.values():
+            if other.uid != player.uid:
+                others_hands.append(f"  {other.name}: {other.card_count()} cards")
+            else:
+                others_hands.append(f"{Color.BOLD}>>{other.name}: {other.card_count()}{Color.BOLD} cards{Color.RESET}")
+                
+        lenght_player = len(others_hands)#
+        game_direction = self.game_direction
+        for index, line in enumerate(others_hands):
+            if index == 0 and game_direction == -1:
+                others_hands[index] = r"/\ " + others_hands[index]
+            elif index == lenght_player-1 and game_direction == 1:
+                others_hands[index] = r"\/ " + others_hands[index]
+            else:
+                others_hands[index] = r"|| " + others_hands[index]
+                
+        return "\n".join(others_hands) + "\n"
+
+    @timed(ACTION_SECONDS)
+    def make_player_action(self, current_player, next_player, action: str):
+        """
+        Makes the player's action.
+
+        Args:
+            current_player (Player): The current player.
+            next_player (Player): The next player.
+            action (str): The action chosen by the current player.
+        """
+        if action == "del":
+            card = self.game_stack.last_added_card
+            message = TurnMessage(MessageKind.DELETED_CARD, player=current_player, card=card)
+            self.player_actions.append(message)
+            self.messages_for_next_player.append(message)
+            self.game_stack.remove_card(card)
+            UIDObject.remove(card.uid)
+            self.last_user_action = "dell"
+            return
+        if action == "draw" and not (self.drawn_this_turn or self.layed_this_turn):
+            self._draw_card(current_player)
+            return
+        if action == "next" and (self.drawn_this_turn or self.layed_this_turn):
+            self.last_user_action = "next"
+            return
+        if action.isdecimal() and not self.layed_this_turn:
+            self._play_card_action(current_player, next_player, action)
+            return
+
+        self.last_user_action = f"Invalid action: {action}"
+        INVALID_ACTIONS.inc()
+        self.player_actions.append(TurnMessage(MessageKind.INVALID_MOVE, player=current_player, text=action))
+        
+    def _draw_card(self, current_player):
+        """
+        Draws a card for the current player, or the cards of a stacked draw.
+
+        Args:
+            current_player (Player): The current player.
+        """
+        if self.pending_draw > 0:
+            self._draw_penalty(current_player)
+            return
+        card = self.take_top_card()
+        if card is None:
+            raise ValueError("No card left to draw")
+        card.transfer_owner("draw", current_player.uid, new_card=True)
+        self.last_user_action = "draw"
+        self.drawn_this_turn = True
+        current_player.cards_drawn += 1
+        DRAWS.inc()
+        self.player_actions.append(TurnMessage(MessageKind.DREW_CARD, player=current_player, card=card))
+    
+    def take_top_card(self):
+        """
+        Returns the top card of the draw stack, the played cards are shuffled in when it is empty.
+
+        Returns:
+            Card: The top card, or None if no card is left to draw.
+        """
+        if len(self.draw_stack.cards) == 0 and len(self.game_stack.cards) > 1:
+            self._reshuffle_played_cards()
+        return self.draw_stack.top_card()
+
+    def can_draw(self):
+        """
+        Returns True if a draw would succeed: a stacked draw is due, or take_top_card finds a card.
+
+        With an empty draw stack a card can only come from the reshuffle of the
+        played cards, the top card and the markers of wished colors stay out of it.
+        """
+        if self.pending_draw > 0 or len(self.draw_stack.cards) > 0:
+            return True
+        top_card = self.game_stack.last_added_card
+        return any(card is not top_card and card.KIND is not CardKind.MARKER for card in self.game_stack.cards.values())
+
+    def _draw_penalty(self, current_player):
+        """
+        Draws the cards of the stacked draw cards for the player who couldn't stack.
+
+        Args:
+            current_player (Player): The current player.
+        """
+        drawn = []
+        for _ in range(self.pending_draw):
+            card = self.take_top_card()
+            if card is None:
+                break
+            card.transfer_owner("draw", current_player.uid, new_card=True)
+            drawn.append(card)
+        self.pending_draw = 0
+        self.last_user_action = "draw"
+        self.drawn_this_turn = True
+        current_player.cards_drawn += len(drawn)
+        DRAWS.inc(len(drawn))
+        self.player_actions.append(TurnMessage(MessageKind.DREW_PENALTY, player=current_player, cards=tuple(drawn)))
+
+    def _is_valid_card_to_play(self, game_card, player_card):
+        """
+        Checks if the player's card is valid to play, with the match table of the rule engine.
+
+        Args:
+            game_card (Card): The top card on the game stack.
+            player_card (Card): The card the player wants to play.
+
+        Returns:
+            bool: True if the card is valid to play, False otherwise.
+        """
+        return self.rule_engine.can_play(game_card, player_card, self.pending_draw > 0)
+
+    def _play_card_action(self, current_player, next_player, action):
+        """
+        Executes the action of playing a card.
+
+        Args:
+            current_player (Player): The current player.
+            next_player (Player): The next player.
+            action (str): The action chosen by the current player.
+        """
+        try:
+            index = int(action)
+        except ValueError:
+            self.last_user_action = "invalid"
+            INVALID_ACTIONS.inc()
+            self.player_actions.append(TurnMessage(MessageKind.INVALID_MOVE, player=current_player, text=action))
+            return
+
+        game_card = self.game_stack.last_added_card
+        player_card = current_player.hands.get_card_per_index(index - 1)
+        action_response = None
+        if self._is_valid_card_to_play(game_card, player_card):
+            action_response, next_player_response = self.rule_engine.apply_effect(self, player_card, current_player, next_player)
+            if next_player_response is not None:
+                self.messages_for_next_player.append(next_player_response)
+            player_card.transfer_owner(current_player.uid, "game")
+            self.last_user_action = "played-card"
+            current_player.cards_played += 1
+            PLAYS.inc()
+            if action_response is not None:
+                self.player_actions.append(action_response)
+            else:
+                self.player_actions.append(TurnMessage(MessageKind.PLAYED_CARD, player=current_player, card=player_card))
+            self.layed_this_turn = True
+        else:
+            self.last_user_action = "wrong-card"
+            INVALID_ACTIONS.inc()
+            self.player_actions.append(TurnMessage(MessageKind.WRONG_CARD, player=current_player, card=player_card))
+
+    def check_winner(self, show=True):
+        """
+        Checks if there is a winner and ends the game with the result recorded.
+
+        Args:
+            show (bool, optional): If True, the winner screen is displayed. Defaults to True.
+
+        Returns:
+            Player: The winning player if there is a winner, None otherwise.
+        """
+        for uid, player in self.players.items():
+            if len(player.hands.cards) == 0:
+                if self.game_active:
+                    self.game_active = False
+                    # nobody waits for the wish of a finished game
+                    self.pending_decision = None
+                    self._record_result(player)
+                    self.turn_changed()
+                if show:
+                    self.show_winner(player)
+                return player
+        return None
+
+    def _record_result(self, winner: Player):
+        """
+        Hands the result of the game to the write-behind queue, never waits for the database.
+
+        Args:
+            winner (Player): The winning player.
+        """
+        if self.result_writer is None:
+            return
+        from .persistence import GameResult
+
+        players = [{"player_uid": player.uid,
+                    "name": player.name,
+                    "game_position": player.game_position,
+                    "won": player is winner,
+                    "cards_left": player.card_count(),
+                    "cards_played": player.cards_played,
+                    "cards_drawn": player.cards_drawn}
+                   for player in self.players.values()]
+        self.result_writer.record(GameResult(winner.uid, winner.name, self.started_at, time.time(), players))
+
+    def game_cycle(self, first_round):
+        """
+        Executes a game cycle.
+
+        Args:
+            first_round (bool): If True, this is the first round of the game.
+        """
+        current_player, next_player = self.get_players_for_cycle()
+        if first_round:
+            self.show_censor_part(current_player)
+        player_action = self.show_current_player_deck(current_player)
+        self.begin_turn()
+        try:
+            with self.lock:
+                self.make_player_action(current_player, next_player, player_action)
+            # decide takes the lock itself, the prompt must not hold it
+            while self.pending_decision is not None:
+                self._decide_in_terminal(self.pending_decision)
+            with self.lock:
+                self._finish_turn(current_player, next_player)
+        finally:
+            self.end_turn()
+        with self.lock:
+            winner = self.check_winner(show=False)
+            self._capture_snapshot()
+        if winner is not None:
+            self.show_winner(winner)
+            return
+        if self.last_user_action == "next":
+            self.show_censor_part(next_player)
+
+    def _finish_turn(self, current_player, next_player):
+        """
+        Hands the turn to the next player once the current player typed "next".
+
+        Args:
+            current_player (Player): The current player.
+            next_player (Player): The next player.
+        """
+        if self.last_user_action == "next" and (self.drawn_this_turn or self.layed_this_turn):
+            if self.skip_next:
+                self.skip_next = False
+                next_player = self._player_at(self._get_next_player_position(next_player.game_position))
+            self._hand_turn_to(current_player, next_player)
+
+    def _hand_turn_to(self, current_player, player):
+        """
+        Ends the turn of the current player and gives the turn to another player.
+
+        Args:
+            current_player (Player): The current player.
+            player (Player): The player who continues.
+        """
+        current_player.hands.clear_new_flag()
+        self.drawn_this_turn = False
+        self.layed_this_turn = False
+        self.player_actions.clear()
+        self.player_actions.extend(self.messages_for_next_player)
+        self.messages_for_next_player.clear()
+        self.player_turn = player.uid
+        self.turn_changed()
+
+    def _player_at(self, position: int):
+        return next(player_obj for player_obj in self.players.values() if player_obj.game_position == position)
+
+    def _jump_in(self, player_uid: str, action: str):
+        """
+        Gives the turn to a player who plays a card identical to the top card out of turn.
+
+        Args:
+            player_uid (str): The UID of the player sending the action.
+            action (str): The action, a jump in is the index of a card.
+
+        Returns:
+            bool: True if the player jumped in and has the turn now.
+        """
+        if not self.house_rules.jump_in or self.pending_draw > 0 or not action.isdecimal():
+            return False
+        player = self.players.get(player_uid)
+        if player is None or not 1 <= int(action) <= len(player.hands.cards):
+            return False
+        card = player.hands.get_card_per_index(int(action) - 1)
+        if not self.rule_engine.same_face(self.game_stack.last_added_card, card):
+            return False
+        self._hand_turn_to(self.players[self.player_turn], player)
+        return True
+
+    @synchronized
+    def apply_action(self, player_uid: str, action: str):
+        """
+        Applies the action of a remote player without using the terminal.
+
+        Args:
+            player_uid (str): The UID of the player sending the action.
+            action (str): The action, as typed in the terminal game.
+
+        Returns:
+            str: The resulting last_user_action.
+        """
+        if not self.game_active:
+            raise ValueError("The game is over")
+        if self.pending_decision is not None:
+            raise ValueError(f"Waiting for player {self.pending_decision.player_uid} to choose a {self.pending_decision.kind}")
+        if player_uid != self.player_turn and not self._jump_in(player_uid, action):
+            raise ValueError(f"It's not the turn of player {player_uid}")
+        self._refill_draw_stack()
+        current_player, next_player = self.get_players_for_cycle()
+        self.begin_turn()
+        try:
+            self.last_user_action = None
+            self.make_player_action(current_player, next_player, action)
+            self._finish_turn(current_player, next_player)
+        finally:
+            self.end_turn()
+        self.check_winner(show=False)
+        self._capture_snapshot()
+        return self.last_user_action
+
+    def request_decision(self, kind: str, player: Player, options: tuple, default: str, *, card: Card = None):
+        """
+        Suspends the running action until the player made a choice.
+
+        Args:
+            kind (str): What is chosen, the game continues with its _resolve_<kind> method.
+            player (Player): The player who decides.
+            options (tuple[str]): The valid choices.
+            default (str): The choice taken when the player misses the deadline.
+            card (Card, optional): The card that asked for the decision.
+        """
+        if self.pending_decision is not None:
+            raise ValueError(f"Player {self.pending_decision.player_uid} still has to choose a {self.pending_decision.kind}")
+        self.pending_decision = PendingDecision(kind, player.uid, options, default, time.time() + self.decision_timeout,
+                                                card.uid if card is not None else None)
+
+    @synchronized
+    def decide(self, player_uid: str, choice: str):
+        """
+        Continues the suspended action with the choice of the player.
+
+        Args:
+            player_uid (str): The UID of the player sending the choice.
+            choice (str): One of the options of the pending decision.
+
+        Returns:
+            str: The choice.
+        """
+        decision = self.pending_decision
+        if decision is None:
+            raise ValueError("There is no decision to make")
+        if player_uid != decision.player_uid:
+            raise ValueError(f"It's not the decision of player {player_uid}")
+        if choice not in decision.options:
+            raise ValueError(f"'{choice}' is not a valid {decision.kind}")
+        self.begin_turn()
+        try:
+            self.pending_decision = None
+            getattr(self, f"_resolve_{decision.kind}")(decision, choice)
+        finally:
+            self.end_turn()
+        self._capture_snapshot()
+        return choice
+
+    @synchronized
+    def expire_decision(self, now: float = None):
+        """
+        Takes the default of the pending decision once its deadline has passed.
+
+        Args:
+            now (float, optional): The current wall clock time. Defaults to time.time().
+
+        Returns:
+            bool: True if the default was taken.
+        """
+        decision = self.pending_decision
+        if decision is None or not decision.is_expired(now):
+            return False
+        self.decide(decision.player_uid, decision.default)
+        return True
+
+    @synchronized
+    def expire_turn(self, player_uid: str):
+        """
+        Ends the turn of a player who missed its deadline.
+
+        A pending decision gets its default, then the player draws, unless they
+        already drew or played a card, and the turn is handed on. With nothing
+        left to draw the turn is handed on without a card.
+
+        Args:
+            player_uid (str): The UID of the player whose deadline passed.
+
+        Returns:
+            bool: False if the player doesn't have the turn anymore, e.g. acted just before the deadline.
+        """
+        if not self.game_active or self.player_turn != player_uid:
+            return False
+        decision = self.pending_decision
+        if decision is not None:
+            self.decide(decision.player_uid, decision.default)
+        message = TurnMessage(MessageKind.TIMED_OUT, player=self.players[player_uid])
+        if not (self.drawn_this_turn or self.layed_this_turn):
+            try:
+                self.apply_action(player_uid, "draw")
+            except ValueError:
+                # no card left to draw
+                self.drawn_this_turn = True
+        if self.game_active and self.player_turn == player_uid:
+            self.messages_for_next_player.append(message)
+            self.apply_action(player_uid, "next")
+        return True
+
+    def _resolve_color(self, decision: PendingDecision, choice: str):
+        """
+        Marks the wished color of a draw card on the game stack.
+
+        Args:
+            decision (PendingDecision): The decision of the draw card.
+            choice (str): The wished color.
+        """
+        card = UIDObject.get(decision.card_uid)
+        MarkerCard.place_marker(choice, card.title)
+        player = self.players[decision.player_uid]
+        message = TurnMessage(MessageKind.WISHED_COLOR, player=player, text=choice)
+        self.player_actions.append(message)
+        self.messages_for_next_player.append(message)
+
+    def _decide_in_terminal(self, decision: PendingDecision):
+        """
+        Asks the player of the terminal game for a decision, there is nobody else to wait for.
+
+        Args:
+            decision (PendingDecision): The pending decision.
+        """
+        choice = input(f"pick a {decision.kind}: ")
+        if choice in decision.options:
+            self.decide(decision.player_uid, choice)
+
+    @synchronized
+    def legal_actions(self, player: Player):
+        """
+        Lists every action the player can take right now.
+
+        The playable cards come from the match index of the hand, and the result is
+        cached per player until the hand, the game stack or the turn state changes.
+        The returned dict is shared with the cache and must not be changed.
+
+        Args:
+            player (Player): The player.
+
+        Returns:
+            dict: "cards" with the playable hand indices as typed (starting with 1), "draw" and
+                "next" if those actions are available, and "choose" with the options of a decision
+                the player has to make.
+        """
+        can_draw = self.can_draw()
+        key = (player.hands.version, self.game_stack.version, self.player_turn, self.drawn_this_turn,
+               self.layed_this_turn, self.pending_draw, self.pending_decision, self.game_active, can_draw)
+        cached = self.__legal_actions.get(player.uid)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        playable = ()
+        may_draw = may_end = False
+        choose = []
+        top_card = self.game_stack.last_added_card
+        if not self.game_active:
+            pass
+        elif self.pending_decision is not None:
+            if self.pending_decision.player_uid == player.uid:
+                choose = list(self.pending_decision.options)
+        elif player.uid == self.player_turn:
+            if not self.layed_this_turn:
+                playable = self.rule_engine.playable(top_card, player.hands, self.pending_draw > 0)
+            may_draw = can_draw and not (self.drawn_this_turn or self.layed_this_turn)
+            may_end = self.drawn_this_turn or self.layed_this_turn
+        elif self.house_rules.jump_in and self.pending_draw == 0:
+            playable = self.rule_engine.identical(top_card, player.hands)
+
+        actions = {"cards": [index for index, uid in enumerate(player.hands.cards, start=1) if uid in playable],
+                   "draw": may_draw,
+                   "next": may_end,
+                   "choose": choose}
+        self.__legal_actions[player.uid] = (key, actions)
+        return actions
+
+    def _capture_snapshot(self):
+        """
+        Hands the state after a turn to the snapshotter, a finished game loses its snapshot.
+
+        The spectators get a frame of the public table state.
+        """
+        if self.spectators is not None:
+            self.spectators.publish(self.table_snapshot())
+        if self.snapshotter is None:
+            return
+        if self.game_active:
+            self.snapshotter.capture(self.SNAPSHOT_ID, self.export_state())
+        else:
+            self.snapshotter.discard(self.SNAPSHOT_ID)
+
+    def start_game(self):
+        """
+        Starts the game.
+        """
+        first_round = True
+        while self.game_active and not self.shutdown_requested:
+            with self.lock:
+                self.last_user_action = None
+                self._refill_draw_stack()
+            self.game_cycle(first_round)
+            first_round = False
+
+    @property
+    def refill_threshold(self):
+        """
+        The size below which the draw stack gets refilled, enough cards for a round of draws.
+        """
+        return max(self.min_refill_threshold, len(self.players))
+
+    def _refill_draw_stack(self):
+        """
+        Shuffles the played cards back into the draw stack when it runs low.
+
+        At a large table most cards are in the hands, so the reshuffle waits until
+        the game stack holds more cards than the threshold instead of moving a few
+        cards every turn. An empty draw stack is refilled by take_top_card.
+        """
+        threshold = self.refill_threshold
+        if len(self.draw_stack.cards) < threshold and len(self.game_stack.cards) > threshold:
+            self._reshuffle_played_cards()
+
+    @timed(RESHUFFLE_SECONDS)
+    def _reshuffle_played_cards(self):
+        """
+        Moves all cards of the game stack but the top card shuffled to the draw stack.
+
+        The markers of wished colors are no cards of the deck, they are removed
+        instead of being dealt to the players.
+        """
+        RESHUFFLES.inc()
+        first_card = self.game_stack.last_added_card
+        self.game_stack.shuffle_deck()
+        card_tuples = [(uid, card) for uid, card in self.game_stack.cards.items()]
+        for uid, card in card_tuples:
+            if card.KIND is CardKind.MARKER and card is not first_card:
+                self.game_stack.remove_card(card)
+                UIDObject.remove(uid)
+                continue
+            if card.KIND is CardKind.DRAW:
+                # the stacked bonus belonged to the last time the card was played
+                card.bonus = 0
+            card.transfer_owner("game", "draw")
+        first_card.transfer_owner("draw", "game")
+        self.game_stack.last_added_card = first_card
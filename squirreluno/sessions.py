@@ -0,0 +1,142 @@
+from __future__ import annotations
+import secrets
+import time
+
+DEFAULT_SEAT_GRACE_PERIOD = 60.0
+
+class Session:
+    """
+    Binds a reconnect token to the player seat it was issued for.
+    """
+    def __init__(self, token: str, player_uid: str, sid: str):
+        """
+        Initializes a session for a connected client.
+
+        Args:
+            token (str): The secret the client presents to resume the session.
+            player_uid (str): The UID of the player the seat belongs to.
+            sid (str): The socket session id of the current connection.
+        """
+        self.token = token
+        self.player_uid = player_uid
+        self.sid = sid
+        self.disconnected_at = None
+
+    def is_expired(self, now: float, grace_period: float):
+        """
+        Checks if the seat was left for longer than the grace period.
+
+        Args:
+            now (float): The current monotonic time.
+            grace_period (float): The time a seat is held after a disconnect.
+
+        Returns:
+            bool: True if the session can no longer be resumed.
+        """
+        return self.disconnected_at is not None and now - self.disconnected_at > grace_period
+
+class SessionRegistry:
+    """
+    Keeps track of which connection holds which player seat.
+
+    A seat stays reserved for the grace period after its connection dropped, so
+    the player can resume with the token without anybody else taking the seat.
+    Expired sessions are cleaned up lazily whenever a seat is looked up.
+    """
+    def __init__(self, grace_period: float = DEFAULT_SEAT_GRACE_PERIOD):
+        """
+        Initializes an empty registry.
+
+        Args:
+            grace_period (float, optional): The time in seconds a seat is held after a disconnect.
+        """
+        self.grace_period = grace_period
+        self._by_token = {}
+        self._by_player = {}
+        self._by_sid = {}
+
+    def issue(self, player_uid: str, sid: str):
+        """
+        Creates a new session for a free seat.
+
+        Args:
+            player_uid (str): The UID of the player.
+            sid (str): The socket session id of the connection.
+
+        Returns:
+            Session: The new session.
+        """
+        if self.seat_held(player_uid):
+            raise ValueError(f"Seat of player {player_uid} is already taken")
+        session = Session(secrets.token_urlsafe(16), player_uid, sid)
+        self._by_token[session.token] = session
+        self._by_player[player_uid] = session
+        self._by_sid[sid] = session
+        return session
+
+    def resume(self, token: str, sid: str):
+        """
+        Moves a session to a new connection.
+
+        Args:
+            token (str): The token of the session.
+            sid (str): The socket session id of the new connection.
+
+        Returns:
+            Session: The resumed session, or None if the token is unknown or expired.
+        """
+        session = self._by_token.get(token)
+        if session is None or self._drop_if_expired(session):
+            return None
+        self._by_sid.pop(session.sid, None)
+        session.sid = sid
+        session.disconnected_at = None
+        self._by_sid[sid] = session
+        return session
+
+    def detach(self, sid: str):
+        """
+        Marks the session of a dropped connection as waiting for a reconnect.
+
+        Args:
+            sid (str): The socket session id of the dropped connection.
+
+        Returns:
+            Session: The detached session, or None if the connection held no seat.
+        """
+        session = self._by_sid.pop(sid, None)
+        if session is not None:
+            session.disconnected_at = time.monotonic()
+        return session
+
+    def get_by_sid(self, sid: str):
+        """
+        Gets the session of a connection.
+
+        Args:
+            sid (str): The socket session id.
+
+        Returns:
+            Session: The session, or None if the connection holds no seat.
+        """
+        return self._by_sid.get(sid)
+
+    def seat_held(self, player_uid: str):
+        """
+        Checks if a seat is connected or still within its grace period.
+
+        Args:
+            player_uid (str): The UID of the player.
+
+        Returns:
+            bool: True if nobody else may claim the seat.
+        """
+        session = self._by_player.get(player_uid)
+        return session is not None and not self._drop_if_expired(session)
+
+    def _drop_if_expired(self, session: Session):
+        if not session.is_expired(time.monotonic(), self.grace_period):
+            return False
+        del self._by_token[session.token]
+        del self._by_player[session.player_uid]
+        return True
@@ -0,0 +1,499 @@
+from __future__ import annotations
+from .metrics import REGISTRY, MetricsRegistry
+from .network import Networking
+from .profiler import ProfileRequest
+from .sessions import SessionRegistry, DEFAULT_SEAT_GRACE_PERIOD
+from .worker import send_message, recv_message
+from bisect import bisect
+import subprocess
+import threading
+import tempfile
+import hashlib
+import socket
+import time
+import sys
+import os
+
+HASH_REPLICAS = 64
+WORKER_START_TIMEOUT = 10.0
+WORKER_CHECK_INTERVAL = 1.0
+
+class ConsistentHashRing:
+    """
+    Maps keys to nodes so that adding or removing a node only moves the keys of that node.
+    """
+    def __init__(self, nodes=(), replicas: int = HASH_REPLICAS):
+        """
+        Initializes the ring with a set of nodes.
+
+        Args:
+            nodes (iterable[str], optional): The initial nodes.
+            replicas (int, optional): The number of virtual points per node.
+        """
+        self.replicas = replicas
+        self._points = []
+        self._owners = {}
+        for node in nodes:
+            self.add_node(node)
+
+    @staticmethod
+    def _hash(key: str):
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+    def add_node(self, node: str):
+        """
+        Adds a node with all of its virtual points.
+
+        Args:
+            node (str): The node to add.
+        """
+        for replica in range(self.replicas):
+            point = self._hash(f"{node}#{replica}")
+            self._owners[point] = node
+        self._points = sorted(self._owners)
+
+    def remove_node(self, node: str):
+        """
+        Removes a node, its keys move to the following nodes on the ring.
+
+        Args:
+            node (str): The node to remove.
+        """
+        self._owners = {point: owner for point, owner in self._owners.items() if owner != node}
+        self._points = sorted(self._owners)
+
+    def get_node(self, key: str):
+        """
+        Gets the node responsible for a key.
+
+        Args:
+            key (str): The key, e.g. a room id.
+
+        Returns:
+            str: The node owning the key.
+        """
+        if not self._points:
+            raise LookupError("The hash ring has no nodes")
+        index = bisect(self._points, self._hash(key)) % len(self._points)
+        return self._owners[self._points[index]]
+
+class WorkerHandle:
+    """
+    Router side handle of one worker process.
+    """
+    def __init__(self, node: str, socket_dir: str, database_url: str = None, turn_timeout: float = None):
+        """
+        Initializes the handle without starting the process.
+
+        Args:
+            node (str): The node name of the worker on the hash ring.
+            socket_dir (str): The directory for the Unix socket.
+            database_url (str, optional): The database the worker records finished games in.
+            turn_timeout (float, optional): The seconds a player has for a turn, None or 0 for no limit.
+        """
+        self.node = node
+        self.database_url = database_url
+        self.turn_timeout = turn_timeout
+        self.socket_path = os.path.join(socket_dir, f"{node}.sock")
+        self.process = None
+        self.connection = None
+        self.__send_lock = threading.Lock()
+
+    def start(self):
+        """
+        Starts the worker process and connects to it.
+        """
+        command = [sys.executable, "-m", "squirreluno.worker", "--worker", self.socket_path]
+        if self.database_url:
+            command += ["--database", self.database_url]
+        if self.turn_timeout:
+            command += ["--turn-timeout", str(self.turn_timeout)]
+        # the package may run from a checkout that is not installed
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        python_path = os.pathsep.join(filter(None, [package_root, os.environ.get("PYTHONPATH")]))
+        self.process = subprocess.Popen(command, stdout=subprocess.DEVNULL,
+                                        env=dict(os.environ, PYTHONPATH=python_path))
+        deadline = time.monotonic() + WORKER_START_TIMEOUT
+        while True:
+            try:
+                self.connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.connection.connect(self.socket_path)
+                return
+            except (FileNotFoundError, ConnectionRefusedError):
+                self.connection.close()
+                if time.monotonic() > deadline or self.process.poll() is not None:
+                    raise RuntimeError(f"Worker {self.node} did not start")
+                time.sleep(0.01)
+
+    def send(self, message: dict):
+        """
+        Forwards a message to the worker.
+
+        Args:
+            message (dict): The message to forward.
+        """
+        with self.__send_lock:
+            send_message(self.connection, message)
+
+    def stop(self):
+        """
+        Asks the worker to exit and waits for it.
+        """
+        try:
+            self.send({"op": "shutdown", "room": None})
+        except OSError:
+            pass
+        self.process.wait()
+        self.connection.close()
+
+    @property
+    def alive(self):
+        """
+        Returns True while the worker process is running.
+        """
+        return self.process is not None and self.process.poll() is None
+
+class RoomRouter(Networking):
+    """
+    Front process that accepts all client connections and pins every room to a worker.
+
+    Rooms are placed with consistent hashing of the room id and stay pinned to their
+    worker for their whole life. The router keeps the last state reported for each
+    room, so a restarted worker gets its rooms back instead of dropping them.
+    With a snapshotter these states also survive a restart of the router.
+
+    The workers send snapshots of their metrics, /metrics of the router serves
+    them summed up with the router's own. The last snapshot of a replaced worker
+    is kept, so the counters never go back.
+
+    Every room has a SessionRegistry like the single game server: creating or
+    joining a room with a name gives the connection that seat and a token, and
+    the seat is held for the grace period after a disconnect. Actions, decisions
+    and closing a room are only forwarded for the seat of the sending connection.
+
+    Client events:
+        create_room: {"room": str, "players": list[str], "house_rules": list[str], "name": str}, the creator
+            takes the seat of name, the first player by default; house rules are optional
+        join_room: {"room": str, "name": str}, without a name the connection only follows the room
+        resume_seat: {"room": str, "token": str}, also accepted as auth of the connection
+        action: {"room": str, "action": str}
+        decide: {"room": str, "choice": str}, the choice of a pending decision
+        close_room: {"room": str}
+    """
+    def __init__(self, workers: int, port: int = 5000, database_url: str = None, snapshotter=None,
+                 turn_timeout: float = None, seat_grace_period: float = DEFAULT_SEAT_GRACE_PERIOD):
+        """
+        Initializes the router, starts the worker processes and restores the snapshotted rooms.
+
+        Args:
+            workers (int): The number of worker processes.
+            port (int, optional): The port of the socket server. Defaults to 5000.
+            database_url (str, optional): The database the workers record finished games in.
+            snapshotter (Snapshotter, optional): Keeps the room states across router restarts.
+            turn_timeout (float, optional): The seconds a player has for a turn, None or 0 for no limit.
+            seat_grace_period (float, optional): The time in seconds a seat is held for a disconnected player.
+        """
+        super().__init__(port)
+        self.database_url = database_url
+        self.turn_timeout = turn_timeout
+        self.seat_grace_period = seat_grace_period
+        self.snapshotter = snapshotter
+        self.socket_dir = tempfile.mkdtemp(prefix="squirreluno-")
+        self.workers = {}
+        self.ring = ConsistentHashRing()
+        self.room_pins = {}
+        self.room_states = {}
+        self.room_members = {}
+        self.room_sessions = {}
+        # the seat the creator of a room takes once the worker dealt it, room id -> (sid, name)
+        self.pending_seats = {}
+        self.profile_requests = {}
+        # the last metrics snapshot per worker node, and the sum of those of replaced worker processes
+        self.worker_metrics = {}
+        self.retired_metrics = MetricsRegistry()
+        for index in range(workers):
+            self.add_worker(f"worker-{index}")
+        if snapshotter is not None:
+            self.restore_rooms(snapshotter.store.load_all())
+
+        self.on_event("create_room", self._on_create_room)
+        self.on_event("join_room", self._on_join_room)
+        self.on_event("resume_seat", self._on_resume_seat)
+        self.on_event("action", self._on_room_message("action"))
+        self.on_event("decide", self._on_room_message("decide"))
+        self.on_event("close_room", self._on_room_message("close"))
+
+    def add_worker(self, node: str):
+        """
+        Starts a worker and adds it to the ring, live rooms keep their worker.
+
+        Args:
+            node (str): The node name of the new worker.
+        """
+        handle = WorkerHandle(node, self.socket_dir, self.database_url, self.turn_timeout)
+        handle.start()
+        self.workers[node] = handle
+        self.ring.add_node(node)
+        self.start_background_task(self._read_worker, handle)
+
+    def restart_worker(self, node: str):
+        """
+        Replaces a worker process and restores its rooms from their last state.
+
+        Args:
+            node (str): The node name of the worker.
+        """
+        old_handle = self.workers[node]
+        if old_handle.alive:
+            old_handle.stop()
+        self.retired_metrics.merge(self.worker_metrics.pop(node, {}))
+        handle = WorkerHandle(node, self.socket_dir, self.database_url, self.turn_timeout)
+        handle.start()
+        self.workers[node] = handle
+        self.start_background_task(self._read_worker, handle)
+        for room_id, pinned_node in list(self.room_pins.items()):
+            if pinned_node != node:
+                continue
+            if room_id in self.room_states:
+                handle.send({"op": "restore", "room": room_id, "state": self.room_states[room_id]})
+            else:
+                self._drop_room(room_id)
+
+    def restore_rooms(self, states: dict):
+        """
+        Places saved rooms on the ring and sends every worker its rooms back.
+
+        Args:
+            states (dict[str, dict]): The exported state per room id.
+        """
+        for room_id, state in states.items():
+            if not state["game_active"]:
+                continue
+            self.room_states[room_id] = state
+            self._worker_for_room(room_id).send({"op": "restore", "room": room_id, "state": state})
+        if states:
+            print(f"Restored {len(self.room_states)} rooms")
+
+    def profile_room(self, room_id: str, seconds: float, interval_ms: float):
+        """
+        Asks the worker of a room to profile the room's turns.
+
+        Args:
+            room_id (str): The id of the room.
+            seconds (float): The profiling time.
+            interval_ms (float): The shortest time between two samples.
+
+        Returns:
+            ProfileRequest: Gets the report when the worker sends it.
+        """
+        request = ProfileRequest()
+        if room_id not in self.room_pins:
+            request.report = {"error": f"No room {room_id}"}
+            return request
+        request_id = f"{room_id}-{time.monotonic_ns()}"
+        self.profile_requests[request_id] = request
+        self._worker_for_room(room_id).send({"op": "profile", "room": room_id, "request": request_id,
+                                             "seconds": seconds, "interval_ms": interval_ms})
+        return request
+
+    def metrics_registry(self):
+        merged = MetricsRegistry()
+        merged.merge(REGISTRY.snapshot())
+        merged.merge(self.retired_metrics.snapshot())
+        for snapshot in list(self.worker_metrics.values()):
+            merged.merge(snapshot)
+        return merged
+
+    def client_connected(self, sid: str, auth=None):
+        if isinstance(auth, dict) and "room" in auth and "token" in auth:
+            self._on_resume_seat(sid, auth)
+
+    def client_disconnected(self, sid: str):
+        for members in self.room_members.values():
+            members.discard(sid)
+        for sessions in self.room_sessions.values():
+            sessions.detach(sid)
+
+    def _worker_for_room(self, room_id: str):
+        node = self.room_pins.setdefault(room_id, self.ring.get_node(room_id))
+        return self.workers[node]
+
+    def _on_create_room(self, sid: str, data: dict):
+        room_id = str(data["room"])
+        if room_id in self.room_pins:
+            self.send_to_client(sid, "error", {"room": room_id, "message": f"Room {room_id} already exists"})
+            return
+        players = list(data["players"])
+        name = data.get("name", players[0] if players else None)
+        if name not in players:
+            self.send_to_client(sid, "error", {"room": room_id, "message": f"No match for Player: {name}"})
+            return
+        self.room_members.setdefault(room_id, set()).add(sid)
+        self.room_sessions[room_id] = SessionRegistry(self.seat_grace_period)
+        self.pending_seats[room_id] = (sid, name)
+        self._worker_for_room(room_id).send({"op": "create", "room": room_id, "sid": sid, "players": players,
+                                             "house_rules": list(data.get("house_rules", ()))})
+
+    def _on_join_room(self, sid: str, data: dict):
+        room_id = str(data["room"])
+        if room_id not in self.room_pins:
+            self.send_to_client(sid, "error", {"room": room_id, "message": f"No room {room_id}"})
+            return
+        joined = {"room": room_id}
+        state = self.room_states.get(room_id)
+        if state is not None:
+            joined["players"] = {player["name"]: player["uid"] for player in state["players"]}
+            joined["player_turn"] = state["player_turn"]
+        name = data.get("name")
+        if name is not None:
+            if name not in joined.get("players", {}):
+                self.send_to_client(sid, "error", {"room": room_id, "message": f"No match for Player: {name}"})
+                return
+            if not self._issue_seat(room_id, sid, joined["players"][name]):
+                return
+        self.room_members.setdefault(room_id, set()).add(sid)
+        self.send_to_client(sid, "joined", joined)
+
+    def _on_resume_seat(self, sid: str, data: dict):
+        """
+        Gives a connection back the seat of a token, within the grace period after a disconnect.
+
+        Args:
+            sid (str): The socket session id of the client.
+            data (dict): {"room": str, "token": str}.
+        """
+        room_id = str(data.get("room"))
+        sessions = self.room_sessions.get(room_id)
+        session = sessions.resume(data.get("token"), sid) if sessions is not None else None
+        if session is None:
+            self.send_to_client(sid, "session_expired", {"room": room_id})
+            return
+        self.room_members.setdefault(room_id, set()).add(sid)
+        self.send_to_client(sid, "resume", {"room": room_id, "player": session.player_uid,
+                                            "state": self.room_states.get(room_id)})
+
+    def _issue_seat(self, room_id: str, sid: str, player_uid: str):
+        """
+        Binds a connection to a player seat of a room and sends it the token.
+
+        Returns:
+            bool: False if the seat is held by another connection, the client got an error.
+        """
+        try:
+            # the sessions of rooms restored from a snapshot are gone, their seats are free again
+            session = self.room_sessions.setdefault(room_id, SessionRegistry(self.seat_grace_period)).issue(
+                player_uid, sid)
+        except ValueError as error:
+            self.send_to_client(sid, "error", {"room": room_id, "message": str(error)})
+            return False
+        self.send_to_client(sid, "seat", {"room": room_id, "player": player_uid, "token": session.token})
+        return True
+
+    def _on_room_message(self, op: str):
+        def forward(sid: str, data: dict):
+            room_id = str(data["room"])
+            if room_id not in self.room_pins:
+                self.send_to_client(sid, "error", {"room": room_id, "message": f"No room {room_id}"})
+                return
+            sessions = self.room_sessions.get(room_id)
+            session = sessions.get_by_sid(sid) if sessions is not None else None
+            if session is None:
+                self.send_to_client(sid, "error", {"room": room_id, "message": f"No seat in room {room_id}"})
+                return
+            if data.get("player", session.player_uid) != session.player_uid:
+                self.send_to_client(sid, "error", {"room": room_id,
+                                                   "message": f"The seat of player {data['player']} is not yours"})
+                return
+            message = dict(data, op=op, room=room_id, sid=sid, player=session.player_uid)
+            self._worker_for_room(room_id).send(message)
+        return forward
+
+    def _read_worker(self, handle: WorkerHandle):
+        """
+        Dispatches the replies of a worker until its connection closes.
+
+        Args:
+            handle (WorkerHandle): The worker to read from.
+        """
+        while True:
+            try:
+                reply = recv_message(handle.connection)
+            except OSError:
+                reply = None
+            if reply is None:
+                break
+            room_id = reply["room"]
+            if reply["op"] == "metrics":
+                # a late snapshot of a replaced process must not overwrite the one of its successor
+                if self.workers.get(handle.node) is handle:
+                    self.worker_metrics[handle.node] = reply["metrics"]
+            elif reply["op"] == "state":
+                self.room_states[room_id] = reply["state"]
+                if self.snapshotter is not None and reply["state"]["game_active"]:
+                    self.snapshotter.capture(room_id, reply["state"])
+                elif self.snapshotter is not None:
+                    self.snapshotter.discard(room_id)
+            elif reply["op"] == "closed":
+                self._drop_room(room_id, notify=False)
+            elif reply["op"] == "profile":
+                request = self.profile_requests.pop(reply["request"], None)
+                if request is not None:
+                    request.report = reply["report"]
+            elif reply["to"] is not None:
+                self.send_to_client(reply["to"], reply["event"], reply["data"])
+            elif reply["event"] == "room_created":
+                self._broadcast_to_room(room_id, reply)
+                self._seat_creator(room_id, reply["data"]["players"])
+            else:
+                self._broadcast_to_room(room_id, reply)
+
+    def _broadcast_to_room(self, room_id: str, reply: dict):
+        for sid in list(self.room_members.get(room_id, ())):
+            self.send_to_client(sid, reply["event"], reply["data"])
+
+    def _seat_creator(self, room_id: str, players: dict):
+        """
+        Gives the creator of a room the seat it asked for, once the worker dealt the room.
+
+        Args:
+            room_id (str): The id of the room.
+            players (dict[str, str]): The player UIDs by name.
+        """
+        pending = self.pending_seats.pop(room_id, None)
+        if pending is not None:
+            sid, name = pending
+            self._issue_seat(room_id, sid, players[name])
+
+    def _drop_room(self, room_id: str, notify=True):
+        if notify:
+            for sid in list(self.room_members.get(room_id, ())):
+                self.send_to_client(sid, "room_lost", {"room": room_id})
+        self.room_pins.pop(room_id, None)
+        self.room_states.pop(room_id, None)
+        self.room_members.pop(room_id, None)
+        self.room_sessions.pop(room_id, None)
+        self.pending_seats.pop(room_id, None)
+        if self.snapshotter is not None:
+            self.snapshotter.discard(room_id)
+
+    def _watch_workers(self):
+        """
+        Restarts crashed workers.
+        """
+        while not self.shutdown_requested:
+            self.sleep(WORKER_CHECK_INTERVAL)
+            for node, handle in list(self.workers.items()):
+                if not handle.alive and not self.shutdown_requested:
+                    print(f"{node} exited with {handle.process.returncode}, restarting")
+                    self.restart_worker(node)
+
+    def server_stopping(self):
+        for handle in self.workers.values():
+            if handle.alive:
+                handle.stop()
+        if self.snapshotter is not None:
+            self.snapshotter.close()
+
+    def start_server(self, *args, **kwargs):
+        self.start_background_task(self._watch_workers)
+        super().start_server(*args, **kwargs)
@@ -0,0 +1,177 @@
+from __future__ import annotations
+from sqlalchemy import select, bindparam, MetaData, Table, Column, String, Float, LargeBinary
+from .persistence import create_database_engine
+from .utils import get_native_threading, get_native_time
+import pickle
+import time
+
+DEFAULT_SNAPSHOT_INTERVAL = 1.0
+# rooms written per transaction, the snapshot thread releases the GIL after each one
+SNAPSHOT_CHUNK = 32
+
+snapshot_metadata = MetaData()
+
+room_snapshots_table = Table(
+    "room_snapshots", snapshot_metadata,
+    Column("room_id", String(128), primary_key=True),
+    Column("saved_at", Float, nullable=False),
+    Column("state", LargeBinary, nullable=False),
+)
+
+class SnapshotStore:
+    """
+    Keeps the last exported state of every live room in a database.
+
+    Each save runs in one transaction, so after a crash the table holds either the
+    previous or the new snapshot of a room, never a torn one. SQLite databases run
+    in WAL mode, see persistence.create_database_engine.
+    """
+    def __init__(self, url: str):
+        """
+        Initializes the store and creates its table.
+
+        Args:
+            url (str): The SQLAlchemy database URL, e.g. sqlite:///snapshots.db.
+        """
+        self.engine = create_database_engine(url, snapshot_metadata)
+
+    def save(self, states: dict, removed=()):
+        """
+        Replaces the snapshots of some rooms and deletes the snapshots of closed rooms.
+
+        Args:
+            states (dict[str, bytes]): The pickled state per room id.
+            removed (iterable[str], optional): The ids of rooms that no longer exist.
+        """
+        stale = set(removed) | set(states)
+        if not stale:
+            return
+        now = time.time()
+        columns = room_snapshots_table.c
+        with self.engine.begin() as connection:
+            connection.execute(room_snapshots_table.delete().where(columns.room_id == bindparam("stale_id")),
+                               [{"stale_id": room_id} for room_id in stale])
+            if states:
+                connection.execute(room_snapshots_table.insert(),
+                                   [{"room_id": room_id, "saved_at": now, "state": state}
+                                    for room_id, state in states.items()])
+
+    def load_all(self):
+        """
+        Reads the snapshots of all rooms in one query.
+
+        Returns:
+            dict[str, dict]: The exported state per room id.
+        """
+        columns = room_snapshots_table.c
+        with self.engine.connect() as connection:
+            rows = connection.execute(select(columns.room_id, columns.state))
+            return {row.room_id: pickle.loads(row.state) for row in rows}
+
+class Snapshotter:
+    """
+    Periodic, incremental snapshots of live rooms.
+
+    The turn loop only hands over the state it exported with capture(), which is a
+    dict assignment. A background thread pickles and saves the rooms that changed
+    since the last flush every interval, so rooms without turns cost nothing and a
+    crash loses at most one interval of turns.
+    """
+    def __init__(self, store: SnapshotStore, *, interval: float = DEFAULT_SNAPSHOT_INTERVAL):
+        """
+        Initializes the snapshotter and starts its thread.
+
+        Args:
+            store (SnapshotStore): Where the snapshots are written.
+            interval (float, optional): The time in seconds between two flushes.
+        """
+        self.store = store
+        self.interval = interval
+        self.flushes = 0
+        self.snapshots_written = 0
+        self.last_flush_ms = 0.0
+        native_threading, _ = get_native_threading()
+        self.__pending = {}
+        self.__removed = set()
+        self.__lock = native_threading.Lock()
+        self.__stop = native_threading.Event()
+        self.__sleep = get_native_time().sleep
+        self.__thread = native_threading.Thread(target=self._run, name="snapshotter", daemon=True)
+        self.__thread.start()
+
+    def capture(self, room_id: str, state: dict):
+        """
+        Marks a room as changed. The state must not be modified afterwards.
+
+        Args:
+            room_id (str): The id of the room.
+            state (dict): The state returned by Game.export_state.
+        """
+        with self.__lock:
+            self.__pending[room_id] = state
+            self.__removed.discard(room_id)
+
+    def discard(self, room_id: str):
+        """
+        Deletes the snapshot of a finished or closed room with the next flush.
+
+        Args:
+            room_id (str): The id of the room.
+        """
+        with self.__lock:
+            self.__pending.pop(room_id, None)
+            self.__removed.add(room_id)
+
+    def flush(self):
+        """
+        Writes the rooms that changed since the last flush.
+
+        The rooms are pickled and written in chunks with a GIL release after each
+        one, so the turn loop never waits for the whole flush.
+
+        Returns:
+            int: The number of written snapshots.
+        """
+        with self.__lock:
+            pending, self.__pending = self.__pending, {}
+            removed, self.__removed = self.__removed, set()
+        started = time.perf_counter()
+        written = 0
+        room_ids = list(pending)
+        for first in range(0, max(len(room_ids), 1), SNAPSHOT_CHUNK):
+            chunk = {room_id: pending[room_id] for room_id in room_ids[first:first + SNAPSHOT_CHUNK]}
+            chunk_removed = removed if first == 0 else ()
+            try:
+                self.store.save({room_id: pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+                                 for room_id, state in chunk.items()}, chunk_removed)
+            except Exception as error:
+                print(f"Could not write {len(chunk)} room snapshots: {error}")
+                self._requeue(chunk, chunk_removed)
+                continue
+            written += len(chunk)
+            self.__sleep(0)
+        self.flushes += 1
+        self.snapshots_written += written
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        return written
+
+    def _requeue(self, states: dict, removed):
+        with self.__lock:
+            for room_id, state in states.items():
+                self.__pending.setdefault(room_id, state)
+            self.__removed |= set(removed) - set(self.__pending)
+
+    def close(self, timeout: float = None):
+        """
+        Writes the last changes and stops the thread.
+
+        Args:
+            timeout (float, optional): The longest time to wait for the last flush.
+        """
+        self.__stop.set()
+        self.__thread.join(timeout)
+
+    def _run(self):
+        while not self.__stop.wait(self.interval):
+            self.flush()
+        self.flush()
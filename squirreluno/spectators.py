@@ -0,0 +1,172 @@
+from __future__ import annotations
+from collections import deque
+import threading
+import json
+import time
+
+SPECTATE_EVENT = "spectate"
+# how often the frames are fanned out to the spectators
+DEFAULT_FAN_OUT_INTERVAL = 0.1
+DEFAULT_SPECTATOR_DELAY = 0.0
+# frames waiting for their delay, the oldest are dropped beyond that
+MAX_HELD_FRAMES = 1024
+
+class SpectatorFrame:
+    """
+    The public table state after one change, serialized once and shared by all spectators.
+
+    A frame can't be changed after it was created, so every connection can send
+    the same object without copying it. The JSON is built on first access of the
+    payload, by the fan-out instead of the turn, and kept.
+    """
+    __slots__ = ("sequence", "created_at", "_state", "_payload")
+
+    def __init__(self, sequence: int, created_at: float, state: dict):
+        """
+        Initializes the frame.
+
+        Args:
+            sequence (int): The number of the frame in its channel, counting from 1.
+            created_at (float): The monotonic time of the change.
+            state (dict): The table state, not shared with the game.
+        """
+        object.__setattr__(self, "sequence", sequence)
+        object.__setattr__(self, "created_at", created_at)
+        object.__setattr__(self, "_state", state)
+        object.__setattr__(self, "_payload", None)
+
+    @property
+    def payload(self):
+        """
+        Returns the table state as JSON, the same str object on every call.
+        """
+        if self._payload is None:
+            object.__setattr__(self, "_payload", json.dumps(self._state, separators=(",", ":")))
+        return self._payload
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SpectatorFrame is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("SpectatorFrame is immutable")
+
+class SpectatorChannel:
+    """
+    The spectators of one game and the frames they are shown.
+
+    The turn loop only publishes: the table state is wrapped into a frame and
+    appended to a queue, whatever the number of spectators. The fan-out runs
+    outside of the turn, takes the newest frame the delay releases and hands it
+    to every spectator who hasn't seen it yet. A spectator who falls behind skips
+    the frames in between, every frame holds the complete table.
+    """
+    def __init__(self, delay: float = DEFAULT_SPECTATOR_DELAY, clock=time.monotonic):
+        """
+        Initializes an empty channel.
+
+        Args:
+            delay (float, optional): The seconds a frame is held back before spectators see it.
+            clock (callable, optional): The monotonic clock of the frame times.
+        """
+        self.delay = delay
+        self.clock = clock
+        self.frames_published = 0
+        self.__held = deque(maxlen=MAX_HELD_FRAMES)
+        self.__current = None
+        self.__spectators = set()
+        # the spectators who joined after the current frame was fanned out
+        self.__joined = set()
+        self.__fanned_out = 0
+        # the turn loop never takes the lock, only the socket handlers and the fan-out do
+        self.__lock = threading.Lock()
+
+    def publish(self, state: dict):
+        """
+        Wraps a table state into a frame, the only work a change costs the game.
+
+        Args:
+            state (dict): The public table state, see Game.table_snapshot.
+
+        Returns:
+            SpectatorFrame: The new frame.
+        """
+        self.frames_published += 1
+        frame = SpectatorFrame(self.frames_published, self.clock(), state)
+        if self.delay > 0:
+            self.__held.append(frame)
+        else:
+            self.__current = frame
+        return frame
+
+    def current_frame(self, now: float = None):
+        """
+        Returns the newest frame the delay has released.
+
+        Args:
+            now (float, optional): The current monotonic time. Defaults to the clock of the channel.
+
+        Returns:
+            SpectatorFrame: The frame, or None before the first one is released.
+        """
+        released_before = (self.clock() if now is None else now) - self.delay
+        held = self.__held
+        while held and held[0].created_at <= released_before:
+            self.__current = held.popleft()
+        return self.__current
+
+    def subscribe(self, sid: str):
+        """
+        Adds a spectator, the next fan-out sends the current frame.
+
+        Args:
+            sid (str): The socket session id of the spectator.
+        """
+        with self.__lock:
+            self.__spectators.add(sid)
+            self.__joined.add(sid)
+
+    def unsubscribe(self, sid: str):
+        """
+        Removes a spectator.
+
+        Args:
+            sid (str): The socket session id of the spectator.
+
+        Returns:
+            bool: True if the sid was a spectator.
+        """
+        with self.__lock:
+            self.__joined.discard(sid)
+            if sid not in self.__spectators:
+                return False
+            self.__spectators.remove(sid)
+            return True
+
+    def __contains__(self, sid: str):
+        return sid in self.__spectators
+
+    def __len__(self):
+        return len(self.__spectators)
+
+    def due(self, now: float = None):
+        """
+        Takes the spectators who haven't seen the current frame, and marks it as sent to them.
+
+        Args:
+            now (float, optional): The current monotonic time. Defaults to the clock of the channel.
+
+        Returns:
+            SpectatorFrame: The current frame, or None if there is nothing to send.
+            list[str]: The sids to send the frame to.
+        """
+        frame = self.current_frame(now)
+        if frame is None:
+            return None, []
+        with self.__lock:
+            if frame.sequence != self.__fanned_out:
+                self.__fanned_out = frame.sequence
+                sids = list(self.__spectators)
+            else:
+                sids = list(self.__joined)
+            self.__joined.clear()
+        return frame, sids
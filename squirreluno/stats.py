@@ -0,0 +1,214 @@
+from __future__ import annotations
+from collections import OrderedDict, deque
+from itertools import count
+from sqlalchemy import select
+from .persistence import games_table, game_players_table, player_stats_table
+import threading
+import time
+
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_CACHE_TTL = 30.0
+DEFAULT_LEADERBOARD_LIMIT = 10
+MAX_QUERY_LIMIT = 100
+
+class ReadThroughCache:
+    """
+    In-process LRU cache whose entries also expire after a time to live.
+
+    Invalidations may come from any thread, e.g. the result writer. They are only
+    queued there and applied by the next lookup, so the writer never waits for
+    the lock of the request threads. Every invalidation also starts a new
+    generation; a value that was loaded while the generation changed may be
+    stale and is returned without being stored.
+    """
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE, ttl: float = DEFAULT_CACHE_TTL):
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_entries (int, optional): The number of entries kept before the least recently used is dropped.
+            ttl (float, optional): The time in seconds an entry is served without reloading it.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__invalidations = deque()
+        # next() of a count is atomic, so the writer thread needs no lock to bump it
+        self.__generations = count(1)
+        self.__generation = 0
+        self.__lock = threading.Lock()
+
+    def get_or_load(self, key, loader):
+        """
+        Returns the cached value of a key, loading and storing it on a miss.
+
+        Args:
+            key (hashable): The cache key.
+            loader (callable): Loads the value without arguments.
+
+        Returns:
+            object: The cached or loaded value.
+        """
+        now = time.monotonic()
+        with self.__lock:
+            self._apply_invalidations()
+            entry = self.__entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self.__generation
+        value = loader()
+        with self.__lock:
+            if generation != self.__generation:
+                # invalidated during the load, the value may predate the change
+                return value
+            self.__entries[key] = (now + self.ttl, value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+        return value
+
+    def invalidate(self, match):
+        """
+        Drops every entry whose key matches, the next lookup applies it.
+
+        Args:
+            match (callable): Called with a key, returns True if the entry is stale.
+        """
+        self.__invalidations.append(match)
+        self.__generation = next(self.__generations)
+
+    def clear(self):
+        """
+        Drops all entries.
+        """
+        self.invalidate(lambda key: True)
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def _apply_invalidations(self):
+        while self.__invalidations:
+            match = self.__invalidations.popleft()
+            for key in [key for key in self.__entries if match(key)]:
+                del self.__entries[key]
+
+class StatsService:
+    """
+    Leaderboard and player statistics read from the result tables.
+
+    The leaderboard and the per player numbers come from the player_stats
+    aggregates, the game history from the (name, finished_at) index, so no query
+    has to scan the results. Answers are cached and invalidated when the result
+    writer commits new games.
+    """
+    def __init__(self, engine, *, cache: ReadThroughCache = None):
+        """
+        Initializes the service.
+
+        Args:
+            engine (sqlalchemy.engine.Engine): The engine, see persistence.create_database_engine.
+            cache (ReadThroughCache, optional): The cache for the answers.
+        """
+        self.engine = engine
+        self.cache = ReadThroughCache() if cache is None else cache
+
+    def top_players(self, limit: int = DEFAULT_LEADERBOARD_LIMIT):
+        """
+        Gets the players with the most wins.
+
+        Args:
+            limit (int, optional): The number of players.
+
+        Returns:
+            list[dict]: The stats of the players, best first.
+        """
+        limit = max(1, min(limit, MAX_QUERY_LIMIT))
+        return self.cache.get_or_load(("top", limit), lambda: self._load_top_players(limit))
+
+    def player_stats(self, name: str):
+        """
+        Gets the totals of a player.
+
+        Args:
+            name (str): The name of the player.
+
+        Returns:
+            dict: The stats of the player, or None if the player never finished a game.
+        """
+        return self.cache.get_or_load(("player", name), lambda: self._load_player_stats(name))
+
+    def recent_games(self, name: str = None, limit: int = DEFAULT_LEADERBOARD_LIMIT):
+        """
+        Gets the last finished games, of all players or of one player.
+
+        Args:
+            name (str, optional): The name of the player.
+            limit (int, optional): The number of games.
+
+        Returns:
+            list[dict]: The games, newest first.
+        """
+        limit = max(1, min(limit, MAX_QUERY_LIMIT))
+        return self.cache.get_or_load(("recent", name, limit), lambda: self._load_recent_games(name, limit))
+
+    def invalidate_results(self, results: list):
+        """
+        Drops the cached answers that new results change. Meant as commit listener of the ResultWriter.
+
+        Args:
+            results (list[GameResult]): The committed results.
+        """
+        names = {player["name"] for result in results for player in result.players}
+        self.cache.invalidate(lambda key: key[0] == "top"
+                              or (key[0] in ("player", "recent") and (key[1] is None or key[1] in names)))
+
+    def register_routes(self, networking):
+        """
+        Adds the stats endpoints to a server.
+
+        Args:
+            networking (Networking): The server to serve the endpoints on.
+        """
+        networking.route("/stats/top",
+                         lambda args: self.top_players(args.get("limit", DEFAULT_LEADERBOARD_LIMIT, type=int)))
+        networking.route("/stats/players/<name>", lambda args, name: self.player_stats(name))
+        networking.route("/stats/recent",
+                         lambda args: self.recent_games(args.get("name"),
+                                                        args.get("limit", DEFAULT_LEADERBOARD_LIMIT, type=int)))
+
+    def _load_top_players(self, limit: int):
+        columns = player_stats_table.c
+        query = select(player_stats_table).order_by(columns.wins.desc(), columns.games.desc()).limit(limit)
+        with self.engine.connect() as connection:
+            return [self._stats_row(row) for row in connection.execute(query)]
+
+    def _load_player_stats(self, name: str):
+        query = select(player_stats_table).where(player_stats_table.c.name == name)
+        with self.engine.connect() as connection:
+            row = connection.execute(query).first()
+        return None if row is None else self._stats_row(row)
+
+    def _load_recent_games(self, name: str, limit: int):
+        games = games_table.c
+        query = select(games.id, games.winner_name, games.player_count, games.finished_at, games.duration_ms)
+        if name is None:
+            query = query.order_by(games.finished_at.desc())
+        else:
+            players = game_players_table.c
+            query = (query.join(game_players_table, players.game_id == games.id)
+                     .where(players.name == name)
+                     .order_by(players.finished_at.desc()))
+        with self.engine.connect() as connection:
+            return [dict(row._mapping) for row in connection.execute(query.limit(limit))]
+
+    @staticmethod
+    def _stats_row(row):
+        stats = dict(row._mapping)
+        stats["win_rate"] = round(stats["wins"] / stats["games"], 4) if stats["games"] else 0.0
+        stats["average_duration_ms"] = stats["total_duration_ms"] // stats["games"] if stats["games"] else 0
+        return stats
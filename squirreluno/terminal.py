@@ -0,0 +1,112 @@
+from __future__ import annotations
+from .utils import CURRENT_OS_SYSTEM
+import shutil
+import sys
+import re
+import os
+
+CLEAR_SCREEN = "\033[H\033[2J"
+CLEAR_LINE_END = "\033[K"
+CLEAR_BELOW = "\033[J"
+ANSI_SEQUENCE = re.compile(r"\033\[[0-9;]*[A-Za-z]")
+
+def move_to_row(row: int):
+    """
+    Returns the ANSI sequence that puts the cursor at the start of a screen row.
+
+    Args:
+        row (int): The row, starting with 1.
+    """
+    return f"\033[{row};1H"
+
+def visible_width(line: str):
+    """
+    Returns the number of columns a line takes on the screen, without its ANSI sequences.
+
+    Args:
+        line (str): The line.
+    """
+    return len(ANSI_SEQUENCE.sub("", line))
+
+class TerminalRenderer:
+    """
+    Draws frames to the terminal and rewrites only the lines that changed.
+
+    The renderer remembers the last frame. A new frame moves the cursor to every
+    changed row, rewrites it and clears the rest of the screen below the frame,
+    which also removes the prompts and answers typed after the last frame. All of
+    it goes out in one write, without spawning clear or cls.
+
+    The rows are only known while nothing scrolled: after a frame that did not fit
+    on the screen, or whose prompt might have scrolled it, the next frame clears
+    the screen and is drawn in full.
+    """
+    def __init__(self, stream=None):
+        """
+        Initializes the renderer with an unknown screen.
+
+        Args:
+            stream (TextIO, optional): The stream to draw to. Defaults to sys.stdout.
+        """
+        self.stream = stream
+        self.__frame = []
+        self.__full_redraw = True
+        self.__ansi_enabled = False
+
+    def render(self, lines, *, prompt_rows: int = 0):
+        """
+        Draws a frame and leaves the cursor in the row below it.
+
+        Args:
+            lines (Iterable[str]): The lines of the frame, lines with line breaks are split up.
+            prompt_rows (int, optional): The rows the caller prints below the frame before the next one.
+
+        Returns:
+            int: The number of rows that were written.
+        """
+        frame = [row for line in lines for row in str(line).split("\n")]
+        size = shutil.get_terminal_size()
+        fits = all(visible_width(row) < size.columns for row in frame)
+
+        if self.__full_redraw or not fits:
+            parts = [CLEAR_SCREEN]
+            parts.extend(f"{row}{CLEAR_LINE_END}\n" for row in frame)
+            written = len(frame)
+        else:
+            parts = []
+            written = 0
+            for index, row in enumerate(frame):
+                if index >= len(self.__frame) or self.__frame[index] != row:
+                    parts.append(f"{move_to_row(index + 1)}{row}{CLEAR_LINE_END}")
+                    written += 1
+            parts.append(f"{move_to_row(len(frame) + 1)}{CLEAR_BELOW}")
+
+        self.__frame = frame
+        self.__full_redraw = not fits or len(frame) + prompt_rows >= size.lines
+        self._write("".join(parts))
+        return written
+
+    def clear(self):
+        """
+        Clears the screen and forgets the last frame.
+        """
+        self.__frame = []
+        self.__full_redraw = False
+        self._write(CLEAR_SCREEN)
+
+    def invalidate(self):
+        """
+        Makes the next frame a full redraw, e.g. after other output went to the terminal.
+        """
+        self.__full_redraw = True
+
+    def _write(self, text: str):
+        stream = self.stream if self.stream is not None else sys.stdout
+        if CURRENT_OS_SYSTEM == "Windows" and not self.__ansi_enabled:
+            # the console handles ANSI sequences once a child process switched it to VT mode
+            os.system("")
+            self.__ansi_enabled = True
+        stream.write(text)
+        stream.flush()
+
+TERMINAL = TerminalRenderer()
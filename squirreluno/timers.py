@@ -0,0 +1,200 @@
+from __future__ import annotations
+import threading
+import time
+
+DEFAULT_TICK = 0.1
+WHEEL_BITS = 8
+WHEEL_SIZE = 1 << WHEEL_BITS
+WHEEL_MASK = WHEEL_SIZE - 1
+WHEEL_LEVELS = 4
+# the longest delay the wheels hold, later deadlines wait in the last wheel and cascade again
+MAX_TICKS = (1 << (WHEEL_BITS * WHEEL_LEVELS)) - 1
+
+class Timer:
+    """
+    One armed deadline of a TimerWheel.
+    """
+    __slots__ = ("key", "expires", "callback", "args", "bucket")
+
+    def __init__(self, key, expires: int, callback, args: tuple):
+        """
+        Initializes the timer.
+
+        Args:
+            key (Hashable): The key the timer is armed, reset and cancelled with.
+            expires (int): The tick the timer fires at.
+            callback (callable): Called with args when the timer fires.
+            args (tuple): The arguments of the callback.
+        """
+        self.key = key
+        self.expires = expires
+        self.callback = callback
+        self.args = args
+        # the set of the wheel slot that holds the timer, cancelling removes it from there
+        self.bucket = None
+
+class TimerWheel:
+    """
+    Hierarchical timer wheel for the deadlines of many rooms.
+
+    Four wheels of 256 slots hold the timers, the first one by tick, every
+    further one with 256 times the range of the one before. Arming puts a timer
+    into one slot and cancelling takes it out, both O(1). When the first wheel
+    has turned once, the next slot of the second wheel is cascaded into it, so
+    every timer moves at most once per wheel and advancing is O(1) amortized per
+    timer. A deadline fires in the first tick that starts at or after it.
+
+    The wheel doesn't run on its own: the event loop of the server calls advance,
+    e.g. from a background task or between two messages of a worker. Arming and
+    advancing hold a lock, the callbacks run outside of it and may arm again.
+    """
+    def __init__(self, tick: float = DEFAULT_TICK, clock=time.monotonic):
+        """
+        Initializes empty wheels.
+
+        Args:
+            tick (float, optional): The resolution in seconds.
+            clock (callable, optional): The monotonic clock the deadlines are measured with.
+        """
+        self.tick = tick
+        self.clock = clock
+        self.current_tick = int(clock() / tick)
+        self.__wheels = [[set() for _ in range(WHEEL_SIZE)] for _ in range(WHEEL_LEVELS)]
+        self.__timers = {}
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__timers)
+
+    def __contains__(self, key):
+        return key in self.__timers
+
+    def arm(self, key, delay: float, callback, *args):
+        """
+        Arms the timer of a key, a timer already armed for the key is replaced.
+
+        Args:
+            key (Hashable): The key of the timer, e.g. a room id.
+            delay (float): The seconds until the timer fires.
+            callback (callable): Called with args when the timer fires, its result is returned by advance.
+            *args: The arguments of the callback.
+        """
+        with self.__lock:
+            self._arm_locked(key, delay, callback, args)
+
+    def reset(self, key, delay: float):
+        """
+        Moves the deadline of an armed timer, keeping its callback.
+
+        Args:
+            key (Hashable): The key of the timer.
+            delay (float): The seconds from now until the timer fires.
+
+        Returns:
+            bool: False if no timer was armed for the key.
+        """
+        with self.__lock:
+            timer = self.__timers.get(key)
+            if timer is None:
+                return False
+            self._arm_locked(key, delay, timer.callback, timer.args)
+            return True
+
+    def cancel(self, key):
+        """
+        Cancels the timer of a key.
+
+        Args:
+            key (Hashable): The key of the timer.
+
+        Returns:
+            bool: True if a timer was armed for the key.
+        """
+        with self.__lock:
+            timer = self.__timers.pop(key, None)
+            if timer is None:
+                return False
+            timer.bucket.discard(timer)
+            return True
+
+    def _arm_locked(self, key, delay: float, callback, args: tuple):
+        """
+        Arms a timer, replacing the one of the key. The caller holds the lock.
+        """
+        expires = int(-(-(self.clock() + delay) // self.tick))
+        timer = self.__timers.pop(key, None)
+        if timer is not None:
+            timer.bucket.discard(timer)
+        timer = self.__timers[key] = Timer(key, max(expires, self.current_tick + 1), callback, args)
+        self._place(timer)
+
+    def _place(self, timer: Timer):
+        """
+        Puts a timer into the slot of the wheel that covers its distance to the current tick.
+        """
+        distance = min(timer.expires - self.current_tick, MAX_TICKS)
+        level = 0
+        while distance >= WHEEL_SIZE and level < WHEEL_LEVELS - 1:
+            distance >>= WHEEL_BITS
+            level += 1
+        expires = timer.expires if timer.expires - self.current_tick <= MAX_TICKS else self.current_tick + MAX_TICKS
+        bucket = self.__wheels[level][(expires >> (WHEEL_BITS * level)) & WHEEL_MASK]
+        bucket.add(timer)
+        timer.bucket = bucket
+
+    def _cascade(self, level: int):
+        """
+        Moves the timers of the current slot of a wheel down into the wheels below.
+        """
+        bucket = self.__wheels[level][(self.current_tick >> (WHEEL_BITS * level)) & WHEEL_MASK]
+        timers = list(bucket)
+        bucket.clear()
+        for timer in timers:
+            self._place(timer)
+
+    def advance(self, now: float = None):
+        """
+        Fires the timers whose deadline has passed.
+
+        Args:
+            now (float, optional): The current time of the clock. Defaults to clock().
+
+        Returns:
+            list: The results of the fired callbacks.
+        """
+        target = int((self.clock() if now is None else now) / self.tick)
+        due = []
+        with self.__lock:
+            if not self.__timers:
+                # nothing to turn the wheels for
+                self.current_tick = max(self.current_tick, target)
+            while self.current_tick < target:
+                self.current_tick += 1
+                level = 1
+                while level < WHEEL_LEVELS and (self.current_tick >> (WHEEL_BITS * (level - 1))) & WHEEL_MASK == 0:
+                    self._cascade(level)
+                    level += 1
+                bucket = self.__wheels[0][self.current_tick & WHEEL_MASK]
+                if bucket:
+                    for timer in list(bucket):
+                        bucket.discard(timer)
+                        if timer.expires <= self.current_tick:
+                            del self.__timers[timer.key]
+                            due.append(timer)
+                        else:
+                            # beyond the range of the wheels when it was armed
+                            self._place(timer)
+                if not self.__timers:
+                    self.current_tick = max(self.current_tick, target)
+        return [timer.callback(*timer.args) for timer in due]
+
+    def next_deadline(self):
+        """
+        Returns the time of the next tick, when advance may have timers to fire.
+
+        Returns:
+            float: The clock time, or None if no timer is armed.
+        """
+        if not self.__timers:
+            return None
+        return (self.current_tick + 1) * self.tick
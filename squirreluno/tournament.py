@@ -0,0 +1,460 @@
+from __future__ import annotations
+from .card_logic import CardColor, CardKind
+from .rules import Game
+from .rule_engine import HouseRules
+from .utils import ComponentManager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import contextlib
+import importlib
+import itertools
+import argparse
+import random
+import json
+import time
+import zlib
+import os
+
+DEFAULT_RATING = 1500.0
+DEFAULT_K_FACTOR = 32.0
+DEFAULT_GAMES_PER_PAIR = 10
+# actions after which a game counts as a draw, bots can stall a game without draw cards
+DEFAULT_MAX_ACTIONS = 2000
+DEFAULT_CHECKPOINT_EVERY = 50
+REPORT_INTERVAL = 5.0
+FORMATS = ("round-robin", "swiss")
+CHECKPOINT_VERSION = 1
+
+class Strategy:
+    """
+    Chooses the moves of a bot player in a tournament.
+
+    A strategy gets the legal actions of Game.legal_actions and answers with an
+    action as typed in the terminal game. Strategies of other packages are loaded
+    by "module:Class", see load_strategy.
+    """
+    name = "strategy"
+
+    def __init__(self, rng: random.Random):
+        """
+        Initializes the strategy.
+
+        Args:
+            rng (random.Random): The random generator of the seat, seeded per match.
+        """
+        self.random = rng
+
+    def choose_action(self, game: Game, player, actions: dict):
+        """
+        Chooses the next action of the player. (overwrite function)
+
+        Args:
+            game (Game): The game.
+            player (Player): The player on turn.
+            actions (dict): The legal actions of the player.
+
+        Returns:
+            str: A hand index, "draw" or "next".
+        """
+        raise NotImplementedError
+
+    def choose(self, game: Game, player, decision):
+        """
+        Makes a pending decision of the player, e.g. the wished color. (overwrite function)
+
+        Args:
+            game (Game): The game.
+            player (Player): The deciding player.
+            decision (PendingDecision): The decision.
+
+        Returns:
+            str: One of the options, the default unless overwritten.
+        """
+        return decision.default
+
+    @staticmethod
+    def _fallback(actions: dict):
+        return "draw" if actions["draw"] else "next"
+
+class FirstCardStrategy(Strategy):
+    """
+    Plays the first legal card of the hand, otherwise draws.
+    """
+    name = "first"
+
+    def choose_action(self, game, player, actions):
+        if actions["cards"]:
+            return str(actions["cards"][0])
+        return self._fallback(actions)
+
+class RandomStrategy(Strategy):
+    """
+    Plays a random legal card and wishes a random color.
+    """
+    name = "random"
+
+    def choose_action(self, game, player, actions):
+        if actions["cards"]:
+            return str(self.random.choice(actions["cards"]))
+        return self._fallback(actions)
+
+    def choose(self, game, player, decision):
+        return self.random.choice(decision.options)
+
+class GreedyStrategy(Strategy):
+    """
+    Plays the color it holds the most of and keeps the cards without color for last.
+    """
+    name = "greedy"
+
+    def choose_action(self, game, player, actions):
+        if not actions["cards"]:
+            return self._fallback(actions)
+        cards = list(player.hands.cards.values())
+        held = {}
+        for card in cards:
+            held[card.color] = held.get(card.color, 0) + 1
+
+        def preference(index):
+            card = cards[index - 1]
+            if card.color is CardColor.NO_COLOR:
+                return (0, 0)
+            return (1, held[card.color] + (card.KIND is not CardKind.NUMBER))
+        return str(max(actions["cards"], key=preference))
+
+STRATEGIES = {strategy.name: strategy for strategy in (FirstCardStrategy, RandomStrategy, GreedyStrategy)}
+
+def load_strategy(name: str):
+    """
+    Returns the strategy class of a name.
+
+    Args:
+        name (str): A name out of STRATEGIES, or "module:Class" of a Strategy subclass.
+
+    Returns:
+        type[Strategy]: The strategy class.
+    """
+    if name in STRATEGIES:
+        return STRATEGIES[name]
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown strategy: {name}, use one of {', '.join(STRATEGIES)} or module:Class")
+    strategy = getattr(importlib.import_module(module_name), class_name, None)
+    if not (isinstance(strategy, type) and issubclass(strategy, Strategy)):
+        raise ValueError(f"{name} is not a Strategy subclass")
+    return strategy
+
+def match_seed(seed: int, match_id: str):
+    """
+    Returns the seed of a match, the same for every run and resume of a tournament.
+    """
+    return zlib.crc32(f"{seed}:{match_id}".encode())
+
+def play_match(match: dict):
+    """
+    Plays one match, in a process of the pool.
+
+    The game runs in a component scope of its own and is disposed afterwards, so a
+    pool process can play any number of matches. The setup output of the game is
+    discarded.
+
+    Args:
+        match (dict): {"id": str, "seats": [str, ...], "seed": int, "house_rules": [str], "max_actions": int}
+
+    Returns:
+        dict: {"id": str, "winner": seat index or None for a draw, "actions": int, "seconds": float}
+    """
+    started = time.perf_counter()
+    random.seed(match["seed"])
+    strategies = [load_strategy(name)(random.Random(match["seed"] + seat)) for seat, name in enumerate(match["seats"])]
+    scope_id = f"match-{match['id']}"
+    winner = None
+    actions = 0
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), ComponentManager.scope(scope_id):
+        game = Game([f"Seat {seat + 1}" for seat in range(len(strategies))],
+                    house_rules=HouseRules.from_names(match["house_rules"]))
+        try:
+            while game.game_active and actions < match["max_actions"]:
+                decision = game.pending_decision
+                player = game.players[decision.player_uid if decision is not None else game.player_turn]
+                strategy = strategies[player.game_position]
+                if decision is not None:
+                    game.decide(player.uid, strategy.choose(game, player, decision))
+                else:
+                    game.apply_action(player.uid, strategy.choose_action(game, player, game.legal_actions(player)))
+                actions += 1
+        except ValueError:
+            # e.g. no card left to draw, the game is stuck and ends as a draw
+            pass
+        if not game.game_active:
+            winner = game.check_winner(show=False).game_position
+        game.dispose()
+    ComponentManager.delete_scope(scope_id)
+    return {"id": match["id"], "winner": winner, "actions": actions, "seconds": time.perf_counter() - started}
+
+def expected_score(rating: float, other_rating: float):
+    """
+    Returns the expected score of a player against another one by the Elo formula.
+    """
+    return 1 / (1 + 10 ** ((other_rating - rating) / 400))
+
+class Tournament:
+    """
+    A round-robin or Swiss tournament of bot strategies with Elo ratings.
+
+    Every pairing plays games_per_pair two-player games with alternating seats.
+    A Swiss tournament pairs the strategies of similar score round by round, a
+    round-robin schedules every pairing at once. The matches run in a process
+    pool, and the ratings are updated as the results come in.
+
+    The checkpoint holds the schedule, the results and the ratings. A resumed
+    tournament skips the matches with a result and keeps the pairings of the
+    rounds that were already scheduled.
+    """
+    def __init__(self, strategies: list, *, tournament_format: str = "round-robin", rounds: int = None,
+                 games_per_pair: int = DEFAULT_GAMES_PER_PAIR, house_rules=(), seed: int = 0,
+                 k_factor: float = DEFAULT_K_FACTOR, max_actions: int = DEFAULT_MAX_ACTIONS,
+                 checkpoint: str = None, checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY):
+        """
+        Initializes the tournament, from the checkpoint if it exists.
+
+        Args:
+            strategies (list[str]): The names of the strategies, see load_strategy.
+            tournament_format (str, optional): "round-robin" or "swiss". Defaults to "round-robin".
+            rounds (int, optional): The rounds of a Swiss tournament. Defaults to ceil(log2(strategies)).
+            games_per_pair (int, optional): The games of each pairing.
+            house_rules (Iterable[str], optional): The house rules of all games.
+            seed (int, optional): The seed the seeds of the matches are derived from.
+            k_factor (float, optional): The Elo K-factor.
+            max_actions (int, optional): The actions after which a game ends as a draw.
+            checkpoint (str, optional): The JSON file the progress is saved in and resumed from.
+            checkpoint_every (int, optional): Results between two saves of the checkpoint.
+        """
+        if len(set(strategies)) != len(strategies) or len(strategies) < 2:
+            raise ValueError("A tournament needs at least two different strategies")
+        if tournament_format not in FORMATS:
+            raise ValueError(f"Unknown tournament format: {tournament_format}")
+        for name in strategies:
+            load_strategy(name)
+        HouseRules.from_names(house_rules)
+        self.config = {"strategies": list(strategies),
+                       "format": tournament_format,
+                       "rounds": rounds or max(1, (len(strategies) - 1).bit_length()),
+                       "games_per_pair": games_per_pair,
+                       "house_rules": sorted(house_rules),
+                       "seed": seed,
+                       "k_factor": k_factor,
+                       "max_actions": max_actions}
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self.ratings = {name: DEFAULT_RATING for name in strategies}
+        self.records = {name: {"wins": 0, "losses": 0, "draws": 0} for name in strategies}
+        self.matches = {}
+        self.results = {}
+        self.round = 0
+        if checkpoint is not None and os.path.exists(checkpoint):
+            self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        with open(self.checkpoint) as checkpoint_file:
+            data = json.load(checkpoint_file)
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {data.get('version')}")
+        if data["config"] != self.config:
+            raise ValueError(f"The checkpoint {self.checkpoint} belongs to another tournament")
+        self.ratings = data["ratings"]
+        self.records = data["records"]
+        self.matches = data["matches"]
+        self.results = data["results"]
+        self.round = data["round"]
+
+    def save_checkpoint(self):
+        """
+        Writes the progress to the checkpoint, replacing the file only once it is complete.
+        """
+        if self.checkpoint is None:
+            return
+        data = {"version": CHECKPOINT_VERSION, "config": self.config, "ratings": self.ratings,
+                "records": self.records, "matches": self.matches, "results": self.results, "round": self.round}
+        temporary = f"{self.checkpoint}.tmp"
+        with open(temporary, "w") as checkpoint_file:
+            json.dump(data, checkpoint_file)
+        os.replace(temporary, self.checkpoint)
+
+    def _schedule(self, prefix: str, pairings):
+        """
+        Adds the matches of pairings to the schedule, the seats alternate between the games.
+
+        Returns:
+            list[dict]: The new matches.
+        """
+        scheduled = []
+        for table, (first, second) in enumerate(pairings):
+            for game in range(self.config["games_per_pair"]):
+                match_id = f"{prefix}-{table}-{game}"
+                seats = [first, second] if game % 2 == 0 else [second, first]
+                match = {"id": match_id, "seats": seats, "seed": match_seed(self.config["seed"], match_id),
+                         "house_rules": self.config["house_rules"], "max_actions": self.config["max_actions"]}
+                self.matches[match_id] = match
+                scheduled.append(match)
+        return scheduled
+
+    def _swiss_pairings(self):
+        """
+        Pairs the strategies by score and rating, avoiding rematches where possible.
+
+        With an odd number of strategies the last one of the standings sits out.
+        """
+        met = {frozenset(match["seats"]) for match in self.matches.values()}
+        standings = sorted(self.config["strategies"], key=lambda name: (self.score(name), self.ratings[name]),
+                           reverse=True)
+        pairings = []
+        while len(standings) > 1:
+            first = standings.pop(0)
+            second = next((name for name in standings if frozenset((first, name)) not in met), standings[0])
+            standings.remove(second)
+            pairings.append((first, second))
+        return pairings
+
+    def score(self, name: str):
+        """
+        Returns the tournament score of a strategy, one point per win and half a point per draw.
+        """
+        record = self.records[name]
+        return record["wins"] + record["draws"] / 2
+
+    def record_result(self, result: dict):
+        """
+        Counts the result of a match and updates the Elo ratings of its two strategies.
+
+        Args:
+            result (dict): A result of play_match.
+        """
+        if result["id"] in self.results:
+            return
+        self.results[result["id"]] = result
+        first, second = self.matches[result["id"]]["seats"]
+        score = 0.5 if result["winner"] is None else 1.0 - result["winner"]
+        expected = expected_score(self.ratings[first], self.ratings[second])
+        change = self.config["k_factor"] * (score - expected)
+        self.ratings[first] += change
+        self.ratings[second] -= change
+        if result["winner"] is None:
+            self.records[first]["draws"] += 1
+            self.records[second]["draws"] += 1
+        else:
+            winner, loser = (first, second) if result["winner"] == 0 else (second, first)
+            self.records[winner]["wins"] += 1
+            self.records[loser]["losses"] += 1
+
+    def _next_matches(self):
+        """
+        Returns the open matches of the running round, and schedules the next round once it is played.
+
+        Returns:
+            list[dict]: The matches without result, empty when the tournament is over.
+        """
+        while True:
+            open_matches = [match for match in self.matches.values() if match["id"] not in self.results]
+            if open_matches:
+                return open_matches
+            if self.config["format"] == "round-robin":
+                if self.round > 0:
+                    return []
+                self._schedule("rr", itertools.combinations(self.config["strategies"], 2))
+            else:
+                if self.round >= self.config["rounds"]:
+                    return []
+                self._schedule(f"swiss{self.round + 1}", self._swiss_pairings())
+            self.round += 1
+            self.save_checkpoint()
+
+    def run(self, processes: int = None, report=print):
+        """
+        Plays the open matches of the tournament.
+
+        Args:
+            processes (int, optional): The size of the process pool, 0 plays in this process. Defaults to the CPU count.
+            report (callable, optional): Gets the progress lines with the throughput in games per second.
+
+        Returns:
+            list[dict]: The standings, see standings.
+        """
+        played = 0
+        started = last_report = time.perf_counter()
+        executor = ProcessPoolExecutor(max_workers=processes) if processes != 0 else None
+        try:
+            matches = self._next_matches()
+            while matches:
+                if executor is None:
+                    results = map(play_match, matches)
+                else:
+                    results = (future.result() for future in as_completed(
+                        [executor.submit(play_match, match) for match in matches]))
+                for result in results:
+                    self.record_result(result)
+                    played += 1
+                    if played % self.checkpoint_every == 0:
+                        self.save_checkpoint()
+                    now = time.perf_counter()
+                    if now - last_report >= REPORT_INTERVAL:
+                        last_report = now
+                        report(f"{len(self.results)}/{len(self.matches)} games of round {self.round}, "
+                               f"{played / (now - started):.1f} games/sec")
+                matches = self._next_matches()
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            self.save_checkpoint()
+        elapsed = time.perf_counter() - started
+        report(f"Played {played} games in {elapsed:.1f}s, {played / elapsed if elapsed else 0:.1f} games/sec")
+        return self.standings()
+
+    def standings(self):
+        """
+        Returns the strategies ordered by rating.
+
+        Returns:
+            list[dict]: {"strategy", "rating", "score", "wins", "losses", "draws"} per strategy.
+        """
+        return [{"strategy": name, "rating": round(self.ratings[name], 1), "score": self.score(name),
+                 **self.records[name]}
+                for name in sorted(self.ratings, key=self.ratings.get, reverse=True)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="squirreluno-tournament",
+                                     description="Plays a tournament of bot strategies and rates them with Elo.")
+    parser.add_argument("strategies", nargs="+",
+                        help=f"strategies out of {', '.join(STRATEGIES)}, or module:Class of a Strategy subclass")
+    parser.add_argument("--format", dest="tournament_format", choices=FORMATS, default="round-robin")
+    parser.add_argument("--rounds", type=int, default=None, help="rounds of a Swiss tournament")
+    parser.add_argument("--games-per-pair", type=int, default=DEFAULT_GAMES_PER_PAIR)
+    parser.add_argument("--house-rules", nargs="*", default=[],
+                        help="house rules of all games: draw_stacking, skip_cards, jump_in")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="size of the process pool, defaults to the CPU count, 0 plays without a pool")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--k-factor", type=float, default=DEFAULT_K_FACTOR)
+    parser.add_argument("--max-actions", type=int, default=DEFAULT_MAX_ACTIONS,
+                        help="actions after which a game ends as a draw")
+    parser.add_argument("--checkpoint", default=None, help="JSON file to save the progress in and resume from")
+    parser.add_argument("--checkpoint-every", type=int, default=DEFAULT_CHECKPOINT_EVERY,
+                        help="results between two saves of the checkpoint")
+    args = parser.parse_args(argv)
+
+    try:
+        tournament = Tournament(args.strategies, tournament_format=args.tournament_format, rounds=args.rounds,
+                                games_per_pair=args.games_per_pair, house_rules=args.house_rules, seed=args.seed,
+                                k_factor=args.k_factor, max_actions=args.max_actions, checkpoint=args.checkpoint,
+                                checkpoint_every=args.checkpoint_every)
+    except (ValueError, ImportError) as error:
+        parser.error(str(error))
+    if tournament.results:
+        print(f"Resuming with {len(tournament.results)} of {len(tournament.matches)} scheduled games played")
+    standings = tournament.run(args.processes)
+    print(f"{'Strategy':<24} {'Rating':>7} {'Score':>6} {'W':>5} {'L':>5} {'D':>5}")
+    for entry in standings:
+        print(f"{entry['strategy']:<24} {entry['rating']:>7.1f} {entry['score']:>6.1f} "
+              f"{entry['wins']:>5} {entry['losses']:>5} {entry['draws']:>5}")
+
+if __name__ == "__main__":
+    main()
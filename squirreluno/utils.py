@@ -0,0 +1,503 @@
+from __future__ import annotations
+from contextlib import contextmanager
+import threading
+import secrets
+import string
+import platform
+import queue
+import time
+import sys
+
+CURRENT_OS_SYSTEM = platform.system()
+UID_ALPHABET = string.ascii_letters + string.digits
+UID_LENGTH = 8
+# byte values from the largest multiple of the alphabet size on would favour the first characters
+UID_REJECTED_BYTES = bytes(range(256 - 256 % len(UID_ALPHABET), 256))
+UID_TRANSLATION = bytes.maketrans(bytes(range(256)),
+                                  bytes(ord(UID_ALPHABET[value % len(UID_ALPHABET)]) for value in range(256)))
+
+def clear_screen():
+    """
+    Clears the terminal with ANSI sequences instead of spawning clear or cls.
+    """
+    from .terminal import TERMINAL
+
+    TERMINAL.clear()
+
+def get_native_threading():
+    """
+    Gets the threading and queue modules for threads that must not be green threads.
+
+    Under eventlet monkey patching a Thread would be a green thread that blocks
+    the whole server while it works, so the unpatched modules are returned.
+
+    Returns:
+        tuple: The threading and the queue module.
+    """
+    if "eventlet" not in sys.modules:
+        # nothing can be patched, and importing eventlet here would cost the headless processes
+        return threading, queue
+    from eventlet import patcher
+
+    if not patcher.is_monkey_patched("thread"):
+        return threading, queue
+    return patcher.original("threading"), patcher.original("queue")
+
+def get_native_time():
+    """
+    Gets the time module for native threads, whose sleep must not be eventlet's green sleep.
+
+    Returns:
+        module: The unpatched time module.
+    """
+    if "eventlet" not in sys.modules:
+        return time
+    from eventlet import patcher
+
+    if not patcher.is_monkey_patched("time"):
+        return time
+    return patcher.original("time")
+
+class Color:
+    """
+    Class to define color codes for terminal output.
+    """
+    # Basic text colors
+    BLACK = '\033[30m'
+    RED = '\033[31m'
+    GREEN = '\033[32m'
+    YELLOW = '\033[33m'
+    BLUE = '\033[34m'
+    MAGENTA = '\033[35m'
+    CYAN = '\033[36m'
+    WHITE = '\033[37m'
+
+    # Light text colors
+    LIGHT_BLACK = '\033[90m'
+    LIGHT_RED = '\033[91m'
+    LIGHT_GREEN = '\033[92m'
+    LIGHT_YELLOW = '\033[93m'
+    LIGHT_BLUE = '\033[94m'
+    LIGHT_MAGENTA = '\033[95m'
+    LIGHT_CYAN = '\033[96m'
+    LIGHT_WHITE = '\033[97m'
+
+    # Extended 256 text colors
+    ORANGE = '\033[38;5;208m'
+    PINK = '\033[38;5;213m'
+    VIOLET = '\033[38;5;177m'
+    LIGHT_GRAY = '\033[38;5;250m'
+    DARK_GRAY = '\033[38;5;240m'
+    BRIGHT_GREEN = '\033[38;5;10m'
+    BRIGHT_PINK = '\033[38;5;13m'
+    BRIGHT_CYAN = '\033[38;5;14m'
+    BRIGHT_ORANGE = '\033[38;5;214m'
+
+    # Background colors
+    BG_BLACK = '\033[40m'
+    BG_RED = '\033[41m'
+    BG_GREEN = '\033[42m'
+    BG_YELLOW = '\033[43m'
+    BG_BLUE = '\033[44m'
+    BG_MAGENTA = '\033[45m'
+    BG_CYAN = '\033[46m'
+    BG_WHITE = '\033[47m'
+
+    # Light background colors
+    BG_LIGHT_BLACK = '\033[100m'
+    BG_LIGHT_RED = '\033[101m'
+    BG_LIGHT_GREEN = '\033[102m'
+    BG_LIGHT_YELLOW = '\033[103m'
+    BG_LIGHT_BLUE = '\033[104m'
+    BG_LIGHT_MAGENTA = '\033[105m'
+    BG_LIGHT_CYAN = '\033[106m'
+    BG_LIGHT_WHITE = '\033[107m'
+
+    # Styles
+    BOLD = '\033[1m'
+    DIM = '\033[2m'
+    ITALIC = '\033[3m'
+    UNDERLINE = '\033[4m'
+    BLINK = '\033[5m'
+    REVERSE = '\033[7m'
+    HIDDEN = '\033[8m'
+    STRIKETHROUGH = '\033[9m'
+
+    # Reset
+    RESET = '\033[0m'
+
+class UIDObject:
+    """
+    Base class for objects with unique identifiers.
+
+    The registry is shared by the game thread, the socket handlers and all games
+    of the process. Single dict operations are atomic, so registering, getting and
+    removing an object take no lock; the operations of more than one step, like
+    iterating or renaming, hold the registry lock. Nothing yields while holding it,
+    so the native lock is also safe between eventlet green threads.
+    """
+
+    _objects = {}
+    _lock = threading.RLock()
+
+    def __init__(self):
+        """
+        Initializes a UIDObject and assigns a unique identifier.
+        """
+        self.__uid = self._generate_8_char_alphanumeric_uid()
+        self._objects[self.uid] = self
+
+    @classmethod
+    def iterate(cls, iterate_type:UIDObject):
+        """
+        Yield UID and object for all instances of the given type.
+
+        Args:
+            iterate_type (UIDObject): The type of UIDObject to iterate over.
+        """
+        with cls._lock:
+            # a copy, so the registry may change while the caller iterates
+            objects = list(cls._objects.items())
+        for uid, obj in objects:
+            if isinstance(obj, iterate_type):
+                yield uid, obj
+
+    @classmethod
+    def register(cls, uid:str, new_object:UIDObject):
+        """
+        Register new UID object.
+
+        Args:
+            uid (str): The unique identifier for the object.
+            new_object (UIDObject): The new object to register.
+        """
+        cls._objects[uid] = new_object
+
+    @classmethod
+    def get(cls, uid:str):
+        """
+        Get an object by its UID.
+
+        Args:
+            uid (str): The unique identifier of the object.
+
+        Returns:
+            UIDObject: The object with the given UID.
+        """
+        try:
+            return cls._objects[uid]
+        except KeyError:
+            raise ValueError(f"No object found with UID: {uid}") from None
+
+    @classmethod
+    def remove(cls, uid:str):
+        """
+        Remove an object by its UID.
+
+        Args:
+            uid (str): The unique identifier of the object.
+        """
+        if cls._objects.pop(uid, None) is None:
+            raise ValueError(f"No object found with UID: {uid}")
+
+    @staticmethod
+    def _generate_8_char_alphanumeric_uid():
+        """
+        Generate an 8-character alphanumeric UID.
+
+        Returns:
+            str: The generated UID.
+        """
+        return UIDObject._generate_uids(1)[0]
+
+    @staticmethod
+    def _generate_uids(count: int):
+        """
+        Generate several UIDs from one read of the random source.
+
+        Random bytes above the largest multiple of 62 are dropped and the others
+        are mapped to the alphabet, so every character stays uniformly distributed.
+
+        Args:
+            count (int): The number of UIDs.
+
+        Returns:
+            list[str]: The generated UIDs.
+        """
+        needed = count * UID_LENGTH
+        chars = ""
+        while len(chars) < needed:
+            # about 3% of the bytes get dropped, the margin avoids a second read
+            random_bytes = secrets.token_bytes(needed + needed // 8 + UID_LENGTH)
+            chars += random_bytes.translate(UID_TRANSLATION, UID_REJECTED_BYTES).decode("ascii")
+        return [chars[start:start + UID_LENGTH] for start in range(0, needed, UID_LENGTH)]
+
+    def clone(self, uid: str = None):
+        """
+        Copy the object under a new UID without running __init__.
+
+        The attributes are copied shallowly, so this is meant for objects whose
+        attributes are immutable values, like the cards of a deck template.
+
+        Args:
+            uid (str, optional): The UID of the copy, e.g. one of a batch from _generate_uids.
+
+        Returns:
+            UIDObject: The registered copy.
+        """
+        twin = object.__new__(type(self))
+        twin.__dict__.update(self.__dict__)
+        twin.__uid = uid or self._generate_8_char_alphanumeric_uid()
+        self._objects[twin.__uid] = twin
+        return twin
+
+    def _assign_uid(self, uid:str):
+        """
+        Replace the generated UID, used when restoring saved objects.
+
+        Args:
+            uid (str): The UID the object had when it was saved.
+        """
+        with self._lock:
+            del self._objects[self.__uid]
+            self.__uid = uid
+            self._objects[uid] = self
+
+    @property
+    def uid(self):
+        """
+        Return the UID of the object.
+
+        Returns:
+            str: The UID of the object.
+        """
+        return self.__uid
+
+class GameHost(UIDObject):
+    """
+    Base class of everything a game runs in.
+
+    The game calls these hooks around its turns. Without a server the game runs
+    headless, e.g. in a simulator or a room worker; Networking overwrites the hooks
+    for graceful shutdowns and the async mode of the socket server.
+    """
+    def __init__(self):
+        super().__init__()
+        self.__in_turn = False
+
+    @property
+    def shutdown_requested(self):
+        """
+        overwrite function
+
+        Returns True once the host wants the game loop to stop.
+        """
+        return False
+
+    def begin_turn(self):
+        """
+        overwrite function
+
+        Marks a turn as in flight.
+        """
+        self.__in_turn = True
+
+    def end_turn(self):
+        """
+        overwrite function
+
+        Marks the turn in flight as finished.
+        """
+        self.__in_turn = False
+
+    def turn_changed(self):
+        """
+        overwrite function
+
+        Called whenever a turn begins or the game ends, e.g. to arm the deadline of the turn.
+        """
+
+    @property
+    def turn_in_progress(self):
+        """
+        overwrite function
+
+        Returns True between begin_turn and end_turn.
+        """
+        return self.__in_turn
+
+    def sleep(self, seconds: float = 0):
+        """
+        overwrite function
+
+        Sleeps between two polls of the game loop.
+
+        Args:
+            seconds (float, optional): The time to sleep. Defaults to 0.
+        """
+        time.sleep(seconds)
+
+class ComponentManager:
+    """
+    Manager class for handling component registration and global UIDObject pool.
+
+    Components are registered in the active scope. Code that runs several games in
+    one process enters a scope per game, so every game gets its own "game_master",
+    "draw", "game" and "global" components. Outside of a scope the default registry
+    is used.
+
+    Registering and deleting a component check the registry first, so they hold
+    the registry lock, the lookups are single dict operations and take none. The
+    active scope is thread local, which eventlet patches to be local per green
+    thread. Only registering a component creates the registry of a scope, so a
+    late lookup in a deleted scope raises instead of leaking an empty registry.
+    """
+
+    _components = {}
+    _scoped_components = {}
+    _active = threading.local()
+    _lock = threading.RLock()
+
+    @classmethod
+    def _registry(cls, create=False):
+        """
+        Get the component registry of the active scope.
+
+        Args:
+            create (bool, optional): If True, an unknown scope gets a new registry. The caller holds the lock.
+
+        Returns:
+            dict[str, object]: The components of the active scope.
+
+        Raises:
+            KeyError: If the scope is unknown, e.g. was deleted, and create is False.
+        """
+        scope_id = getattr(cls._active, "scope_id", None)
+        if scope_id is None:
+            return cls._components
+        components = cls._scoped_components.get(scope_id)
+        if components is None:
+            if not create:
+                raise KeyError(f"Scope '{scope_id}' does not exist.")
+            components = cls._scoped_components[scope_id] = {}
+        return components
+
+    @classmethod
+    @contextmanager
+    def scope(cls, scope_id:str):
+        """
+        Activate a component scope for the current thread.
+
+        Args:
+            scope_id (str): The unique identifier of the scope, e.g. a room id.
+        """
+        previous = getattr(cls._active, "scope_id", None)
+        cls._active.scope_id = scope_id
+        try:
+            yield
+        finally:
+            cls._active.scope_id = previous
+
+    @classmethod
+    def delete_scope(cls, scope_id:str):
+        """
+        Delete a scope together with all of its components.
+
+        Args:
+            scope_id (str): The unique identifier of the scope.
+        """
+        with cls._lock:
+            cls._scoped_components.pop(scope_id, None)
+
+    @classmethod
+    def register_component(cls, component_id:str, component:object):
+        """
+        Register a new component with a given ID.
+
+        Args:
+            component_id (str): The unique identifier for the component.
+            component (object): The component to register.
+        """
+        with cls._lock:
+            components = cls._registry(create=True)
+            if component_id in components:
+                raise KeyError(f"Component with ID '{component_id}' already exists.")
+            components[component_id] = component
+
+    @classmethod
+    def delete_component(cls, component_id:str):
+        """
+        Delete a component by its ID.
+
+        Args:
+            component_id (str): The unique identifier of the component to delete.
+        """
+        with cls._lock:
+            components = cls._registry()
+            if component_id not in components:
+                raise KeyError(f"No component '{component_id}' to delete, because it does not exist.")
+            del components[component_id]
+
+    @classmethod
+    def get_component(cls, component_id:str):
+        """
+        Get a component by its ID.
+
+        Args:
+            component_id (str): The unique identifier of the component.
+
+        Returns:
+            object: The component with the given ID.
+        """
+        components = cls._registry()
+        try:
+            return components[component_id]
+        except KeyError:
+            raise KeyError(f"Component with ID '{component_id}' not found.") from None
+
+    @classmethod
+    def register_uid_object(cls, uid:str, new_object:UIDObject):
+        """
+        Register a new UIDObject.
+
+        Args:
+            uid (str): The unique identifier for the UIDObject.
+            new_object (UIDObject): The new UIDObject to register.
+        """
+        UIDObject.register(uid, new_object)
+
+    @classmethod
+    def get_uid_object(cls, uid:str):
+        """
+        Get a UIDObject by its UID.
+
+        Args:
+            uid (str): The unique identifier of the UIDObject.
+
+        Returns:
+            UIDObject: The UIDObject with the given UID.
+        """
+        return UIDObject.get(uid)
+
+    @classmethod
+    def remove_uid_object(cls, uid:str):
+        """
+        Remove a UIDObject by its UID.
+
+        Args:
+            uid (str): The unique identifier of the UIDObject to remove.
+        """
+        UIDObject.remove(uid)
+
+    @classmethod
+    def iterate_uid_objects(cls, iterate_type:UIDObject):
+        """
+        Iterate over UIDObjects of a specific type.
+
+        Args:
+            iterate_type (UIDObject): The type of UIDObject to iterate over.
+
+        Returns:
+            generator: A generator yielding UID and UIDObject pairs.
+        """
+        return UIDObject.iterate(iterate_type)
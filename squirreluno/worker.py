@@ -0,0 +1,332 @@
+from __future__ import annotations
+from .utils import ComponentManager
+from .metrics import REGISTRY
+from .profiler import RoomProfiler
+from .rules import Game
+from .rule_engine import HouseRules
+from .timers import TimerWheel
+from functools import partial
+import threading
+import argparse
+import pickle
+import select
+import socket
+import struct
+import heapq
+import time
+import os
+
+MESSAGE_HEADER = struct.Struct("!I")
+# seconds between two snapshots of the metrics sent to the router
+DEFAULT_METRICS_INTERVAL = 5.0
+
+def send_message(sock: socket.socket, message: dict):
+    """
+    Sends a length prefixed pickled message over a stream socket.
+
+    Args:
+        sock (socket.socket): The connected socket.
+        message (dict): The message to send.
+    """
+    data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+    sock.sendall(MESSAGE_HEADER.pack(len(data)) + data)
+
+def recv_message(sock: socket.socket):
+    """
+    Receives a message sent with send_message.
+
+    Args:
+        sock (socket.socket): The connected socket.
+
+    Returns:
+        dict: The message, or None if the peer closed the connection.
+    """
+    header = _recv_exact(sock, MESSAGE_HEADER.size)
+    if header is None:
+        return None
+    data = _recv_exact(sock, MESSAGE_HEADER.unpack(header)[0])
+    if data is None:
+        return None
+    return pickle.loads(data)
+
+def _recv_exact(sock: socket.socket, size: int):
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+class RoomGame(Game):
+    """
+    The game of a room, it tells its worker when the turn changes.
+    """
+    # called without arguments whenever a turn begins or the game ends
+    turn_listener = None
+
+    def turn_changed(self):
+        if self.turn_listener is not None:
+            self.turn_listener()
+
+class RoomWorker:
+    """
+    Hosts the games of the rooms pinned to one worker process.
+
+    The router serves the clients, so the worker runs the headless rules core and
+    never imports the web stack.
+
+    Every room lives in its own component scope. After each change the worker
+    reports the exported room state, so the router can move the room to a new
+    worker process if this one dies.
+
+    Rooms that wait for a decision, e.g. a color after a draw card, only hold an
+    entry in a deadline heap. The worker keeps serving the other rooms and takes
+    the default of a decision whose deadline passed.
+
+    With a turn timeout the turn of every room has a deadline in one timer wheel,
+    armed whenever the turn changes and cancelled when the game ends or the room
+    closes. The worker advances the wheel between two messages; a player who
+    missed the deadline draws and the turn is handed on.
+
+    The metrics of the worker live in its own process, so every metrics interval
+    the worker sends a snapshot of them to the router, which serves them on its
+    /metrics together with its own.
+    """
+    def __init__(self, socket_path: str, result_writer=None, turn_timeout: float = None,
+                 metrics_interval: float = DEFAULT_METRICS_INTERVAL):
+        """
+        Initializes the worker.
+
+        Args:
+            socket_path (str): The Unix socket the router connects to.
+            result_writer (ResultWriter, optional): The write-behind queue for finished games.
+            turn_timeout (float, optional): The seconds a player has for a turn, None or 0 for no limit.
+            metrics_interval (float, optional): The seconds between two metrics snapshots for the router.
+        """
+        self.socket_path = socket_path
+        self.result_writer = result_writer
+        self.turn_timeout = turn_timeout
+        self.metrics_interval = metrics_interval
+        # the first snapshot goes out right after the router connected
+        self.next_metrics = time.monotonic()
+        self.rooms = {}
+        self.decision_deadlines = []
+        self.turn_timers = TimerWheel()
+        self.__connection = None
+        self.__send_lock = threading.Lock()
+
+    def serve(self):
+        """
+        Accepts the router connection and handles its messages until it closes.
+        """
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.socket_path)
+        listener.listen(1)
+        connection, _ = listener.accept()
+        listener.close()
+        os.unlink(self.socket_path)
+        self.__connection = connection
+        with connection:
+            while True:
+                self.send_metrics()
+                for reply in self.expire_decisions():
+                    self.send(reply)
+                for replies in self.turn_timers.advance():
+                    for reply in replies:
+                        self.send(reply)
+                if not self._wait_for_message(connection):
+                    continue
+                message = recv_message(connection)
+                if message is None or message["op"] == "shutdown":
+                    break
+                for reply in self.handle(message):
+                    self.send(reply)
+
+    def _wait_for_message(self, connection: socket.socket):
+        """
+        Waits for the next message of the router, at most until the next decision deadline or tick of the turn timers.
+
+        Returns:
+            bool: True if a message can be read.
+        """
+        timeout = None
+        if self.decision_deadlines:
+            timeout = max(self.decision_deadlines[0][0] - time.time(), 0)
+        next_tick = self.turn_timers.next_deadline()
+        if next_tick is not None:
+            until_tick = max(next_tick - self.turn_timers.clock(), 0)
+            timeout = until_tick if timeout is None else min(timeout, until_tick)
+        if REGISTRY.metrics:
+            until_metrics = max(self.next_metrics - time.monotonic(), 0)
+            timeout = until_metrics if timeout is None else min(timeout, until_metrics)
+        readable, _, _ = select.select([connection], [], [], timeout)
+        return bool(readable)
+
+    def send_metrics(self):
+        """
+        Sends a snapshot of the metrics to the router once the metrics interval has passed.
+        """
+        now = time.monotonic()
+        if not REGISTRY.metrics or now < self.next_metrics:
+            return
+        self.next_metrics = now + self.metrics_interval
+        self.send({"op": "metrics", "room": None, "metrics": REGISTRY.snapshot()})
+
+    def expire_decisions(self, now: float = None):
+        """
+        Takes the defaults of the decisions whose deadline has passed.
+
+        Args:
+            now (float, optional): The current wall clock time. Defaults to time.time().
+
+        Returns:
+            list[dict]: The replies for the router.
+        """
+        now = time.time() if now is None else now
+        replies = []
+        while self.decision_deadlines and self.decision_deadlines[0][0] <= now:
+            _, room_id = heapq.heappop(self.decision_deadlines)
+            # entries of decided or closed rooms are dropped here instead of being searched for
+            game = self.rooms.get(room_id)
+            if game is not None and game.pending_decision is not None:
+                replies.extend(self.handle({"op": "expire", "room": room_id, "now": now}))
+        return replies
+
+    def _track_decision(self, room_id: str):
+        decision = self.rooms[room_id].pending_decision
+        if decision is not None:
+            heapq.heappush(self.decision_deadlines, (decision.deadline, room_id))
+
+    def _track_turn(self, room_id: str):
+        """
+        Arms the deadline of the player who has the turn in a room, or cancels it once the game ended.
+        """
+        game = self.rooms.get(room_id)
+        if game is not None and game.game_active and self.turn_timeout:
+            self.turn_timers.arm(room_id, self.turn_timeout, self.handle,
+                                 {"op": "turn_timeout", "room": room_id, "player": game.player_turn})
+        else:
+            self.turn_timers.cancel(room_id)
+
+    def _add_room(self, room_id: str, game: RoomGame):
+        self.rooms[room_id] = game
+        game.turn_listener = partial(self._track_turn, room_id)
+        self._track_turn(room_id)
+
+    def send(self, reply: dict):
+        """
+        Sends a reply to the router, also from the profiler threads.
+
+        Args:
+            reply (dict): The reply.
+        """
+        with self.__send_lock:
+            send_message(self.__connection, reply)
+
+    def handle(self, message: dict):
+        """
+        Handles one message of the router.
+
+        Args:
+            message (dict): The message, see RoomRouter for the operations.
+
+        Returns:
+            list[dict]: The replies for the router.
+        """
+        room_id = message["room"]
+        try:
+            with ComponentManager.scope(room_id):
+                return getattr(self, f"_handle_{message['op']}")(room_id, message)
+        except Exception as error:
+            return [{"op": "event", "room": room_id, "to": message.get("sid"),
+                     "event": "error", "data": {"room": room_id, "message": str(error)}}]
+
+    def _handle_create(self, room_id: str, message: dict):
+        if room_id in self.rooms:
+            raise ValueError(f"Room {room_id} already exists")
+        game = RoomGame(message["players"], result_writer=self.result_writer,
+                        house_rules=HouseRules.from_names(message.get("house_rules")))
+        self._add_room(room_id, game)
+        players = {player.name: player.uid for player in game.players.values()}
+        return [self._state_reply(room_id),
+                {"op": "event", "room": room_id, "to": None, "event": "room_created",
+                 "data": {"room": room_id, "players": players, "player_turn": game.player_turn}}]
+
+    def _handle_restore(self, room_id: str, message: dict):
+        self._add_room(room_id, RoomGame.from_state(message["state"], result_writer=self.result_writer))
+        self._track_decision(room_id)
+        return []
+
+    def _handle_action(self, room_id: str, message: dict):
+        game = self.rooms[room_id]
+        result = game.apply_action(message["player"], message["action"])
+        self._track_decision(room_id)
+        return self._update_replies(room_id, {"player": message["player"], "result": result})
+
+    def _handle_decide(self, room_id: str, message: dict):
+        choice = self.rooms[room_id].decide(message["player"], message["choice"])
+        return self._update_replies(room_id, {"player": message["player"], "decision": choice})
+
+    def _handle_expire(self, room_id: str, message: dict):
+        game = self.rooms[room_id]
+        decision = game.pending_decision
+        if not game.expire_decision(message["now"]):
+            return []
+        return self._update_replies(room_id, {"player": decision.player_uid, "decision": decision.default,
+                                              "expired": True})
+
+    def _handle_turn_timeout(self, room_id: str, message: dict):
+        game = self.rooms.get(room_id)
+        if game is None or not game.expire_turn(message["player"]):
+            return []
+        return self._update_replies(room_id, {"player": message["player"], "result": game.last_user_action,
+                                              "expired_turn": True})
+
+    def _update_replies(self, room_id: str, update: dict):
+        game = self.rooms[room_id]
+        decision = game.pending_decision
+        update.update(room=room_id, player_turn=game.player_turn, game_direction=game.game_direction,
+                      pending_decision=decision.to_data() if decision is not None else None)
+        return [self._state_reply(room_id),
+                {"op": "event", "room": room_id, "to": None, "event": "room_update", "data": update}]
+
+    def _handle_profile(self, room_id: str, message: dict):
+        profiler = RoomProfiler(self.rooms[room_id], interval_ms=message["interval_ms"])
+
+        def run():
+            report = profiler.run(message["seconds"])
+            self.send({"op": "profile", "room": room_id, "request": message["request"], "report": report})
+        threading.Thread(target=run, name=f"profile-{room_id}", daemon=True).start()
+        return []
+
+    def _handle_close(self, room_id: str, message: dict):
+        self.turn_timers.cancel(room_id)
+        self.rooms.pop(room_id).dispose()
+        ComponentManager.delete_scope(room_id)
+        return [{"op": "closed", "room": room_id}]
+
+    def _state_reply(self, room_id: str):
+        return {"op": "state", "room": room_id, "state": self.rooms[room_id].export_state()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SquirrelUno room worker")
+    parser.add_argument("--worker", required=True, help="Unix socket path to serve the router on")
+    parser.add_argument("--database", default=None, help="SQLAlchemy URL to record finished games in")
+    parser.add_argument("--turn-timeout", type=float, default=None, help="seconds a player has for a turn")
+    args = parser.parse_args(argv)
+
+    result_writer = None
+    if args.database:
+        from .persistence import create_database_engine, ResultWriter
+
+        result_writer = ResultWriter(create_database_engine(args.database))
+    try:
+        RoomWorker(args.worker, result_writer, args.turn_timeout).serve()
+    finally:
+        if result_writer is not None:
+            result_writer.close()
+
+if __name__ == "__main__":
+    main()
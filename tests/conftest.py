@@ -0,0 +1,7 @@
+import os
+import sys
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# the tests run against the checkout, installed or not, and reuse the scripted games of the benchmarks
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
@@ -0,0 +1,13 @@
+"""
+Concurrent actions, exports and game churn must conserve the cards, see benchmarks/concurrency.py.
+"""
+import pytest
+
+from concurrency import stress
+
+@pytest.mark.parametrize("run", range(2))
+def test_concurrent_actions_conserve_cards(run):
+    result = stress(players=6, seconds=1.5, readers=2, churners=1)
+    assert result["errors"] == []
+    assert result["violations"] == []
+    assert result["actions"] > 0 and result["exports"] > 0
@@ -0,0 +1,80 @@
+"""
+The single game server takes actions and decisions over the socket, for the seat of the sending connection only.
+"""
+import random
+
+import pytest
+
+from squirreluno.game_logic import GameMaster
+from squirreluno.utils import ComponentManager
+
+MAX_ACTIONS = 2000
+
+@pytest.fixture
+def game():
+    random.seed(7)
+    with ComponentManager.scope("test-game-master"):
+        game = GameMaster(["Alice", "Bob"], port=5999)
+        yield game
+        game.dispose()
+    ComponentManager.delete_scope("test-game-master")
+
+def seated(game, name):
+    client = game.test_client()
+    client.emit("claim_seat", {"name": name})
+    [seat] = client.get_received()
+    assert seat["name"] == "seat"
+    return client
+
+def last_snapshot(client):
+    snapshots = [event["args"][0] for event in client.get_received() if event["name"] == "snapshot"]
+    return snapshots[-1] if snapshots else None
+
+def test_actions_only_for_the_own_seat(game):
+    clients = {name: seated(game, name) for name in ("Alice", "Bob")}
+    uids = {player.name: player.uid for player in game.players.values()}
+    waiting = "Bob" if game.player_turn == uids["Alice"] else "Alice"
+    turn = "Alice" if waiting == "Bob" else "Bob"
+
+    clients[waiting].emit("action", {"action": "draw", "player": uids[turn]})
+    [error] = clients[waiting].get_received()
+    assert error["name"] == "error"
+    assert not game.drawn_this_turn
+
+    clients[turn].emit("action", {"action": "draw"})
+    assert game.drawn_this_turn
+    assert last_snapshot(clients[turn])["drawn_this_turn"]
+    assert last_snapshot(clients[waiting])["player_turn"] == uids[turn]
+
+def test_unseated_connections_are_rejected(game):
+    client = game.test_client()
+    client.emit("action", {"action": "draw", "player": game.player_turn})
+    [error] = client.get_received()
+    assert error["name"] == "error"
+    assert not game.drawn_this_turn
+
+def test_pending_decision_arrives_over_the_socket(game):
+    clients = {player.uid: seated(game, player.name) for player in game.players.values()}
+    for _ in range(MAX_ACTIONS):
+        if not game.game_active or game.pending_decision is not None:
+            break
+        player = game.players[game.player_turn]
+        actions = game.legal_actions(player)
+        if actions["cards"]:
+            clients[player.uid].emit("action", {"action": str(actions["cards"][0])})
+        elif actions["draw"]:
+            clients[player.uid].emit("action", {"action": "draw"})
+        else:
+            clients[player.uid].emit("action", {"action": "next"})
+    decision = game.pending_decision
+    assert decision is not None, "no card asked for a decision"
+
+    others = [uid for uid in clients if uid != decision.player_uid]
+    clients[others[0]].emit("decide", {"choice": decision.options[0]})
+    assert game.pending_decision is decision
+
+    choice = decision.options[-1]
+    clients[decision.player_uid].emit("decide", {"choice": choice})
+    assert game.pending_decision is None
+    snapshot = last_snapshot(clients[decision.player_uid])
+    assert snapshot["pending_decision"] is None
@@ -0,0 +1,17 @@
+"""
+The headless modules must run without the web stack and the database driver, room workers never import them.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+HEAVY_MODULES = ("flask", "flask_socketio", "engineio", "socketio", "eventlet", "sqlalchemy")
+
+@pytest.mark.parametrize("module", ["squirreluno.rules", "squirreluno.worker", "squirreluno.cli"])
+def test_headless_module_does_not_load_the_server_stack(module):
+    code = f"import sys, {module}\nprint(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "", f"{module} loads {result.stdout.strip()}"
@@ -0,0 +1,18 @@
+"""
+The memory of a game must stay within benchmarks/memory_budget.json.
+"""
+import json
+
+import pytest
+
+from memory_budget import DEFAULT_BUDGET, fresh_footprint, played_footprint
+
+with open(DEFAULT_BUDGET) as budget_file:
+    BUDGET = json.load(budget_file)
+
+@pytest.mark.parametrize("name, measure", [("fresh_game_bytes", fresh_footprint),
+                                           ("played_game_bytes", played_footprint)])
+def test_game_footprint_within_budget(name, measure):
+    footprint = measure()
+    assert footprint["total"] <= BUDGET[name], (f"{name} is {footprint['total']} B, budget {BUDGET[name]} B: "
+                                                f"{json.dumps(footprint)}")
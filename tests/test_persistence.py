@@ -0,0 +1,30 @@
+"""
+The write-behind queue keeps writing results when a commit listener fails.
+"""
+from sqlalchemy import func, select
+
+from squirreluno.persistence import GameResult, ResultWriter, create_database_engine, games_table
+
+def result(number):
+    players = [{"player_uid": f"u{seat}", "name": f"player{seat}", "game_position": seat, "won": seat == 0,
+                "cards_left": seat, "cards_played": 5, "cards_drawn": 2} for seat in range(2)]
+    return GameResult("u0", "player0", 100.0 + number, 160.0 + number, players)
+
+def test_failing_commit_listener_keeps_the_writer_running(tmp_path):
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'results.db'}")
+    writer = ResultWriter(engine, batch_rows=1, flush_interval_ms=10)
+    calls = []
+
+    def failing_listener(results):
+        calls.append(len(results))
+        raise RuntimeError("cache is gone")
+
+    writer.add_commit_listener(failing_listener)
+    for number in range(3):
+        assert writer.record(result(number))
+    writer.close(timeout=10)
+
+    with engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(games_table)).scalar() == 3
+    assert writer.written_games == 3 and sum(calls) == 3
+    engine.dispose()
@@ -0,0 +1,60 @@
+"""
+The room profiler only counts the turns of the game it profiles.
+"""
+import threading
+
+from hot_paths import drop_game, new_game, scripted_turn
+from squirreluno.profiler import RoomProfiler
+from squirreluno.utils import ComponentManager
+
+def profile_while_playing(profiler, follow, seconds=0.5):
+    """
+    Plays scripted games back to back while the profiler runs.
+
+    Args:
+        profiler (RoomProfiler): The profiler.
+        follow (bool): Profile the game that is played at the moment, like profiler_overhead.py.
+    """
+    stop = threading.Event()
+
+    def play():
+        games = 0
+        while not stop.is_set():
+            scope_id = f"profiled-played-{games}"
+            game = new_game(scope_id)
+            if follow:
+                profiler.game = game
+            with ComponentManager.scope(scope_id):
+                while not stop.is_set() and game.game_active and scripted_turn(game):
+                    pass
+            drop_game(game, scope_id)
+            games += 1
+
+    thread = threading.Thread(target=play)
+    thread.start()
+    try:
+        return profiler.run(seconds)
+    finally:
+        stop.set()
+        thread.join()
+
+def test_turns_of_other_rooms_are_not_sampled():
+    idle = new_game("profiled-idle")
+    # the idle room is inside a turn the whole time, only the played rooms run turn functions
+    idle.begin_turn()
+    try:
+        report = profile_while_playing(RoomProfiler(idle, interval_ms=1.0), follow=False)
+        assert report["ticks"] > 0
+        assert report["samples"] == 0
+    finally:
+        idle.end_turn()
+        drop_game(idle, "profiled-idle")
+
+def test_turns_of_the_profiled_room_are_sampled():
+    probe = new_game("profiled-probe")
+    try:
+        report = profile_while_playing(RoomProfiler(probe, interval_ms=1.0), follow=True)
+        assert report["samples"] > 0
+        assert "apply_action" in report["collapsed"]
+    finally:
+        drop_game(probe, "profiled-probe")
@@ -0,0 +1,146 @@
+"""
+The router only forwards actions and decisions for the seat bound to the sending connection,
+and serves the metrics its workers send.
+"""
+import socket
+import threading
+import time
+
+import pytest
+
+from squirreluno.metrics import REGISTRY, Counter, Histogram
+from squirreluno.sharding import RoomRouter
+from squirreluno.worker import RoomWorker, recv_message, send_message
+
+PLAYERS = {"Alice": "a1", "Bob": "b2"}
+
+class RecordingWorker:
+    """
+    Stands in for a worker process: keeps the forwarded messages, the test writes the replies.
+    """
+    node = "worker-test"
+
+    def __init__(self):
+        self.connection, self.replies = socket.socketpair()
+        self.messages = []
+
+    def send(self, message: dict):
+        self.messages.append(message)
+
+    def reply(self, router, *replies):
+        for reply in replies:
+            send_message(self.replies, reply)
+        self.replies.close()
+        router._read_worker(self)
+        self.connection, self.replies = socket.socketpair()
+
+@pytest.fixture
+def router():
+    router = RoomRouter(0, port=5998, seat_grace_period=60)
+    worker = RecordingWorker()
+    router.workers[worker.node] = worker
+    router.ring.add_node(worker.node)
+    yield router, worker
+    router.workers.clear()
+
+def received(client, name):
+    return [event["args"][0] for event in client.get_received() if event["name"] == name]
+
+def create_room(router, worker, **options):
+    creator = router.test_client()
+    creator.emit("create_room", dict(room="r1", players=list(PLAYERS), **options))
+    worker.reply(router, {"op": "event", "room": "r1", "to": None, "event": "room_created",
+                          "data": {"room": "r1", "players": PLAYERS, "player_turn": PLAYERS["Alice"]}},
+                 {"op": "state", "room": "r1",
+                  "state": {"game_active": True, "player_turn": PLAYERS["Alice"],
+                            "players": [{"name": name, "uid": uid} for name, uid in PLAYERS.items()]}})
+    return creator
+
+def test_actions_are_forwarded_for_the_own_seat_only(router):
+    router, worker = router
+    alice = create_room(router, worker)
+    [seat] = received(alice, "seat")
+    assert seat["player"] == PLAYERS["Alice"]
+
+    bob = router.test_client()
+    bob.emit("join_room", {"room": "r1", "name": "Bob"})
+    assert received(bob, "seat")[0]["player"] == PLAYERS["Bob"]
+
+    bob.emit("action", {"room": "r1", "player": PLAYERS["Alice"], "action": "draw"})
+    bob.emit("decide", {"room": "r1", "player": PLAYERS["Alice"], "choice": "red"})
+    assert len(received(bob, "error")) == 2
+    alice.emit("action", {"room": "r1", "action": "draw"})
+    bob.emit("decide", {"room": "r1", "choice": "red"})
+    forwarded = [(message["op"], message["player"]) for message in worker.messages if message["op"] != "create"]
+    assert forwarded == [("action", PLAYERS["Alice"]), ("decide", PLAYERS["Bob"])]
+
+def test_followers_and_strangers_cannot_act(router):
+    router, worker = router
+    create_room(router, worker)
+    follower = router.test_client()
+    follower.emit("join_room", {"room": "r1"})
+    follower.emit("action", {"room": "r1", "player": PLAYERS["Bob"], "action": "draw"})
+    stranger = router.test_client()
+    stranger.emit("close_room", {"room": "r1"})
+    assert received(follower, "error") and received(stranger, "error")
+    assert [message["op"] for message in worker.messages] == ["create"]
+
+def test_seat_is_held_for_a_disconnected_player(router):
+    router, worker = router
+    alice = create_room(router, worker)
+    [seat] = received(alice, "seat")
+    alice.disconnect()
+
+    intruder = router.test_client()
+    intruder.emit("join_room", {"room": "r1", "name": "Alice"})
+    assert received(intruder, "error")
+
+    returning = router.test_client(auth={"room": "r1", "token": seat["token"]})
+    [resumed] = received(returning, "resume")
+    assert resumed["player"] == PLAYERS["Alice"]
+    returning.emit("action", {"room": "r1", "action": "draw"})
+    assert worker.messages[-1]["player"] == PLAYERS["Alice"]
+
+    expired = router.test_client(auth={"room": "r1", "token": "unknown"})
+    assert received(expired, "session_expired")
+
+def test_worker_metrics_are_served_by_the_router(router):
+    router, worker = router
+    histogram = Histogram("test_worker_turn_seconds", "Turns of the worker.", buckets=(0.001, 0.01))
+    counter = Counter("test_worker_games", "Games of the worker.")
+    for value in (0.0005, 0.005, 0.5):
+        histogram.observe(value)
+    counter.inc(3)
+    snapshot = {metric.name: metric.snapshot() for metric in (histogram, counter)}
+    worker.reply(router, {"op": "metrics", "room": None, "metrics": snapshot})
+    router.worker_metrics["worker-other"] = snapshot
+
+    rendered = router.metrics_registry().render()
+    assert 'test_worker_turn_seconds_bucket{le="0.01"} 4' in rendered
+    assert "test_worker_turn_seconds_count 6" in rendered
+    assert "test_worker_games_total 6" in rendered
+
+def test_worker_sends_metrics_snapshots(tmp_path):
+    if not REGISTRY.metrics:
+        pytest.skip("instrumentation is switched off")
+    socket_path = str(tmp_path / "worker.sock")
+    room_worker = RoomWorker(socket_path, metrics_interval=0.05)
+    thread = threading.Thread(target=room_worker.serve)
+    thread.start()
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    deadline = time.monotonic() + 5
+    while True:
+        try:
+            connection.connect(socket_path)
+            break
+        except (FileNotFoundError, ConnectionRefusedError):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    try:
+        snapshots = [recv_message(connection) for _ in range(2)]
+    finally:
+        send_message(connection, {"op": "shutdown", "room": None})
+        thread.join()
+        connection.close()
+    assert [snapshot["op"] for snapshot in snapshots] == ["metrics", "metrics"]
+    assert snapshots[0]["metrics"] == REGISTRY.snapshot()
@@ -0,0 +1,72 @@
+"""
+The headless rules core stays quiet and its legal moves are accepted by apply_action.
+"""
+import random
+
+import pytest
+
+from hot_paths import drop_game, new_game
+from squirreluno.utils import ComponentManager
+
+MAX_MOVES = 3000
+
+def test_creating_a_game_writes_nothing(capsys):
+    random.seed(3)
+    game = new_game("quiet-game")
+    drop_game(game, "quiet-game")
+    assert capsys.readouterr().out == ""
+
+def play_legal_move(game, rng):
+    """
+    Plays a random move of those legal_actions offers, returns False if there is none.
+    """
+    decision = game.pending_decision
+    if decision is not None:
+        choose = game.legal_actions(game.players[decision.player_uid])["choose"]
+        assert choose
+        game.decide(decision.player_uid, rng.choice(choose))
+        return True
+    player = game.players[game.player_turn]
+    actions = game.legal_actions(player)
+    moves = [str(index) for index in actions["cards"]] + [name for name in ("draw", "next") if actions[name]]
+    if not moves:
+        return False
+    move = rng.choice(moves)
+    result = game.apply_action(player.uid, move)
+    assert result is None or not result.startswith("Invalid action"), f"{move} was offered but rejected"
+    return True
+
+@pytest.mark.parametrize("seed", range(5))
+def test_legal_moves_are_accepted(seed):
+    random.seed(seed)
+    rng = random.Random(seed)
+    scope_id = f"legal-moves-{seed}"
+    game = new_game(scope_id)
+    try:
+        with ComponentManager.scope(scope_id):
+            for _ in range(MAX_MOVES):
+                if not game.game_active or not play_legal_move(game, rng):
+                    break
+    finally:
+        drop_game(game, scope_id)
+
+def test_no_draw_is_offered_without_cards_to_draw():
+    random.seed(11)
+    game = new_game("empty-draw-stack")
+    try:
+        with ComponentManager.scope("empty-draw-stack"):
+            player = game.players[game.player_turn]
+            other = next(uid for uid in game.players if uid != player.uid)
+            # every card that could be drawn or reshuffled ends up in the hand of the other player
+            for card in list(game.draw_stack.cards.values()):
+                card.transfer_owner("draw", other)
+            top_card = game.game_stack.last_added_card
+            for card in list(game.game_stack.cards.values()):
+                if card is not top_card:
+                    card.transfer_owner("game", other)
+            assert not game.can_draw()
+            assert game.legal_actions(player)["draw"] is False
+            with pytest.raises(ValueError):
+                game.apply_action(player.uid, "draw")
+    finally:
+        drop_game(game, "empty-draw-stack")
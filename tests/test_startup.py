@@ -0,0 +1,56 @@
+"""
+The production server must accept connections within the startup budget, measured from the process spawn.
+"""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from squirreluno.cli import parse_args
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+CONNECT_POLL_INTERVAL = 0.005
+STOP_TIMEOUT = 10
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+def connect_within(port: int, deadline: float):
+    """
+    Tries to connect until the deadline.
+
+    Returns:
+        bool: True if a connection was accepted.
+    """
+    while time.perf_counter() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=CONNECT_POLL_INTERVAL * 10).close()
+            return True
+        except OSError:
+            time.sleep(CONNECT_POLL_INTERVAL)
+    return False
+
+def test_production_server_accepts_connections_within_budget():
+    budget_ms = parse_args([]).startup_budget_ms
+    port = free_port()
+    environment = {name: value for name, value in os.environ.items() if not name.startswith("SQUIRRELUNO_")}
+    spawned = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "squirreluno", "--production", "--host", "127.0.0.1",
+                               "--port", str(port), "--players", "Alice", "Bob", "--grace-period", "0"],
+                              cwd=REPO_DIR, env=environment, stdin=subprocess.DEVNULL,
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    try:
+        accepted = connect_within(port, spawned + budget_ms / 1000)
+        elapsed_ms = (time.perf_counter() - spawned) * 1000
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            output = server.communicate(timeout=STOP_TIMEOUT)[0]
+        except subprocess.TimeoutExpired:
+            server.kill()
+            output = server.communicate()[0]
+    assert accepted, f"no connection accepted {elapsed_ms:.0f} ms after the spawn, budget {budget_ms} ms:\n{output}"
@@ -0,0 +1,37 @@
+"""
+Read-through cache invalidation and the bounds of the stats queries.
+"""
+from squirreluno.persistence import GameResult, ResultWriter, create_database_engine
+from squirreluno.stats import MAX_QUERY_LIMIT, ReadThroughCache, StatsService
+
+def test_invalidation_during_load_is_not_stored():
+    cache = ReadThroughCache()
+    loads = []
+
+    def stale_loader():
+        # the result writer commits and invalidates while the stale value is loaded
+        cache.invalidate(lambda key: True)
+        loads.append("stale")
+        return "stale"
+
+    assert cache.get_or_load("top", stale_loader) == "stale"
+    assert len(cache) == 0
+    assert cache.get_or_load("top", lambda: "fresh") == "fresh"
+    assert cache.get_or_load("top", lambda: "reloaded") == "fresh"
+
+def test_query_limits_are_bounded(tmp_path):
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'results.db'}")
+    writer = ResultWriter(engine)
+    for number in range(3):
+        players = [{"player_uid": f"u{seat}", "name": f"player{number}-{seat}", "game_position": seat,
+                    "won": seat == 0, "cards_left": seat, "cards_played": 5, "cards_drawn": 2} for seat in range(2)]
+        writer.record(GameResult("u0", f"player{number}-0", 100.0 + number, 160.0 + number, players))
+    writer.close(timeout=10)
+
+    stats = StatsService(engine, cache=ReadThroughCache(max_entries=0))
+    # a negative LIMIT means no limit to SQLite
+    assert len(stats.top_players(-1)) == 1
+    assert len(stats.recent_games(limit=-1)) == 1
+    assert len(stats.recent_games(limit=0)) == 1
+    assert len(stats.top_players(MAX_QUERY_LIMIT + 1)) == 6
+    engine.dispose()
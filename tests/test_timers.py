@@ -0,0 +1,103 @@
+"""
+The timer wheel fires every deadline once, in the first tick at or after it, across all wheel levels.
+"""
+import pytest
+
+from squirreluno.timers import MAX_TICKS, WHEEL_SIZE, TimerWheel
+
+TICK = 0.1
+
+class SimulatedClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def wheel():
+    clock = SimulatedClock()
+    wheel = TimerWheel(tick=TICK, clock=clock)
+    wheel.fired = []
+    return wheel
+
+def arm(wheel, key, ticks):
+    wheel.arm(key, ticks * TICK, lambda: wheel.fired.append((key, wheel.current_tick)) or key)
+
+def step_until(wheel, tick):
+    """
+    Advances the wheel one tick at a time, like the worker loop does.
+    """
+    while wheel.current_tick < tick:
+        wheel.advance((wheel.current_tick + 1) * TICK)
+
+@pytest.mark.parametrize("ticks", [1, 2, WHEEL_SIZE - 1, WHEEL_SIZE, WHEEL_SIZE + 1, 3 * WHEEL_SIZE + 7,
+                                   WHEEL_SIZE ** 2 - 1, WHEEL_SIZE ** 2, WHEEL_SIZE ** 2 + WHEEL_SIZE + 1])
+def test_deadlines_fire_in_their_tick(wheel, ticks):
+    arm(wheel, "room", ticks)
+    step_until(wheel, ticks - 1)
+    assert wheel.fired == []
+    step_until(wheel, ticks)
+    assert wheel.fired == [("room", ticks)]
+    assert len(wheel) == 0
+
+def test_deadline_between_ticks_fires_in_the_next_tick(wheel):
+    wheel.arm("room", 2.5 * TICK, lambda: "room")
+    assert wheel.advance(2 * TICK) == []
+    assert wheel.advance(3 * TICK) == ["room"]
+
+def test_timers_of_all_levels_fire_in_order(wheel):
+    deadlines = {f"t{ticks}": ticks for ticks in (5, WHEEL_SIZE + 3, 2 * WHEEL_SIZE, WHEEL_SIZE ** 2 + 1, 70000)}
+    for key, ticks in deadlines.items():
+        arm(wheel, key, ticks)
+    step_until(wheel, max(deadlines.values()) + 2)
+    assert wheel.fired == sorted(deadlines.items(), key=lambda item: item[1])
+
+def test_cancel_and_rearm(wheel):
+    arm(wheel, "cancelled", 10)
+    arm(wheel, "rearmed", WHEEL_SIZE + 10)
+    assert wheel.cancel("cancelled") is True
+    assert wheel.cancel("cancelled") is False
+    arm(wheel, "rearmed", 20)
+    step_until(wheel, WHEEL_SIZE + 20)
+    assert wheel.fired == [("rearmed", 20)]
+
+def test_reset_keeps_the_callback(wheel):
+    arm(wheel, "room", 5)
+    assert wheel.reset("room", 30 * TICK) is True
+    assert wheel.reset("unknown", TICK) is False
+    step_until(wheel, 29)
+    assert wheel.fired == []
+    step_until(wheel, 30)
+    assert wheel.fired == [("room", 30)]
+
+def test_advance_after_an_idle_jump(wheel):
+    arm(wheel, "near", 3)
+    arm(wheel, "far", 2 * WHEEL_SIZE + 5)
+    # the worker slept through many ticks, one advance fires everything that is due
+    assert sorted(wheel.advance((3 * WHEEL_SIZE) * TICK)) == ["far", "near"]
+    assert len(wheel) == 0
+    # an empty wheel jumps to the target at once, later timers count from there
+    wheel.advance(1000000 * TICK)
+    assert wheel.current_tick == 1000000
+    arm(wheel, "after", 2)
+    assert wheel.advance(1000001 * TICK) == []
+    assert wheel.advance(1000002 * TICK) == ["after"]
+
+def test_deadline_beyond_the_wheels_waits_and_fires(wheel):
+    arm(wheel, "far", MAX_TICKS + 10)
+    arm(wheel, "near", 1)
+    assert wheel.advance(TICK) == ["near"]
+    assert wheel.advance((MAX_TICKS + 9) * TICK) == []
+    assert "far" in wheel
+    assert wheel.advance((MAX_TICKS + 10) * TICK) == ["far"]
+
+def test_callbacks_may_arm_again(wheel):
+    def rearm():
+        wheel.fired.append(wheel.current_tick)
+        if len(wheel.fired) < 3:
+            wheel.arm("room", 4 * TICK, rearm)
+
+    wheel.arm("room", 4 * TICK, rearm)
+    step_until(wheel, 20)
+    assert wheel.fired == [4, 8, 12]